@@ -2,19 +2,15 @@
 Admin interface for chatbot
 """
 from django.contrib import admin
-from .models import ChatSession, ChatMessage, ChatFeedback, CommonQuestion, ChatAnalytics
+from .models import ChatSession, ChatMessage, ChatFeedback, CommonQuestion, ChatAnalytics, ChatAnalyticsWatermark, ChatArchive
 
 
 @admin.register(ChatSession)
 class ChatSessionAdmin(admin.ModelAdmin):
-    list_display = ['session_id', 'user', 'started_at', 'last_message_at', 'is_active', 'message_count']
-    list_filter = ['is_active', 'started_at']
+    list_display = ['session_id', 'user', 'started_at', 'last_message_at', 'is_active', 'archived_at', 'user_message_count']
+    list_filter = ['is_active', 'started_at', 'archived_at']
     search_fields = ['session_id', 'user__email', 'user__first_name', 'user__last_name']
-    readonly_fields = ['session_id', 'started_at', 'last_message_at']
-    
-    def message_count(self, obj):
-        return obj.messages.count()
-    message_count.short_description = 'Messages'
+    readonly_fields = ['session_id', 'started_at', 'last_message_at', 'user_message_count']
 
 
 @admin.register(ChatMessage)
@@ -55,3 +51,17 @@ class ChatAnalyticsAdmin(admin.ModelAdmin):
     list_filter = ['date']
     readonly_fields = ['date', 'created_at', 'updated_at']
 
+
+
+@admin.register(ChatAnalyticsWatermark)
+class ChatAnalyticsWatermarkAdmin(admin.ModelAdmin):
+    list_display = ['source', 'last_id', 'updated_at']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(ChatArchive)
+class ChatArchiveAdmin(admin.ModelAdmin):
+    list_display = ['date', 'session_count', 'message_count', 'created_at']
+    list_filter = ['date']
+    exclude = ['data']
+    readonly_fields = ['date', 'session_count', 'message_count', 'created_at']
@@ -4,9 +4,120 @@ Supports both OpenAI (paid) and Google Gemini (free)
 """
 import os
 import json
+import re
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from django.conf import settings
+from .faq import faq_index, tokenize
+from .grounding import grounding_snapshots
+from .prompts import SYSTEM_PREFIX, build_user_fragment
+from .intents import intent_classifier
+from .providers import (
+    OpenAIProvider, GeminiProvider, StubProvider, ResilientClient, ProviderError
+)
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of generated chatbot answers with a TTL
+    
+    Entries are keyed on the normalized message, the detected intent, a
+    coarse user bucket (role and civic level) and an optional context key
+    (the version of any live data the answer used). A lookup tries the exact
+    normalized text first, then the message's content-word set, so
+    rephrasings like "How do I report a pothole?" and "report pothole how"
+    share an answer.
+    """
+    
+    # Shorter messages are usually follow-ups that depend on the conversation
+    MIN_CONTENT_WORDS = 2
+    
+    def __init__(self, max_entries: int = 1000, ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def normalize(message: str) -> str:
+        return ' '.join(re.findall(r"[a-z0-9']+", message.lower()))
+    
+    @staticmethod
+    def user_bucket(user_data: Optional[Dict]) -> str:
+        if not user_data:
+            return 'anonymous'
+        return f"{user_data.get('role', 'citizen')}:{user_data.get('level', 1)}"
+    
+    def _keys(self, message: str, intent: str, user_data: Optional[Dict],
+              context_key: str = '') -> Optional[Tuple[str, str]]:
+        normalized = self.normalize(message)
+        # Same terms the FAQ index matches on (chatbot.faq.tokenize)
+        content_words = sorted(set(tokenize(message)))
+        if len(content_words) < self.MIN_CONTENT_WORDS:
+            return None
+        prefix = f"{intent}|{self.user_bucket(user_data)}|{context_key}|"
+        return prefix + 'exact:' + normalized, prefix + 'words:' + ' '.join(content_words)
+    
+    def get(self, message: str, intent: str, user_data: Optional[Dict] = None,
+            context_key: str = '') -> Optional[str]:
+        keys = self._keys(message, intent, user_data, context_key)
+        if keys is None:
+            return None
+        
+        now = time.monotonic()
+        with self._lock:
+            for index, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, response = entry
+                if expires_at < now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                if index == 0:
+                    self.hits += 1
+                else:
+                    self.near_hits += 1
+                return response
+            self.misses += 1
+        return None
+    
+    def set(self, message: str, intent: str, user_data: Optional[Dict], response: str,
+            context_key: str = ''):
+        keys = self._keys(message, intent, user_data, context_key)
+        if keys is None:
+            return
+        
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (expires_at, response)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+        }
 
 
 class CivicChatbotAI:
@@ -18,231 +129,280 @@ class CivicChatbotAI:
     def __init__(self):
         self.openai_key = os.getenv('OPENAI_API_KEY')
         self.gemini_key = os.getenv('GEMINI_API_KEY')
+        self.response_cache = ResponseCache(
+            max_entries=getattr(settings, 'CHATBOT_RESPONSE_CACHE_SIZE', 1000),
+            ttl_seconds=getattr(settings, 'CHATBOT_RESPONSE_CACHE_TTL', 3600)
+        )
         
-        # Determine which AI service to use
+        # Determine which AI services to use; the second configured one backs up the first
+        providers = []
+        if os.getenv('CHATBOT_AI_SERVICE') == 'fake':
+            providers.append(self._init_fake())
         if self.openai_key:
-            self.ai_service = 'openai'
-            self._init_openai()
-        elif self.gemini_key:
-            self.ai_service = 'gemini'
-            self._init_gemini()
+            providers.append(self._init_openai())
+        if self.gemini_key:
+            providers.append(self._init_gemini())
+        providers = [provider for provider in providers if provider is not None]
+        
+        if providers:
+            self.ai_service = providers[0].name
+            hedge_after_ms = getattr(settings, 'CHATBOT_HEDGE_AFTER_MS', 0)
+            self.provider_client = ResilientClient(
+                providers[0],
+                providers[1] if len(providers) > 1 else None,
+                timeout=getattr(settings, 'CHATBOT_PROVIDER_TIMEOUT', 8.0),
+                retries=getattr(settings, 'CHATBOT_PROVIDER_RETRIES', 1),
+                hedge_after=hedge_after_ms / 1000 if hedge_after_ms else None,
+                failure_threshold=getattr(settings, 'CHATBOT_BREAKER_FAILURES', 5),
+                reset_timeout=getattr(settings, 'CHATBOT_BREAKER_RESET_SECONDS', 30)
+            )
         else:
             self.ai_service = 'fallback'
+            self.provider_client = None
             print("[!] No AI API key found. Using fallback responses.")
     
+    def _init_fake(self):
+        """Initialize the offline stub provider"""
+        def responder(messages):
+            user_message = messages[-1]['content']
+            return self._generate_fallback_response(user_message, self._detect_intent(user_message))
+        
+        return StubProvider(
+            responder,
+            token_delay=float(os.getenv('CHATBOT_FAKE_TOKEN_DELAY', '0.02')),
+            latency=float(os.getenv('CHATBOT_FAKE_LATENCY_MS', '0')) / 1000,
+            failure_rate=float(os.getenv('CHATBOT_FAKE_FAILURE_RATE', '0'))
+        )
+    
     def _init_openai(self):
         """Initialize OpenAI client"""
         try:
-            from openai import OpenAI
-            self.client = OpenAI(api_key=self.openai_key)
-            self.model = "gpt-3.5-turbo"  # or "gpt-4" for better quality
+            provider = OpenAIProvider(self.openai_key, model="gpt-3.5-turbo")  # or "gpt-4" for better quality
             print("[OK] OpenAI initialized")
+            return provider
         except ImportError:
             print("[!] OpenAI package not installed. Run: pip install openai")
-            self.ai_service = 'fallback'
         except Exception as e:
             print(f"[!] OpenAI initialization error: {e}")
-            self.ai_service = 'fallback'
+        return None
     
     def _init_gemini(self):
         """Initialize Google Gemini client"""
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=self.gemini_key)
-            self.client = genai.GenerativeModel('gemini-pro')
+            provider = GeminiProvider(self.gemini_key, model='gemini-pro')
             print("[OK] Google Gemini initialized")
+            return provider
         except ImportError:
             print("[!] Google GenAI package not installed. Run: pip install google-generativeai")
-            self.ai_service = 'fallback'
         except Exception as e:
             print(f"[!] Gemini initialization error: {e}")
-            self.ai_service = 'fallback'
+        return None
     
     def get_system_context(self, user_data: Optional[Dict] = None) -> str:
         """
         Build system context about the civic platform
         """
-        context = """You are a helpful AI assistant for a Civic Engagement Platform. 
-        
-Your purpose is to help citizens:
-- Report community issues (potholes, broken lights, pollution, etc.)
-- Participate in community forums and discussions
-- Attend and RSVP to community events
-- View government transparency data (budgets, projects, spending)
-- Engage in civic activities and earn rewards
-- Track their civic engagement level and community credits
-
-Platform Features:
-1. **Issue Reporting**: Citizens report problems with photos, location, and description
-2. **Community Forum**: Discussions, polls, and petitions for community engagement
-3. **Events**: Community events, volunteer opportunities, RSVP system
-4. **Transparency Dashboard**: Public spending, government projects, performance metrics
-5. **Civic Rewards**: Gamification system where users earn points and credits for participation
-6. **Maps**: Interactive maps showing issues and events by location
-
-Civic Levels System:
-- Level 1: New Citizen (0 points) - Basic access + 10 credits/month
-- Level 2: Active Neighbor (100 points) - Priority event registration + 25 credits/month
-- Level 3: Community Helper (300 points) - Priority issue response + 50 credits/month
-- Level 4: Civic Champion (750 points) - Direct messaging to officials + 100 credits/month
-- Level 5: Local Leader (1500 points) - Urban planning consultation + 200 credits/month
-- Level 6: City Ambassador (3000 points) - All benefits + 500 credits/month
-- Level 7: Urban Hero (5000 points) - Elite status + 1000 credits/month
-
-Earning Points:
-- Report issue: 10 points
-- Issue resolved: 50 points
-- Attend event: 20 points
-- Forum post: 15 points
-- Vote in poll: 5 points
-- Sign petition: 10 points
-
-Community Credits Can Be Redeemed For:
-- Parking fee waiver (50 credits)
-- Permit priority processing (100 credits)
-- Recreation center pass (150 credits)
-- Public transit credit (75 credits)
-- Event ticket (25 credits)
-- Urban planning consultation (500 credits)
-
-User Roles:
-- Citizens: Can report issues, participate in forums, RSVP events
-- Officials: Can respond to issues, update projects, create events
-- Admins: Full platform management
-
-Be friendly, concise, and helpful. Provide step-by-step guidance when needed.
-If asked about reporting an issue, guide them through: Go to Dashboard > Issues > Create New Issue.
-If asked about events, direct them to: Dashboard > Events.
-If asked about their level/rewards, direct them to: Dashboard > Profile or Gamification page.
-
-Remember: You're helping build a better community through civic engagement!"""
-
-        if user_data:
-            user_info = f"""
-
-Current User Context:
-- Name: {user_data.get('name', 'User')}
-- Role: {user_data.get('role', 'citizen').title()}
-- Civic Level: {user_data.get('level', 1)} - {user_data.get('level_name', 'New Citizen')}
-- Total Points: {user_data.get('points', 0)}
-- Community Credits: {user_data.get('credits', 0)}"""
-            context += user_info
-        
-        return context
+        if not user_data:
+            return SYSTEM_PREFIX
+        return SYSTEM_PREFIX + "\n\n" + self._user_fragment(user_data)
+    
+    def _user_fragment(self, user_data: Dict) -> str:
+        return user_data.get('fragment') or build_user_fragment(user_data)
     
     def generate_response(
         self, 
         user_message: str, 
         conversation_history: List[Dict] = None,
-        user_data: Optional[Dict] = None
+        user_data: Optional[Dict] = None,
+        llm_permit: Optional[Callable[[], bool]] = None,
+        user_id: Optional[int] = None
     ) -> Tuple[str, str, float, int]:
         """
         Generate AI response
         Returns: (response_text, intent, confidence, response_time_ms)
+        
+        llm_permit is called only when a provider would be used; if it
+        returns False the answer comes from the FAQ or canned text instead.
+        user_id selects the user's own data for grounding.
         """
         start_time = time.time()
         
         # Detect intent first
         intent = self._detect_intent(user_message)
         
-        # Generate response based on AI service
-        if self.ai_service == 'openai':
-            response = self._generate_openai_response(user_message, conversation_history, user_data)
-        elif self.ai_service == 'gemini':
-            response = self._generate_gemini_response(user_message, conversation_history, user_data)
+        # Curated FAQ answers skip generation entirely
+        faq_match = faq_index.answer(user_message)
+        if faq_match:
+            question, confidence = faq_match
+            return question.answer, intent, confidence, int((time.time() - start_time) * 1000)
+        
+        # Live platform data for this intent, from precomputed snapshots
+        grounding = grounding_snapshots.context(intent, user_id)
+        cache_key = self._grounding_cache_key(grounding)
+        
+        # Generate response based on AI service, reusing cached answers where possible
+        if self.ai_service == 'fallback':
+            response = self._with_grounding(self._generate_fallback_response(user_message, intent), grounding)
         else:
-            response = self._generate_fallback_response(user_message, intent)
+            response = None
+            if cache_key is not None:
+                response = self.response_cache.get(user_message, intent, user_data, cache_key)
+            if response is None and llm_permit is not None and not llm_permit():
+                response = self._with_grounding(self._generate_degraded_response(user_message, intent), grounding)
+            elif response is None:
+                try:
+                    response = self.provider_client.complete(
+                        self._build_openai_messages(user_message, conversation_history, user_data, grounding)
+                    )
+                    if cache_key is not None:
+                        self.response_cache.set(user_message, intent, user_data, response, cache_key)
+                except ProviderError as e:
+                    print(f"[ERROR] {self.ai_service} Error: {str(e)}")
+                    response = self._with_grounding(self._generate_degraded_response(user_message, intent), grounding)
         
         response_time_ms = int((time.time() - start_time) * 1000)
         confidence = 0.9 if self.ai_service != 'fallback' else 0.5
         
         return response, intent, confidence, response_time_ms
     
-    def _detect_intent(self, message: str) -> str:
-        """Detect user intent from message"""
-        message_lower = message.lower()
+    def stream_response(
+        self,
+        user_message: str,
+        conversation_history: List[Dict] = None,
+        user_data: Optional[Dict] = None,
+        llm_permit: Optional[Callable[[], bool]] = None,
+        user_id: Optional[int] = None
+    ) -> Tuple[str, Iterator[str]]:
+        """
+        Generate AI response as a stream of text chunks
+        Returns: (intent, chunk iterator)
         
-        # Intent keywords mapping
-        intent_keywords = {
-            'report_issue': ['report', 'issue', 'problem', 'pothole', 'broken', 'fix', 'damage'],
-            'find_events': ['event', 'volunteer', 'activity', 'rsvp', 'attend', 'happening'],
-            'forum_help': ['forum', 'discussion', 'poll', 'petition', 'post', 'comment'],
-            'transparency': ['budget', 'spending', 'project', 'transparency', 'money', 'government'],
-            'rewards': ['points', 'level', 'credit', 'reward', 'badge', 'achievement', 'leaderboard'],
-            'account': ['profile', 'account', 'password', 'email', 'settings'],
-            'how_to': ['how', 'what', 'where', 'when', 'guide', 'help', 'tutorial'],
-        }
+        Provider errors before the first chunk fall back to the canned
+        response; errors mid-stream end the stream with what was sent.
+        llm_permit and user_id work as in generate_response.
+        """
+        intent = self._detect_intent(user_message)
+        return intent, self._stream_with_fallback(
+            user_message, conversation_history, user_data, intent, llm_permit, user_id
+        )
+    
+    def _stream_with_fallback(self, user_message, conversation_history, user_data, intent,
+                              llm_permit, user_id) -> Iterator[str]:
+        faq_match = faq_index.answer(user_message)
+        if faq_match:
+            yield faq_match[0].answer
+            return
         
-        for intent, keywords in intent_keywords.items():
-            if any(keyword in message_lower for keyword in keywords):
-                return intent
+        grounding = grounding_snapshots.context(intent, user_id)
+        cache_key = self._grounding_cache_key(grounding)
         
-        return 'general'
-    
-    def _generate_openai_response(
-        self, 
-        user_message: str, 
-        conversation_history: List[Dict],
-        user_data: Optional[Dict]
-    ) -> str:
-        """Generate response using OpenAI GPT"""
+        if self.ai_service != 'fallback' and cache_key is not None:
+            cached = self.response_cache.get(user_message, intent, user_data, cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        if self.ai_service == 'fallback':
+            yield self._with_grounding(self._generate_fallback_response(user_message, intent), grounding)
+            return
+        
+        if llm_permit is not None and not llm_permit():
+            yield self._with_grounding(self._generate_degraded_response(user_message, intent), grounding)
+            return
+        
+        chunks = self.provider_client.stream(
+            self._build_openai_messages(user_message, conversation_history, user_data, grounding)
+        )
+        parts = []
         try:
-            # Build messages for OpenAI
-            messages = [
-                {"role": "system", "content": self.get_system_context(user_data)}
-            ]
-            
-            # Add conversation history
-            if conversation_history:
-                for msg in conversation_history[-10:]:  # Last 10 messages for context
-                    role = "user" if msg.get('sender') == 'user' else "assistant"
-                    messages.append({"role": role, "content": msg.get('message', '')})
-            
-            # Add current message
-            messages.append({"role": "user", "content": user_message})
-            
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content.strip()
-            
+            for chunk in chunks:
+                if chunk:
+                    parts.append(chunk)
+                    yield chunk
         except Exception as e:
-            print(f"[ERROR] OpenAI Error: {str(e)}")
-            return self._generate_fallback_response(user_message, self._detect_intent(user_message))
+            print(f"[ERROR] {self.ai_service} streaming error: {str(e)}")
+            if not parts:
+                yield self._with_grounding(self._generate_degraded_response(user_message, intent), grounding)
+            return
+        
+        if parts and cache_key is not None:
+            self.response_cache.set(user_message, intent, user_data, ''.join(parts).strip(), cache_key)
     
-    def _generate_gemini_response(
-        self, 
-        user_message: str, 
+    def _grounding_cache_key(self, grounding: Optional[Dict]) -> Optional[str]:
+        """Response cache context for grounded answers; None when the answer must not be cached"""
+        if grounding is None:
+            return ''
+        if grounding['personal']:
+            return None
+        return grounding['version']
+    
+    def _with_grounding(self, response: str, grounding: Optional[Dict]) -> str:
+        """Append live platform data to a canned or FAQ answer"""
+        if grounding is None:
+            return response
+        return response + "\n\n" + '\n\n'.join(grounding['sections'])
+    
+    def _detect_intent(self, message: str) -> str:
+        """Detect user intent from message"""
+        return intent_classifier.classify(message)[0]
+    
+    def _split_history(self, conversation_history: List[Dict]) -> Tuple[List[str], List[Dict]]:
+        """Separate summary entries (sender 'system') from conversation turns"""
+        summaries, turns = [], []
+        for msg in conversation_history or []:
+            if msg.get('sender') == 'system':
+                summaries.append(msg.get('message', ''))
+            else:
+                turns.append(msg)
+        return summaries, turns
+    
+    def _build_openai_messages(
+        self,
+        user_message: str,
         conversation_history: List[Dict],
-        user_data: Optional[Dict]
-    ) -> str:
-        """Generate response using Google Gemini"""
-        try:
-            # Build conversation context
-            context = self.get_system_context(user_data)
-            
-            # Build full prompt with history
-            prompt = context + "\n\nConversation:\n"
-            
-            if conversation_history:
-                for msg in conversation_history[-10:]:
-                    sender = "User" if msg.get('sender') == 'user' else "Assistant"
-                    prompt += f"{sender}: {msg.get('message', '')}\n"
-            
-            prompt += f"User: {user_message}\nAssistant:"
-            
-            # Call Gemini API
-            response = self.client.generate_content(prompt)
-            return response.text.strip()
-            
-        except Exception as e:
-            print(f"[ERROR] Gemini Error: {str(e)}")
-            return self._generate_fallback_response(user_message, self._detect_intent(user_message))
+        user_data: Optional[Dict],
+        grounding: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Build the chat messages list for OpenAI
+        
+        The static prefix is always the first message, byte for byte, so
+        providers that cache prompt prefixes can reuse it across users.
+        """
+        messages = [
+            {"role": "system", "content": SYSTEM_PREFIX}
+        ]
+        if user_data:
+            messages.append({"role": "system", "content": self._user_fragment(user_data)})
+        
+        # Live platform data, already trimmed to its token budget
+        if grounding:
+            messages.append({
+                "role": "system",
+                "content": "Current platform data (answer from this when relevant; do not invent details):\n\n"
+                           + '\n\n'.join(grounding['sections'])
+            })
+        
+        # Add conversation history (and any summary of older turns)
+        summaries, turns = self._split_history(conversation_history)
+        for summary in summaries:
+            messages.append({"role": "system", "content": summary})
+        for msg in turns[-10:]:  # Last 10 messages for context
+            role = "user" if msg.get('sender') == 'user' else "assistant"
+            messages.append({"role": role, "content": msg.get('message', '')})
+        
+        # Add current message
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def _generate_degraded_response(self, message: str, intent: str) -> str:
+        """Answer without a provider: the closest FAQ at a relaxed threshold, else canned text"""
+        faq_match = faq_index.answer(
+            message, threshold=getattr(settings, 'CHATBOT_FAQ_DEGRADED_THRESHOLD', 0.4)
+        )
+        if faq_match:
+            return faq_match[0].answer
+        return self._generate_fallback_response(message, intent)
     
     def _generate_fallback_response(self, message: str, intent: str) -> str:
         """Generate fallback response when no AI API is available"""
@@ -0,0 +1,166 @@
+"""
+Incremental daily rollups for chatbot analytics
+Folds chat rows added since the last run into per-day ChatAnalytics rows
+Run by `manage.py rollup_chat_analytics` on a schedule, never inside a request
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum, Max, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import ChatSession, ChatMessage, ChatFeedback, ChatAnalytics, ChatAnalyticsWatermark
+
+ROLLUP_BATCH = 10000  # IDs aggregated per query
+
+# Rows younger than this are left for the next run. IDs are handed out before
+# the inserting transaction commits, so a newer ID can be visible while an
+# older one is still in flight; stopping short keeps the watermark from
+# stepping over rows that have not committed yet.
+ROLLUP_LAG_SECONDS = getattr(settings, 'CHATBOT_ANALYTICS_LAG_SECONDS', 60)
+
+
+def _id_ranges(model, after_id, batch_size, date_field, cutoff):
+    """(low, high] ID windows covering rows added after after_id and before cutoff"""
+    upper = model.objects.filter(
+        id__gt=after_id, **{f'{date_field}__lt': cutoff}
+    ).aggregate(max_id=Max('id'))['max_id'] or 0
+    low = after_id
+    while low < upper:
+        high = min(low + batch_size, upper)
+        yield low, high
+        low = high
+
+
+def _new_rows(model, after_id, batch_size, date_field, cutoff):
+    """Rows past the watermark, one ID window at a time, annotated with their day"""
+    for low, high in _id_ranges(model, after_id, batch_size, date_field, cutoff):
+        yield high, model.objects.filter(id__gt=low, id__lte=high).annotate(day=TruncDate(date_field))
+
+
+def roll_up_chat_analytics(batch_size=ROLLUP_BATCH):
+    """
+    Fold new sessions, messages and feedback into ChatAnalytics
+
+    Each source table keeps an ID watermark, so a run only aggregates rows
+    added since the previous one and its cost tracks new traffic, not
+    history. Rows from the last ROLLUP_LAG_SECONDS are left for the next
+    run so transactions still in flight are not skipped. Counts and running
+    totals are added to the existing day rows; unique users are recounted
+    for the days that gained sessions.
+
+    Returns:
+        dict: Rows folded in per source and the number of days updated
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    intents = defaultdict(lambda: defaultdict(int))
+    session_days = set()
+    folded = {'sessions': 0, 'messages': 0, 'feedback': 0}
+    cutoff = timezone.now() - timedelta(seconds=ROLLUP_LAG_SECONDS)
+
+    with transaction.atomic():
+        watermarks = {}
+        for source in folded:
+            watermarks[source], _ = ChatAnalyticsWatermark.objects.select_for_update().get_or_create(source=source)
+
+        for high, rows in _new_rows(ChatSession, watermarks['sessions'].last_id, batch_size, 'started_at', cutoff):
+            for row in rows.values('day').annotate(
+                count=Count('id'),
+                anonymous=Count('id', filter=Q(user__isnull=True))
+            ):
+                deltas[row['day']]['total_sessions'] += row['count']
+                deltas[row['day']]['anonymous_sessions'] += row['anonymous']
+                session_days.add(row['day'])
+                folded['sessions'] += row['count']
+            watermarks['sessions'].last_id = high
+
+        for high, rows in _new_rows(ChatMessage, watermarks['messages'].last_id, batch_size, 'created_at', cutoff):
+            for row in rows.values('day').annotate(
+                count=Count('id'),
+                timed=Count('id', filter=Q(sender='bot', response_time_ms__isnull=False)),
+                time_total=Sum('response_time_ms', filter=Q(sender='bot'))
+            ):
+                deltas[row['day']]['total_messages'] += row['count']
+                deltas[row['day']]['timed_responses'] += row['timed']
+                deltas[row['day']]['response_time_total_ms'] += row['time_total'] or 0
+                folded['messages'] += row['count']
+            for row in rows.filter(sender='bot').exclude(intent='').values('day', 'intent').annotate(count=Count('id')):
+                intents[row['day']][row['intent']] += row['count']
+            watermarks['messages'].last_id = high
+
+        for high, rows in _new_rows(ChatFeedback, watermarks['feedback'].last_id, batch_size, 'created_at', cutoff):
+            for row in rows.values('day').annotate(
+                count=Count('id'),
+                positive=Count('id', filter=Q(helpful=True)),
+                rating_total=Sum('rating')
+            ):
+                deltas[row['day']]['total_feedback'] += row['count']
+                deltas[row['day']]['positive_feedback'] += row['positive']
+                deltas[row['day']]['negative_feedback'] += row['count'] - row['positive']
+                deltas[row['day']]['feedback_rating_total'] += row['rating_total'] or 0
+                folded['feedback'] += row['count']
+            watermarks['feedback'].last_id = high
+
+        days = set(deltas) | set(intents)
+        for day in days:
+            analytics, _ = ChatAnalytics.objects.select_for_update().get_or_create(date=day)
+            for field, value in deltas[day].items():
+                setattr(analytics, field, getattr(analytics, field) + value)
+
+            categories = dict(analytics.top_categories or {})
+            for intent, count in intents[day].items():
+                categories[intent] = categories.get(intent, 0) + count
+            analytics.top_categories = dict(sorted(categories.items(), key=lambda item: -item[1]))
+
+            if day in session_days:
+                analytics.unique_users = ChatSession.objects.filter(
+                    started_at__date=day, user__isnull=False
+                ).values('user').distinct().count()
+
+            analytics.avg_response_time_ms = (
+                analytics.response_time_total_ms / analytics.timed_responses if analytics.timed_responses else 0
+            )
+            analytics.avg_session_length = (
+                analytics.total_messages / analytics.total_sessions if analytics.total_sessions else 0
+            )
+            analytics.save()
+
+        for watermark in watermarks.values():
+            watermark.save()
+
+    folded['days'] = len(days)
+    return folded
+
+
+def summarize_rollups(queryset):
+    """Combine a range of ChatAnalytics rows into totals for the analytics endpoint"""
+    totals = queryset.aggregate(
+        sessions=Sum('total_sessions'),
+        messages=Sum('total_messages'),
+        response_time_total=Sum('response_time_total_ms'),
+        timed=Sum('timed_responses'),
+        feedback=Sum('total_feedback'),
+        helpful=Sum('positive_feedback'),
+        rating_total=Sum('feedback_rating_total'),
+    )
+    intents = defaultdict(int)
+    for categories in queryset.values_list('top_categories', flat=True):
+        for intent, count in (categories or {}).items():
+            intents[intent] += count
+
+    feedback = totals['feedback'] or 0
+    return {
+        'total_sessions': totals['sessions'] or 0,
+        'total_messages': totals['messages'] or 0,
+        'avg_response_time_ms': round((totals['response_time_total'] or 0) / totals['timed'], 2) if totals['timed'] else 0,
+        'feedback': {
+            'total': feedback,
+            'avg_rating': round(totals['rating_total'] / feedback, 2) if feedback else None,
+            'helpful': totals['helpful'] or 0,
+        },
+        'top_intents': [
+            {'intent': intent, 'count': count}
+            for intent, count in sorted(intents.items(), key=lambda item: -item[1])[:10]
+        ],
+    }
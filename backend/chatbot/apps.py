@@ -5,4 +5,7 @@ class ChatbotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chatbot'
     verbose_name = 'AI Chatbot'
-
+    
+    def ready(self):
+        # Import signals to register them
+        import chatbot.signals
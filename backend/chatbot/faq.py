@@ -0,0 +1,194 @@
+"""
+FAQ retrieval for the chatbot
+BM25 index over CommonQuestion text, answered before any LLM call
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+
+# Words ignored by both FAQ matching and the response cache's near-duplicate keys
+STOPWORDS = {
+    'a', 'an', 'the', 'i', 'me', 'my', 'we', 'our', 'you', 'your', 'to', 'of', 'in',
+    'on', 'for', 'at', 'by', 'with', 'is', 'are', 'was', 'be', 'am', 'do', 'does',
+    'did', 'can', 'could', 'would', 'should', 'will', 'please', 'and', 'or', 'it',
+    'this', 'that', 'there', 'so', 'just', 'hi', 'hello', 'hey', 'thanks', 'how',
+    'what', 'where', 'when', 'which', 'who', 'why', 'any', 'some', 'about', 'get',
+    'tell', 'know', 'want', 'need',
+}
+
+# Relative weight of each CommonQuestion field in a term's frequency
+FIELD_WEIGHTS = (('question', 2), ('keywords', 3), ('answer', 1))
+# A query term matched at this weight (question or keywords) counts in full
+# towards confidence; answer-only matches count in proportion
+FULL_MATCH_WEIGHT = 2
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+INDEX_TTL = 300  # Seconds before edits made in another process are picked up
+
+
+def stem(word: str) -> str:
+    """Light suffix stripping so plurals and verb forms share a term"""
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    if len(word) > 3 and word.endswith('e'):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(word) for word in re.findall(r'[a-z0-9]+', text.lower()) if word not in STOPWORDS]
+
+
+class FAQIndex:
+    """
+    In-memory BM25 index over active CommonQuestions
+
+    Each question is one document whose term frequencies are the weighted
+    sum of its question, keyword and answer terms. The index is rebuilt on
+    the next lookup after a CommonQuestion is saved or deleted (see
+    chatbot.signals), or after INDEX_TTL seconds.
+
+    Confidence is the share of the query's IDF mass the best document
+    covers, each matched term weighted by the field it matched in (see
+    FULL_MATCH_WEIGHT), and is zero unless some term matches the
+    question or keywords. answer() additionally needs CHATBOT_FAQ_MIN_TERMS
+    query terms and a CHATBOT_FAQ_MARGIN lead over the runner-up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built_at = None
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        self._built_at = None
+
+    def _ensure_built(self):
+        if self._built_at is not None and time.monotonic() - self._built_at < INDEX_TTL:
+            return
+        with self._lock:
+            if self._built_at is not None and time.monotonic() - self._built_at < INDEX_TTL:
+                return
+            self._build()
+            self._built_at = time.monotonic()
+
+    def _build(self):
+        from .models import CommonQuestion
+
+        questions = list(CommonQuestion.objects.filter(is_active=True).only(
+            'id', 'category', 'question', 'answer', 'keywords', 'priority'
+        ))
+        postings = {}
+        lengths = []
+        term_weights = []  # Per document: term -> weight of the best field it appears in
+        for doc_id, question in enumerate(questions):
+            fields = {
+                'question': question.question,
+                'keywords': ' '.join(question.keywords or []),
+                'answer': question.answer,
+            }
+            frequencies = Counter()
+            field_weights = {}
+            for field, weight in FIELD_WEIGHTS:
+                for term in tokenize(fields[field]):
+                    frequencies[term] += weight
+                    field_weights[term] = max(field_weights.get(term, 0), weight)
+            lengths.append(sum(frequencies.values()))
+            term_weights.append(field_weights)
+            for term, frequency in frequencies.items():
+                postings.setdefault(term, []).append((doc_id, frequency))
+
+        count = len(questions)
+        self._questions = questions
+        self._postings = postings
+        self._lengths = lengths
+        self._term_weights = term_weights
+        self._avg_length = (sum(lengths) / count) if count else 0.0
+        self._idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in postings.items()
+        }
+        # Unknown query terms count as maximally specific
+        self._max_idf = math.log(1 + (count + 0.5) / 0.5) if count else 0.0
+
+    def search(self, message: str, limit: int = 3) -> List[Tuple[object, float, float]]:
+        """
+        Rank FAQs for a message
+        Returns: list of (CommonQuestion, bm25_score, confidence), best first
+        """
+        self._ensure_built()
+        terms = set(tokenize(message))
+        if not terms or not self._questions:
+            return []
+
+        scores = {}
+        matched = {}
+        anchored = set()
+        for term in terms:
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, frequency in self._postings[term]:
+                norm = 1 - BM25_B + BM25_B * self._lengths[doc_id] / self._avg_length
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+                weight = self._term_weights[doc_id][term]
+                matched[doc_id] = matched.get(doc_id, 0.0) + idf * min(weight / FULL_MATCH_WEIGHT, 1.0)
+                if weight >= FULL_MATCH_WEIGHT:
+                    anchored.add(doc_id)
+
+        query_mass = sum(self._idf.get(term, self._max_idf) for term in terms)
+        ranked = sorted(
+            scores,
+            key=lambda doc_id: (scores[doc_id], self._questions[doc_id].priority),
+            reverse=True
+        )[:limit]
+        return [
+            (self._questions[doc_id], scores[doc_id],
+             matched[doc_id] / query_mass if doc_id in anchored else 0.0)
+            for doc_id in ranked
+        ]
+
+    def answer(self, message: str, threshold: float = None) -> Optional[Tuple[object, float]]:
+        """
+        Best FAQ for a message if its confidence passes the threshold
+        (CHATBOT_FAQ_THRESHOLD by default), the message has enough terms to
+        be specific and the best match clearly beats the runner-up
+        Returns: (CommonQuestion, confidence) or None; records the question as asked
+        """
+        if threshold is None:
+            threshold = getattr(settings, 'CHATBOT_FAQ_THRESHOLD', 0.75)
+        min_terms = getattr(settings, 'CHATBOT_FAQ_MIN_TERMS', 2)
+        margin = getattr(settings, 'CHATBOT_FAQ_MARGIN', 0.1)
+
+        results = self.search(message, limit=2) if len(set(tokenize(message))) >= min_terms else []
+        if (not results or results[0][2] < threshold
+                or (len(results) > 1 and results[1][1] > results[0][1] * (1 - margin))):
+            self.misses += 1
+            return None
+
+        question, _, confidence = results[0]
+        self.hits += 1
+        question.record_asked()
+        return question, round(confidence, 2)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Create a singleton instance
+faq_index = FAQIndex()
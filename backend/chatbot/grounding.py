@@ -0,0 +1,222 @@
+"""
+Live platform data for grounding chatbot answers
+Small snapshots of upcoming events, a user's open issues and budget headlines,
+rebuilt in the background so a chat turn never waits on these queries
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Avg, Count, F, Q, Sum
+from django.utils import timezone
+from .memory import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Snapshots relevant to each intent, most useful first
+INTENT_SNAPSHOTS = {
+    'find_events': ['events'],
+    'report_issue': ['issues'],
+    'transparency': ['transparency'],
+}
+
+EVENT_DAYS = 14
+EVENT_LIMIT = 8
+ISSUE_LIMIT = 5
+
+# Refreshes run one at a time off the request thread
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chatbot-grounding')
+
+
+def build_events_snapshot() -> List[str]:
+    from events.models import Event
+    now = timezone.now()
+    events = Event.objects.filter(
+        is_public=True, start_date__gte=now, start_date__lte=now + timedelta(days=EVENT_DAYS)
+    ).order_by('start_date').values(
+        'title', 'start_date', 'location_name', 'is_online', 'capacity', 'current_attendees'
+    )[:EVENT_LIMIT]
+
+    lines = []
+    for event in events:
+        where = 'Online' if event['is_online'] else event['location_name']
+        spots = max(0, event['capacity'] - event['current_attendees'])
+        when = timezone.localtime(event['start_date']).strftime('%a %b %d, %I:%M %p')
+        lines.append(f"- {event['title']}: {when}, {where} ({spots} spots left)")
+    return lines or ['- No public events are scheduled']
+
+
+def build_issues_snapshot(user_id) -> List[str]:
+    from issues.models import Issue
+    issues = Issue.objects.filter(
+        reported_by_id=user_id, status__in=['open', 'in_progress']
+    ).order_by('-updated_at').values(
+        'title', 'status', 'category__name', 'created_at', 'updated_at'
+    )[:ISSUE_LIMIT]
+
+    statuses = dict(Issue.STATUS_CHOICES)
+    lines = [
+        f"- \"{issue['title']}\" ({issue['category__name']}): {statuses[issue['status']]}, "
+        f"reported {issue['created_at']:%b %d}, last updated {issue['updated_at']:%b %d}"
+        for issue in issues
+    ]
+    return lines or ['- None; all of their reported issues are resolved or closed']
+
+
+def build_transparency_snapshot() -> List[str]:
+    from transparency.models import PublicSpending, PublicProject
+    year = timezone.now().year
+    spending = PublicSpending.objects.filter(is_approved=True, fiscal_year=year)
+    total = spending.aggregate(total=Sum('amount'))['total'] or 0
+
+    lines = [f"- Approved spending in {year}: ${total:,.0f}"]
+    top_departments = spending.values('department__name').annotate(
+        total=Sum('amount')
+    ).order_by('-total')[:3]
+    if top_departments:
+        lines.append('- Largest spenders: ' + ', '.join(
+            f"{row['department__name']} (${row['total']:,.0f})" for row in top_departments
+        ))
+
+    projects = PublicProject.objects.filter(is_public=True).aggregate(
+        active=Count('id', filter=Q(status__in=['approved', 'in_progress'])),
+        completed=Count('id', filter=Q(status='completed')),
+        over_budget=Count('id', filter=Q(budget_spent__gt=F('budget_allocated'))),
+        progress=Avg('progress_percentage', filter=Q(status__in=['approved', 'in_progress'])),
+    )
+    lines.append(
+        f"- Projects: {projects['active']} active (avg {projects['progress'] or 0:.0f}% complete), "
+        f"{projects['completed']} completed, {projects['over_budget']} over budget"
+    )
+    return lines
+
+
+SNAPSHOT_TITLES = {
+    'events': 'Upcoming events (next two weeks)',
+    'issues': 'Open issues reported by this user',
+    'transparency': 'Budget headlines',
+}
+
+
+class GroundingSnapshots:
+    """
+    Stale-while-revalidate cache of grounding snapshots
+
+    Snapshots live in the Django cache, so workers share them when the
+    cache backend is shared. A read returns whatever is cached, even if
+    stale, and schedules a rebuild on a background thread once the snapshot
+    is older than `ttl` seconds; a turn never runs the queries itself. The
+    first read after a cold start therefore returns nothing.
+    """
+
+    def __init__(self, ttl: int = None, token_budget: int = None):
+        self.ttl = ttl or getattr(settings, 'CHATBOT_GROUNDING_TTL', 300)
+        self.token_budget = token_budget or getattr(settings, 'CHATBOT_GROUNDING_TOKEN_BUDGET', 300)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.errors = 0
+
+    @staticmethod
+    def _key(name: str, user_id=None) -> str:
+        return f'chatbot:grounding:{name}' + (f':{user_id}' if user_id is not None else '')
+
+    def _builder(self, name: str, user_id=None) -> Callable[[], List[str]]:
+        if name == 'issues':
+            return lambda: build_issues_snapshot(user_id)
+        return {'events': build_events_snapshot, 'transparency': build_transparency_snapshot}[name]
+
+    def _rebuild(self, key: str, builder: Callable[[], List[str]]):
+        try:
+            # Kept past the TTL so readers have something to use while the next rebuild runs
+            cache.set(key, {'built_at': time.time(), 'lines': builder()}, self.ttl * 10)
+            self.refreshes += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Chatbot grounding refresh failed for {key}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+            connection.close()
+
+    def refresh(self, name: str, user_id=None):
+        """Schedule a rebuild unless one is already queued"""
+        key = self._key(name, user_id)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        _executor.submit(self._rebuild, key, self._builder(name, user_id))
+
+    def invalidate_user(self, user_id):
+        """Drop a user's issue snapshot and rebuild it"""
+        try:
+            cache.delete(self._key('issues', user_id))
+        except Exception as e:
+            logger.warning(f"Could not drop grounding snapshot for user {user_id}: {str(e)}")
+        self.refresh('issues', user_id)
+
+    def get(self, name: str, user_id=None) -> Optional[Dict]:
+        key = self._key(name, user_id)
+        try:
+            entry = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Chatbot grounding cache unavailable: {str(e)}")
+            return None
+        if entry is None or time.time() - entry['built_at'] > self.ttl:
+            self.refresh(name, user_id)
+        return entry
+
+    def context(self, intent: str, user_id=None) -> Optional[Dict]:
+        """
+        Grounding for a turn, trimmed to the token budget
+
+        Returns:
+            dict: {'sections', 'personal', 'version'} or None when there is nothing to add.
+            'personal' marks user-specific data; 'version' is a hash of the
+            sections, so it changes only when the grounded text does.
+        """
+        sections = []
+        personal = False
+        used = 0
+        for name in INTENT_SNAPSHOTS.get(intent, []):
+            if name == 'issues' and user_id is None:
+                continue
+            entry = self.get(name, user_id if name == 'issues' else None)
+            if not entry or not entry['lines']:
+                continue
+
+            title = SNAPSHOT_TITLES[name]
+            used += estimate_tokens(title)
+            kept = []
+            for line in entry['lines']:
+                used += estimate_tokens(line)
+                if used > self.token_budget:
+                    break
+                kept.append(line)
+            if not kept:
+                break
+
+            sections.append(f"{title}:\n" + '\n'.join(kept))
+            personal = personal or name == 'issues'
+
+        if not sections:
+            return None
+        return {
+            'sections': sections,
+            'personal': personal,
+            'version': hashlib.sha1('\n\n'.join(sections).encode()).hexdigest()[:16],
+        }
+
+    def stats(self) -> Dict:
+        return {'refreshes': self.refreshes, 'errors': self.errors, 'pending': len(self._pending)}
+
+
+# Create a singleton instance
+grounding_snapshots = GroundingSnapshots()
@@ -0,0 +1,90 @@
+"""
+Intent classification for the chatbot
+All intent keywords compiled into one word-bounded regex and scored in a single pass
+"""
+import re
+from typing import Dict, Tuple
+
+# Keyword weights per intent. Topic words outweigh generic question words so
+# "how do I report a pothole" is report_issue, not how_to.
+INTENT_KEYWORDS = {
+    'report_issue': {
+        'report': 2.0, 'issue': 1.5, 'problem': 1.5, 'pothole': 3.0, 'broken': 2.0,
+        'fix': 1.5, 'damage': 2.0, 'damaged': 2.0, 'streetlight': 3.0, 'street light': 3.0,
+        'garbage': 2.0, 'trash': 2.0, 'leak': 2.0, 'graffiti': 2.5, 'complaint': 2.0,
+    },
+    'find_events': {
+        'event': 2.5, 'volunteer': 2.5, 'activity': 1.5, 'rsvp': 3.0, 'attend': 2.0,
+        'happening': 2.0, 'meetup': 2.5, 'town hall': 3.0, 'workshop': 2.5, 'cleanup': 2.5,
+    },
+    'forum_help': {
+        'forum': 3.0, 'discussion': 2.5, 'poll': 3.0, 'petition': 3.0, 'post': 1.5,
+        'comment': 2.0, 'thread': 2.0, 'vote': 1.5,
+    },
+    'transparency': {
+        'budget': 3.0, 'spending': 3.0, 'spend': 2.0, 'project': 2.0, 'transparency': 3.0,
+        'money': 2.0, 'government': 1.5, 'tax': 2.0, 'expenditure': 3.0, 'funds': 2.0,
+    },
+    'rewards': {
+        'points': 2.5, 'level': 2.5, 'credit': 2.5, 'reward': 3.0, 'badge': 3.0,
+        'achievement': 3.0, 'leaderboard': 3.0, 'redeem': 3.0, 'earn': 2.0,
+    },
+    'account': {
+        'profile': 2.5, 'account': 2.5, 'password': 3.0, 'email': 2.0, 'settings': 2.0,
+        'login': 2.5, 'log in': 2.5, 'sign in': 2.5, 'username': 2.5, 'notification': 1.5,
+    },
+    'how_to': {
+        'how': 0.5, 'what': 0.3, 'where': 0.5, 'when': 0.3, 'guide': 1.0,
+        'help': 0.5, 'tutorial': 1.0, 'explain': 0.5,
+    },
+}
+
+
+class IntentClassifier:
+    """
+    Weighted keyword intent classifier
+
+    Every keyword becomes one alternative in a single regex with word
+    boundaries (plural and simple verb endings allowed), so a message is
+    scanned once and "how" no longer matches inside "show". Each match adds
+    its weight to its intent and the highest total wins; ties go to the
+    intent listed first. Confidence is the winner's share of all matched
+    weight.
+    """
+
+    def __init__(self, intent_keywords: Dict[str, Dict[str, float]] = None):
+        intent_keywords = intent_keywords or INTENT_KEYWORDS
+        self.intents = list(intent_keywords)
+        self._weights = {}
+        for intent, keywords in intent_keywords.items():
+            for keyword, weight in keywords.items():
+                self._weights.setdefault(keyword, []).append((intent, weight))
+
+        # Longest keywords first so "street light" wins over "street"
+        alternatives = sorted(self._weights, key=len, reverse=True)
+        self._pattern = re.compile(
+            r'\b(' + '|'.join(re.escape(k).replace(r'\ ', r'\s+') for k in alternatives) + r')(?:s|es|ed|ing)?\b'
+        )
+
+    def scores(self, message: str) -> Dict[str, float]:
+        totals = {}
+        for match in self._pattern.finditer(message.lower()):
+            keyword = re.sub(r'\s+', ' ', match.group(1))
+            for intent, weight in self._weights[keyword]:
+                totals[intent] = totals.get(intent, 0.0) + weight
+        return totals
+
+    def classify(self, message: str) -> Tuple[str, float]:
+        """
+        Returns: (intent, confidence); ('general', 0.0) when nothing matches
+        """
+        totals = self.scores(message)
+        if not totals:
+            return 'general', 0.0
+
+        best = max(self.intents, key=lambda intent: totals.get(intent, 0.0))
+        return best, round(totals[best] / sum(totals.values()), 2)
+
+
+# Create a singleton instance
+intent_classifier = IntentClassifier()
@@ -0,0 +1,140 @@
+"""
+Chat session lifecycle
+Idle sessions are ended and ended sessions' messages move into compressed archives
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import ChatSession, ChatMessage, ChatFeedback, ChatArchive
+from .analytics import roll_up_chat_analytics
+import json
+import zlib
+
+ARCHIVE_BATCH = 500  # Sessions per archive row
+
+# Days an ended session's messages stay in chat_messages, by user type
+DEFAULT_RETENTION_DAYS = {
+    'anonymous': 1,
+    'citizen': 30,
+    'official': 90,
+    'admin': 90,
+}
+
+
+def idle_cutoff():
+    return timezone.now() - timedelta(minutes=getattr(settings, 'CHATBOT_SESSION_IDLE_MINUTES', 30))
+
+
+def expire_if_idle(session):
+    """End an active session that has been idle too long; returns True if it was ended"""
+    if session.is_active and session.last_message_at < idle_cutoff():
+        ChatSession.objects.filter(pk=session.pk).update(is_active=False, ended_at=F('last_message_at'))
+        session.is_active = False
+        return True
+    return False
+
+
+def expire_idle_sessions():
+    """End every idle active session, dated at its last message; returns the number ended"""
+    return ChatSession.objects.filter(
+        is_active=True, last_message_at__lt=idle_cutoff()
+    ).update(is_active=False, ended_at=F('last_message_at'))
+
+
+def _archivable_sessions():
+    """Ended, unarchived sessions past their user type's retention period"""
+    now = timezone.now()
+    retention = {**DEFAULT_RETENTION_DAYS, **getattr(settings, 'CHATBOT_RETENTION_DAYS', {})}
+
+    condition = Q(user__isnull=True, ended_at__lt=now - timedelta(days=retention['anonymous']))
+    for role, days in retention.items():
+        if role != 'anonymous':
+            condition |= Q(user__role=role, ended_at__lt=now - timedelta(days=days))
+
+    return ChatSession.objects.filter(condition, is_active=False, archived_at__isnull=True)
+
+
+def _archive_batch(sessions):
+    """Compress one batch of (id, session_id, ended_at) sessions per end date"""
+    by_day = defaultdict(list)
+    for pk, session_id, ended_at in sessions:
+        by_day[timezone.localdate(ended_at)].append((pk, session_id))
+
+    archived_messages = 0
+    for day, members in by_day.items():
+        ids = [pk for pk, _ in members]
+        session_ids = dict(members)
+
+        feedback = defaultdict(list)
+        for row in ChatFeedback.objects.filter(message__session_id__in=ids).values(
+            'message_id', 'user_id', 'rating', 'helpful', 'comment', 'created_at'
+        ):
+            feedback[row.pop('message_id')].append(row)
+
+        conversations = defaultdict(list)
+        messages = ChatMessage.objects.filter(session_id__in=ids).order_by('session_id', 'created_at', 'id').values(
+            'id', 'session_id', 'sender', 'message', 'message_type', 'intent', 'confidence',
+            'response_time_ms', 'quick_replies', 'metadata', 'created_at'
+        )
+        for row in messages:
+            row['feedback'] = feedback.get(row['id'], [])
+            conversations[session_ids[row.pop('session_id')]].append(row)
+        message_count = sum(len(rows) for rows in conversations.values())
+
+        with transaction.atomic():
+            archive = ChatArchive.objects.create(
+                date=day,
+                session_count=len(ids),
+                message_count=message_count,
+                data=zlib.compress(json.dumps(conversations, cls=DjangoJSONEncoder).encode('utf-8'), 6)
+            )
+            ChatSession.objects.filter(id__in=ids).update(archive=archive, archived_at=timezone.now())
+            ChatMessage.objects.filter(session_id__in=ids).delete()
+        archived_messages += message_count
+
+    return archived_messages
+
+
+def archive_ended_sessions(batch_size=ARCHIVE_BATCH):
+    """
+    Move messages of ended sessions past retention into ChatArchive rows
+
+    Analytics are rolled up first so deleted rows have already been
+    counted. Returns: (sessions archived, messages archived)
+    """
+    roll_up_chat_analytics()
+
+    sessions_done = messages_done = 0
+    while True:
+        batch = list(_archivable_sessions().order_by('ended_at', 'id').values_list(
+            'id', 'session_id', 'ended_at'
+        )[:batch_size])
+        if not batch:
+            break
+        messages_done += _archive_batch(batch)
+        sessions_done += len(batch)
+    return sessions_done, messages_done
+
+
+def prune_archives():
+    """
+    Delete archives older than CHATBOT_ARCHIVE_RETENTION_DAYS, along with
+    the anonymous sessions they held. Returns the number of archives deleted.
+    """
+    cutoff = timezone.localdate() - timedelta(days=getattr(settings, 'CHATBOT_ARCHIVE_RETENTION_DAYS', 365))
+    expired = ChatArchive.objects.filter(date__lt=cutoff)
+    ChatSession.objects.filter(archive__in=expired, user__isnull=True).delete()
+    deleted, _ = expired.delete()
+    return deleted
+
+
+def archived_messages(session):
+    """Messages of an archived session, as stored in its archive"""
+    if session.archive_id is None:
+        return []
+    conversations = json.loads(zlib.decompress(bytes(session.archive.data)))
+    return conversations.get(session.session_id, [])
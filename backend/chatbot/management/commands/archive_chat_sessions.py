@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from chatbot.lifecycle import expire_idle_sessions, archive_ended_sessions, prune_archives, ARCHIVE_BATCH
+
+
+class Command(BaseCommand):
+    help = 'End idle chat sessions, archive messages of ended sessions past retention, and prune old archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH, help='Sessions per archive row')
+        parser.add_argument('--skip-prune', action='store_true', help='Keep archives past their retention period')
+
+    def handle(self, *args, **options):
+        expired = expire_idle_sessions()
+        self.stdout.write(f'Ended {expired} idle session(s)')
+
+        sessions, messages = archive_ended_sessions(batch_size=options['batch_size'])
+        self.stdout.write(f'Archived {messages} message(s) from {sessions} session(s)')
+
+        if not options['skip_prune']:
+            pruned = prune_archives()
+            self.stdout.write(f'Deleted {pruned} expired archive(s)')
+
+        self.stdout.write(self.style.SUCCESS('[SUCCESS] Chat session lifecycle run complete'))
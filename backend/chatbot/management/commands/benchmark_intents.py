@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from chatbot.intents import IntentClassifier
+from collections import Counter
+from pathlib import Path
+import json
+import time
+
+DEFAULT_FIXTURE = Path(__file__).resolve().parents[2] / 'benchmarks' / 'intents.jsonl'
+
+# The original first-match substring scan, kept as the accuracy baseline
+LEGACY_KEYWORDS = {
+    'report_issue': ['report', 'issue', 'problem', 'pothole', 'broken', 'fix', 'damage'],
+    'find_events': ['event', 'volunteer', 'activity', 'rsvp', 'attend', 'happening'],
+    'forum_help': ['forum', 'discussion', 'poll', 'petition', 'post', 'comment'],
+    'transparency': ['budget', 'spending', 'project', 'transparency', 'money', 'government'],
+    'rewards': ['points', 'level', 'credit', 'reward', 'badge', 'achievement', 'leaderboard'],
+    'account': ['profile', 'account', 'password', 'email', 'settings'],
+    'how_to': ['how', 'what', 'where', 'when', 'guide', 'help', 'tutorial'],
+}
+
+
+def legacy_classify(message):
+    message_lower = message.lower()
+    for intent, keywords in LEGACY_KEYWORDS.items():
+        if any(keyword in message_lower for keyword in keywords):
+            return intent
+    return 'general'
+
+
+class Command(BaseCommand):
+    help = 'Measure intent classifier accuracy and throughput against a labelled JSONL fixture'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixture', default=str(DEFAULT_FIXTURE),
+                            help='JSONL file of {"message": ..., "intent": ...} lines')
+        parser.add_argument('--repeat', type=int, default=200, help='Passes over the fixture for timing')
+        parser.add_argument('--show-errors', action='store_true', help='List misclassified messages')
+
+    def handle(self, *args, **options):
+        path = Path(options['fixture'])
+        if not path.exists():
+            raise CommandError(f'Fixture not found: {path}')
+
+        samples = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+        classifier = IntentClassifier()
+
+        self.stdout.write(f'{len(samples)} labelled messages from {path.name}')
+        self.stdout.write(f"{'classifier':<12}{'accuracy':>10}{'msgs/sec':>14}")
+
+        for label, classify in [
+            ('legacy', legacy_classify),
+            ('compiled', lambda message: classifier.classify(message)[0]),
+        ]:
+            errors = []
+            for sample in samples:
+                predicted = classify(sample['message'])
+                if predicted != sample['intent']:
+                    errors.append((sample['message'], sample['intent'], predicted))
+
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                for sample in samples:
+                    classify(sample['message'])
+            elapsed = time.perf_counter() - started
+
+            accuracy = 1 - len(errors) / len(samples)
+            throughput = options['repeat'] * len(samples) / elapsed
+            self.stdout.write(f'{label:<12}{accuracy:>10.1%}{throughput:>14,.0f}')
+
+            if options['show_errors']:
+                confusions = Counter((expected, predicted) for _, expected, predicted in errors)
+                for message, expected, predicted in errors:
+                    self.stdout.write(f'  [{label}] {message!r}: expected {expected}, got {predicted}')
+                for (expected, predicted), count in confusions.most_common(5):
+                    self.stdout.write(f'  [{label}] {expected} -> {predicted}: {count}')
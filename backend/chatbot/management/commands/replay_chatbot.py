@@ -0,0 +1,192 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from chatbot.ai_engine import CivicChatbotAI
+from chatbot.faq import faq_index
+from chatbot.grounding import grounding_snapshots
+from chatbot.models import ChatSession
+from chatbot.providers import StubProvider, ResilientClient
+from collections import defaultdict
+from contextlib import redirect_stdout
+from pathlib import Path
+import io
+import json
+import time
+
+DEFAULT_FIXTURE = Path(__file__).resolve().parents[2] / 'benchmarks' / 'conversations.jsonl'
+
+# Pipeline stages timed inside generate_response, in pipeline order
+STAGES = ['intent', 'faq', 'grounding', 'cache', 'prompt', 'provider']
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+
+def load_fixture(path):
+    """Conversations from a JSONL file of {"conversation"?, "message", "intent"?} lines"""
+    conversations = defaultdict(list)
+    for number, line in enumerate(path.read_text().splitlines(), 1):
+        if line.strip():
+            sample = json.loads(line)
+            conversations[sample.get('conversation', f'line-{number}')].append(
+                (sample['message'], sample.get('intent'))
+            )
+    return list(conversations.values())
+
+
+def load_recorded(limit):
+    """
+    User messages of the most recent sessions, labelled with the intent
+    recorded on the bot reply that followed each one
+    """
+    conversations = []
+    for session in ChatSession.objects.filter(user_message_count__gt=0).order_by('-started_at')[:limit]:
+        turns = []
+        pending = None
+        for sender, message, intent in session.messages.order_by('created_at', 'id').values_list(
+            'sender', 'message', 'intent'
+        ):
+            if sender == 'user':
+                pending = message
+            elif pending is not None:
+                turns.append((pending, intent or None))
+                pending = None
+        if turns:
+            conversations.append(turns)
+    return conversations
+
+
+class Command(BaseCommand):
+    help = 'Replay chat conversations through the full response pipeline with a stub LLM provider'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixture', default=str(DEFAULT_FIXTURE),
+                            help='JSONL file of {"conversation": ..., "message": ..., "intent": ...} lines')
+        parser.add_argument('--recorded', type=int, default=0,
+                            help='Replay the N most recent recorded sessions instead of the fixture')
+        parser.add_argument('--passes', type=int, default=1,
+                            help='Replays of the corpus; later passes exercise the response cache')
+        parser.add_argument('--provider-latency-ms', type=float, default=0,
+                            help='Simulated provider latency per call')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+        parser.add_argument('--min-intent-accuracy', type=float,
+                            help='Fail when intent accuracy is below this share (0-1)')
+        parser.add_argument('--max-p95-ms', type=float,
+                            help='Fail when the p95 of total response time exceeds this')
+
+    def _instrument(self, ai, timings, counters):
+        """Wrap each pipeline stage on these instances with a timer"""
+        def timed(stage, func, counter=None):
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                result = func(*args, **kwargs)
+                timings[stage].append((time.perf_counter() - started) * 1000)
+                if counter and result:
+                    counters[counter] += 1
+                return result
+            return wrapper
+
+        ai._detect_intent = timed('intent', ai._detect_intent)
+        ai._build_openai_messages = timed('prompt', ai._build_openai_messages)
+        ai.response_cache.get = timed('cache', ai.response_cache.get)
+        ai.provider_client.complete = timed('provider', ai.provider_client.complete, 'provider_calls')
+        faq_index.answer = timed('faq', faq_index.answer, 'faq_hits')
+        grounding_snapshots.context = timed('grounding', grounding_snapshots.context)
+
+    def handle(self, *args, **options):
+        if options['recorded']:
+            conversations = load_recorded(options['recorded'])
+            source = f"{len(conversations)} recorded sessions"
+        else:
+            path = Path(options['fixture'])
+            if not path.exists():
+                raise CommandError(f'Fixture not found: {path}')
+            conversations = load_fixture(path)
+            source = path.name
+        if not conversations:
+            raise CommandError('Nothing to replay')
+
+        # Start-up notices would otherwise end up in --json output
+        with redirect_stdout(io.StringIO()):
+            ai = CivicChatbotAI()
+        ai.ai_service = 'fake'
+        ai.provider_client = ResilientClient(StubProvider(
+            lambda messages: ai._generate_fallback_response(messages[-1]['content'], 'general'),
+            token_delay=0,
+            latency=options['provider_latency_ms'] / 1000
+        ))
+
+        timings = defaultdict(list)
+        counters = defaultdict(int)
+        labelled = correct = 0
+
+        self._instrument(ai, timings, counters)
+        try:
+            # FAQ hits bump times_asked; nothing the replay writes is kept
+            with transaction.atomic():
+                for _ in range(options['passes']):
+                    for turns in conversations:
+                        history = []
+                        for message, label in turns:
+                            started = time.perf_counter()
+                            response, intent, _, _ = ai.generate_response(message, history, {'role': 'citizen'})
+                            timings['total'].append((time.perf_counter() - started) * 1000)
+                            counters['turns'] += 1
+                            if label:
+                                labelled += 1
+                                correct += intent == label
+                            history += [{'sender': 'user', 'message': message},
+                                        {'sender': 'bot', 'message': response}]
+                transaction.set_rollback(True)
+        finally:
+            del faq_index.answer, grounding_snapshots.context
+
+        turns = counters['turns']
+        report = {
+            'source': source,
+            'turns': turns,
+            'stages': {
+                stage: {
+                    'calls': len(timings[stage]),
+                    'mean_ms': round(sum(timings[stage]) / len(timings[stage]), 3) if timings[stage] else 0.0,
+                    'p50_ms': round(percentile(timings[stage], 0.5), 3),
+                    'p95_ms': round(percentile(timings[stage], 0.95), 3),
+                    'p99_ms': round(percentile(timings[stage], 0.99), 3),
+                }
+                for stage in STAGES + ['total']
+            },
+            'intent_accuracy': round(correct / labelled, 4) if labelled else None,
+            'labelled_turns': labelled,
+            'faq_hit_rate': round(counters['faq_hits'] / turns, 4),
+            'cache_hit_rate': ai.response_cache.stats()['hit_rate'],
+            'provider_calls': counters['provider_calls'],
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(f"Replayed {turns} turns from {source}")
+            self.stdout.write(f"{'stage':<12}{'calls':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+            for stage, row in report['stages'].items():
+                self.stdout.write(
+                    f"{stage:<12}{row['calls']:>8}{row['mean_ms']:>10.3f}{row['p50_ms']:>10.3f}"
+                    f"{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}"
+                )
+            accuracy = report['intent_accuracy']
+            self.stdout.write(
+                f"intent accuracy: {'n/a' if accuracy is None else f'{accuracy:.1%}'} ({labelled} labelled)"
+            )
+            self.stdout.write(f"FAQ hit rate:    {report['faq_hit_rate']:.1%}")
+            self.stdout.write(f"cache hit rate:  {report['cache_hit_rate']:.1%}")
+            self.stdout.write(f"provider calls:  {report['provider_calls']}")
+
+        failures = []
+        if options['min_intent_accuracy'] is not None and (report['intent_accuracy'] or 0) < options['min_intent_accuracy']:
+            failures.append(f"intent accuracy {report['intent_accuracy']} < {options['min_intent_accuracy']}")
+        if options['max_p95_ms'] is not None and report['stages']['total']['p95_ms'] > options['max_p95_ms']:
+            failures.append(f"total p95 {report['stages']['total']['p95_ms']}ms > {options['max_p95_ms']}ms")
+        if failures:
+            raise CommandError('Replay regression: ' + '; '.join(failures))
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS('Replay complete'))
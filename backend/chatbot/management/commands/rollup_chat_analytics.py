@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from chatbot.analytics import roll_up_chat_analytics, ROLLUP_BATCH
+
+
+class Command(BaseCommand):
+    help = ('Fold chat sessions, messages and feedback added since the last run into daily '
+            'ChatAnalytics rows (run every few minutes; the analytics endpoint only reads them)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ROLLUP_BATCH, help='Row IDs aggregated per query')
+
+    def handle(self, *args, **options):
+        folded = roll_up_chat_analytics(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {folded['sessions']} sessions, {folded['messages']} messages and "
+            f"{folded['feedback']} feedback entries into {folded['days']} day(s)"
+        ))
@@ -0,0 +1,126 @@
+"""
+Bounded conversation memory for chat sessions
+Recent turns come from an indexed tail query; older turns live on as a rolling summary
+"""
+from typing import Dict, List
+from django.conf import settings
+from .intents import intent_classifier
+
+SUMMARY_MAX_LINES = 8
+SNIPPET_CHARS = 100
+# Rows read past the window each turn; a turn slides two messages out, so
+# these normally hold every message not yet folded into the summary
+FOLD_LOOKBACK = 4
+CHARS_PER_TOKEN = 4  # Rough estimate; good enough for budgeting prompt history
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class ConversationMemory:
+    """
+    Per-turn conversation context with constant cost in session length
+
+    One tail query through the (session, created_at) index reads the last
+    `window` messages plus FOLD_LOOKBACK older ones. Messages that slid out
+    of the window are folded into session.context_data (one line per user
+    question plus running topic counts), tracked by the id of the last
+    folded message, so each message is summarised once. The lookback rows
+    usually cover everything not yet folded; only after a gap (e.g. the
+    first turn of a long pre-existing session) is another query needed.
+
+    Folding changes session.context_data in memory and sets
+    session.summary_dirty; the caller writes it with the turn
+    (chatbot.views._commit_turn), so the summary and the messages it
+    covers are saved together. The assembled history is trimmed
+    oldest-first to fit the token budget.
+    """
+
+    def __init__(self, window: int = None, token_budget: int = None):
+        self.window = window or getattr(settings, 'CHATBOT_MEMORY_WINDOW', 10)
+        self.token_budget = token_budget or getattr(settings, 'CHATBOT_HISTORY_TOKEN_BUDGET', 1500)
+
+    def recent_messages(self, session, lookback: int = 0) -> List[Dict]:
+        rows = session.messages.order_by('-created_at', '-id').values(
+            'id', 'sender', 'message'
+        )[:self.window + lookback]
+        return list(reversed(rows))
+
+    def _fold(self, session, older: List[Dict], complete: bool) -> bool:
+        """
+        Summarise messages before the window not yet folded; returns True if
+        the summary changed. `older` are the tail rows before the window;
+        `complete` means the session has no messages before them.
+        """
+        context = session.context_data or {}
+        through = context.get('summarized_through', 0)
+        if older[-1]['id'] <= through:
+            return False
+
+        if complete or older[0]['id'] <= through:
+            pending = [row for row in older if row['id'] > through and row['sender'] == 'user']
+        else:
+            pending = list(session.messages.filter(
+                id__gt=through, id__lte=older[-1]['id'], sender='user'
+            ).order_by('id').values('id', 'message'))
+
+        lines = context.get('summary_lines', [])
+        topics = context.get('summary_topics', {})
+        for row in pending:
+            intent = intent_classifier.classify(row['message'])[0]
+            topics[intent] = topics.get(intent, 0) + 1
+            snippet = ' '.join(row['message'].split())[:SNIPPET_CHARS]
+            lines.append(f"- ({intent}) {snippet}")
+
+        context['summary_lines'] = lines[-SUMMARY_MAX_LINES:]
+        context['summary_topics'] = topics
+        context['summarized_through'] = older[-1]['id']
+        session.context_data = context
+        return True
+
+    def summary(self, session) -> str:
+        context = session.context_data or {}
+        lines = context.get('summary_lines')
+        if not lines:
+            return ''
+        topics = ', '.join(
+            f'{intent} ({count})'
+            for intent, count in sorted(context.get('summary_topics', {}).items(), key=lambda item: -item[1])
+        )
+        return f"Earlier in this conversation the user asked about: {topics}\n" + '\n'.join(lines)
+
+    def build_history(self, session) -> List[Dict]:
+        """
+        Conversation history for the next prompt, oldest first
+
+        A leading {'sender': 'system'} entry carries the rolling summary
+        when older turns exist.
+        """
+        rows = self.recent_messages(session, FOLD_LOOKBACK)
+        recent = rows[-self.window:]
+        if len(rows) > self.window and self._fold(
+            session, rows[:-self.window], complete=len(rows) < self.window + FOLD_LOOKBACK
+        ):
+            session.summary_dirty = True
+
+        history = [{'sender': row['sender'], 'message': row['message']} for row in recent]
+        summary = self.summary(session)
+
+        budget = self.token_budget - (estimate_tokens(summary) if summary else 0)
+        used = 0
+        kept = []
+        for entry in reversed(history):
+            used += estimate_tokens(entry['message'])
+            if used > budget:
+                break
+            kept.append(entry)
+        kept.reverse()
+
+        if summary:
+            kept.insert(0, {'sender': 'system', 'message': summary})
+        return kept
+
+
+# Create a singleton instance
+conversation_memory = ConversationMemory()
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatAnalyticsWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'chat_analytics_watermarks',
+            },
+        ),
+        migrations.AddField(
+            model_name='chatanalytics',
+            name='feedback_rating_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatanalytics',
+            name='response_time_total_ms',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatanalytics',
+            name='timed_responses',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='chatanalytics',
+            name='top_categories',
+            field=models.JSONField(blank=True, default=dict, help_text='Bot response counts by intent'),
+        ),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['started_at'], name='chat_sessio_started_c8e10e_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_chatanalyticswatermark_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, help_text='Day the archived sessions ended')),
+                ('session_count', models.IntegerField(default=0)),
+                ('message_count', models.IntegerField(default=0)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'chat_archives',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='archive',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='chatbot.chatarchive'),
+        ),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['is_active', 'last_message_at'], name='chat_sessio_is_acti_5e4f6b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['archived_at', 'ended_at'], name='chat_sessio_archive_b5a2af_idx'),
+        ),
+    ]
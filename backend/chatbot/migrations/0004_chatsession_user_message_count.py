@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:57
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_existing_user_messages(apps, schema_editor):
+    ChatSession = apps.get_model('chatbot', 'ChatSession')
+    sessions = ChatSession.objects.annotate(
+        count=Count('messages', filter=Q(messages__sender='user'))
+    ).filter(count__gt=0).values_list('id', 'count')
+    for session_id, count in sessions.iterator():
+        ChatSession.objects.filter(id=session_id).update(user_message_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0003_chatarchive_chatsession_archived_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='user_message_count',
+            field=models.PositiveIntegerField(default=0, help_text='Maintained per turn'),
+        ),
+        migrations.RunPython(count_existing_user_messages, migrations.RunPython.noop),
+    ]
@@ -19,17 +19,27 @@ class ChatSession(models.Model):
     started_at = models.DateTimeField(auto_now_add=True)
     last_message_at = models.DateTimeField(auto_now=True)
     ended_at = models.DateTimeField(null=True, blank=True)
+    user_message_count = models.PositiveIntegerField(default=0, help_text="Maintained per turn")
     
     # Session context
     context_data = models.JSONField(default=dict, blank=True, help_text="Conversation context")
     user_metadata = models.JSONField(default=dict, blank=True, help_text="User info for context")
     
+    # Set once the session's messages have moved to a ChatArchive
+    archive = models.ForeignKey(
+        'ChatArchive', on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions'
+    )
+    archived_at = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         db_table = 'chat_sessions'
         ordering = ['-started_at']
         indexes = [
             models.Index(fields=['user', '-started_at']),
             models.Index(fields=['session_id']),
+            models.Index(fields=['started_at']),
+            models.Index(fields=['is_active', 'last_message_at']),
+            models.Index(fields=['archived_at', 'ended_at']),
         ]
     
     def __str__(self):
@@ -43,6 +53,27 @@ class ChatSession(models.Model):
         self.save()
 
 
+class ChatArchive(models.Model):
+    """
+    Compressed messages of ended chat sessions, one row per archival batch
+    """
+    date = models.DateField(db_index=True, help_text="Day the archived sessions ended")
+    session_count = models.IntegerField(default=0)
+    message_count = models.IntegerField(default=0)
+    
+    # zlib-compressed JSON: {session_id: [message dicts, with feedback]}
+    data = models.BinaryField()
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'chat_archives'
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"Chat Archive: {self.date} ({self.session_count} sessions)"
+
+
 class ChatMessage(models.Model):
     """
     Individual chat messages
@@ -161,9 +192,8 @@ class CommonQuestion(models.Model):
         return f"[{self.get_category_display()}] {self.question[:50]}"
     
     def record_asked(self):
-        """Increment times asked counter"""
-        self.times_asked += 1
-        self.save(update_fields=['times_asked'])
+        """Increment times asked counter (atomically, so cached instances stay safe to use)"""
+        CommonQuestion.objects.filter(pk=self.pk).update(times_asked=models.F('times_asked') + 1)
     
     def record_feedback(self, helpful=True):
         """Record user feedback"""
@@ -190,13 +220,18 @@ class ChatAnalytics(models.Model):
     avg_response_time_ms = models.FloatField(default=0)
     avg_session_length = models.FloatField(default=0, help_text="Average messages per session")
     
+    # Running totals the averages are derived from, so rollups can add to them
+    response_time_total_ms = models.BigIntegerField(default=0)
+    timed_responses = models.IntegerField(default=0)
+    feedback_rating_total = models.IntegerField(default=0)
+    
     # Quality metrics
     total_feedback = models.IntegerField(default=0)
     positive_feedback = models.IntegerField(default=0)
     negative_feedback = models.IntegerField(default=0)
     
     # Top categories
-    top_categories = models.JSONField(default=dict, blank=True)
+    top_categories = models.JSONField(default=dict, blank=True, help_text="Bot response counts by intent")
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -208,3 +243,18 @@ class ChatAnalytics(models.Model):
     def __str__(self):
         return f"Chat Analytics: {self.date}"
 
+
+
+class ChatAnalyticsWatermark(models.Model):
+    """
+    Highest row ID already folded into ChatAnalytics, per source table
+    """
+    source = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'chat_analytics_watermarks'
+    
+    def __str__(self):
+        return f"{self.source} through #{self.last_id}"
@@ -0,0 +1,169 @@
+"""
+System prompt assembly for the chatbot
+A static platform prefix shared by every prompt plus a short per-user fragment
+built from a cached civic profile snapshot
+"""
+import logging
+from typing import Dict, Optional
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Seconds; saves to the user or their civic profile invalidate sooner. Invalidation
+# only reaches other workers through a shared cache (see CACHES in settings).
+PROFILE_TTL = getattr(settings, 'CHATBOT_PROFILE_TTL', 3600)
+
+# Identical for every request, so it always leads the prompt. Providers with
+# prefix caching can reuse it; everything that varies comes after it.
+SYSTEM_PREFIX = """You are a helpful AI assistant for a Civic Engagement Platform. 
+        
+Your purpose is to help citizens:
+- Report community issues (potholes, broken lights, pollution, etc.)
+- Participate in community forums and discussions
+- Attend and RSVP to community events
+- View government transparency data (budgets, projects, spending)
+- Engage in civic activities and earn rewards
+- Track their civic engagement level and community credits
+
+Platform Features:
+1. **Issue Reporting**: Citizens report problems with photos, location, and description
+2. **Community Forum**: Discussions, polls, and petitions for community engagement
+3. **Events**: Community events, volunteer opportunities, RSVP system
+4. **Transparency Dashboard**: Public spending, government projects, performance metrics
+5. **Civic Rewards**: Gamification system where users earn points and credits for participation
+6. **Maps**: Interactive maps showing issues and events by location
+
+Civic Levels System:
+- Level 1: New Citizen (0 points) - Basic access + 10 credits/month
+- Level 2: Active Neighbor (100 points) - Priority event registration + 25 credits/month
+- Level 3: Community Helper (300 points) - Priority issue response + 50 credits/month
+- Level 4: Civic Champion (750 points) - Direct messaging to officials + 100 credits/month
+- Level 5: Local Leader (1500 points) - Urban planning consultation + 200 credits/month
+- Level 6: City Ambassador (3000 points) - All benefits + 500 credits/month
+- Level 7: Urban Hero (5000 points) - Elite status + 1000 credits/month
+
+Earning Points:
+- Report issue: 10 points
+- Issue resolved: 50 points
+- Attend event: 20 points
+- Forum post: 15 points
+- Vote in poll: 5 points
+- Sign petition: 10 points
+
+Community Credits Can Be Redeemed For:
+- Parking fee waiver (50 credits)
+- Permit priority processing (100 credits)
+- Recreation center pass (150 credits)
+- Public transit credit (75 credits)
+- Event ticket (25 credits)
+- Urban planning consultation (500 credits)
+
+User Roles:
+- Citizens: Can report issues, participate in forums, RSVP events
+- Officials: Can respond to issues, update projects, create events
+- Admins: Full platform management
+
+Be friendly, concise, and helpful. Provide step-by-step guidance when needed.
+If asked about reporting an issue, guide them through: Go to Dashboard > Issues > Create New Issue.
+If asked about events, direct them to: Dashboard > Events.
+If asked about their level/rewards, direct them to: Dashboard > Profile or Gamification page.
+
+Remember: You're helping build a better community through civic engagement!"""
+
+
+def build_user_fragment(user_data: Dict) -> str:
+    return f"""Current User Context:
+- Name: {user_data.get('name', 'User')}
+- Role: {user_data.get('role', 'citizen').title()}
+- Civic Level: {user_data.get('level', 1)} - {user_data.get('level_name', 'New Citizen')}
+- Total Points: {user_data.get('points', 0)}
+- Community Credits: {user_data.get('credits', 0)}"""
+
+
+def load_profile_snapshot(user_id) -> Optional[Dict]:
+    """User details for prompts, read with one query"""
+    from accounts.models import User
+    user = User.objects.select_related('civic_profile__current_level').filter(pk=user_id).first()
+    if user is None:
+        return None
+
+    try:
+        civic_profile = user.civic_profile
+        level = civic_profile.current_level
+        snapshot = {
+            'name': user.get_full_name(),
+            'email': user.email,
+            'role': user.role,
+            'level': level.level if level else 1,
+            'level_name': level.name if level else 'New Citizen',
+            'points': civic_profile.total_points,
+            'credits': civic_profile.community_credits,
+        }
+    except Exception:
+        snapshot = {
+            'name': user.get_full_name(),
+            'role': user.role,
+        }
+    snapshot['fragment'] = build_user_fragment(snapshot)
+    return snapshot
+
+
+class ProfileSnapshots:
+    """
+    Per-user prompt context kept in the Django cache
+
+    Snapshots are dropped whenever the user or their civic profile is saved
+    (points, level, credits), so chat turns see current values and usually
+    cost no query. Other workers only see the drop through a shared cache;
+    with the per-process fallback the short CHATBOT_PROFILE_TTL bounds how
+    stale a snapshot can get.
+    """
+
+    def __init__(self, ttl: int = PROFILE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return f'chatbot:profile:{user_id}'
+
+    def get(self, user_id) -> Optional[Dict]:
+        if user_id is None:
+            return None
+        try:
+            snapshot = cache.get(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"Profile snapshot cache unavailable: {str(e)}")
+            return load_profile_snapshot(user_id)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        snapshot = load_profile_snapshot(user_id)
+        if snapshot is not None:
+            try:
+                cache.set(self._key(user_id), snapshot, self.ttl)
+            except Exception:
+                pass
+        return snapshot
+
+    def invalidate(self, user_id):
+        try:
+            cache.delete(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"Could not drop profile snapshot for user {user_id}: {str(e)}")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Create a singleton instance
+profile_snapshots = ProfileSnapshots()
@@ -0,0 +1,389 @@
+"""
+LLM provider clients for the chatbot
+Deadlines, retries with jitter, circuit breaking, hedged requests and per-provider metrics
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Shared by all hedged calls; sized for a few concurrent chats per worker
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='chatbot-llm')
+
+
+class ProviderError(Exception):
+    """Raised when no provider could produce a response"""
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without calling the provider while its circuit is open"""
+
+
+class LLMProvider:
+    """
+    Base class for LLM providers
+
+    Providers take OpenAI-style chat messages and are created once per
+    process so their underlying HTTP connections are reused.
+    """
+
+    name = 'base'
+
+    def complete(self, messages: List[Dict], timeout: float) -> str:
+        raise NotImplementedError
+
+    def stream(self, messages: List[Dict], timeout: float) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions over a pooled httpx client"""
+
+    name = 'openai'
+
+    def __init__(self, api_key: str, model: str = 'gpt-3.5-turbo'):
+        import httpx
+        from openai import OpenAI
+        self.model = model
+        # Retries are handled by ResilientClient so they share one deadline
+        self.client = OpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.Client(limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)),
+        )
+
+    def complete(self, messages, timeout):
+        response = self.client.with_options(timeout=timeout).chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=500,
+            temperature=0.7
+        )
+        return response.choices[0].message.content.strip()
+
+    def stream(self, messages, timeout):
+        stream = self.client.with_options(timeout=timeout).chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=500,
+            temperature=0.7,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini; chat messages are flattened into a single prompt"""
+
+    name = 'gemini'
+
+    def __init__(self, api_key: str, model: str = 'gemini-pro'):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.client = genai.GenerativeModel(model)
+
+    @staticmethod
+    def build_prompt(messages: List[Dict]) -> str:
+        system = [m['content'] for m in messages if m['role'] == 'system']
+        turns = [m for m in messages if m['role'] != 'system']
+
+        prompt = '\n\n'.join(system) + "\n\nConversation:\n"
+        for msg in turns:
+            sender = "User" if msg['role'] == 'user' else "Assistant"
+            prompt += f"{sender}: {msg['content']}\n"
+        return prompt + "Assistant:"
+
+    def complete(self, messages, timeout):
+        response = self.client.generate_content(
+            self.build_prompt(messages),
+            request_options={'timeout': timeout}
+        )
+        return response.text.strip()
+
+    def stream(self, messages, timeout):
+        stream = self.client.generate_content(
+            self.build_prompt(messages),
+            stream=True,
+            request_options={'timeout': timeout}
+        )
+        for chunk in stream:
+            yield chunk.text
+
+
+class StubProvider(LLMProvider):
+    """
+    Offline provider for development and benchmarks
+
+    Streams responder(messages) word by word after an initial latency, and
+    fails a configurable share of calls.
+    """
+
+    name = 'fake'
+
+    def __init__(self, responder: Callable[[List[Dict]], str], token_delay: float = 0.02,
+                 latency: float = 0.0, failure_rate: float = 0.0):
+        self.responder = responder
+        self.token_delay = token_delay
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def stream(self, messages, timeout):
+        if self.latency:
+            time.sleep(min(self.latency, timeout))
+            if self.latency > timeout:
+                raise TimeoutError(f'Stub provider exceeded {timeout}s deadline')
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ProviderError('Stub provider failure')
+
+        words = self.responder(messages).split(' ')
+        for index, word in enumerate(words):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield word if index == len(words) - 1 else word + ' '
+
+    def complete(self, messages, timeout):
+        return ''.join(self.stream(messages, timeout))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Opens after `failure_threshold` failures in a row. While open, calls
+    fail fast; after `reset_timeout` seconds one trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """End a trial call that finished without an outcome"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class ProviderMetrics:
+    """Call, error and latency counters for one provider"""
+
+    def __init__(self, sample_size: int = 500):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=sample_size)
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.hedge_wins = 0
+
+    def record(self, latency: float, error: Optional[Exception] = None):
+        with self._lock:
+            self.calls += 1
+            if error is None:
+                self._latencies.append(latency)
+            else:
+                self.errors += 1
+                if isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower():
+                    self.timeouts += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        percentile = lambda p: round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'hedge_wins': self.hedge_wins,
+            'error_rate': round(self.errors / self.calls, 4) if self.calls else 0.0,
+            'latency_p50_ms': percentile(0.5),
+            'latency_p95_ms': percentile(0.95),
+        }
+
+
+class ResilientClient:
+    """
+    Calls a primary provider with a deadline, jittered retries and a
+    circuit breaker, optionally hedging to a secondary provider
+
+    When `hedge_after` seconds pass without a primary response, the same
+    request is sent to the secondary and whichever succeeds first wins. The
+    caller never waits past `timeout`; a late loser finishes in the
+    background and only updates metrics.
+    """
+
+    def __init__(self, primary: LLMProvider, secondary: Optional[LLMProvider] = None,
+                 timeout: float = 8.0, retries: int = 1, hedge_after: Optional[float] = None,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.providers = [p for p in (primary, secondary) if p is not None]
+        self.timeout = timeout
+        self.retries = retries
+        self.hedge_after = hedge_after if secondary is not None else None
+        self.breakers = {p.name: CircuitBreaker(failure_threshold, reset_timeout) for p in self.providers}
+        self._metrics = {p.name: ProviderMetrics() for p in self.providers}
+
+    @property
+    def primary(self) -> LLMProvider:
+        return self.providers[0]
+
+    def available(self) -> bool:
+        """True unless every provider's circuit is open"""
+        return any(self.breakers[p.name].state != 'open' for p in self.providers)
+
+    def _call(self, provider: LLMProvider, messages: List[Dict], deadline: float) -> str:
+        """One provider with retries, all inside the deadline"""
+        breaker = self.breakers[provider.name]
+        metrics = self._metrics[provider.name]
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not breaker.allow():
+                metrics.rejected += 1
+                raise CircuitOpenError(f'{provider.name} circuit is open')
+
+            started = time.monotonic()
+            try:
+                result = provider.complete(messages, timeout=remaining)
+            except Exception as e:
+                metrics.record(time.monotonic() - started, e)
+                breaker.record_failure()
+                last_error = e
+                # Full jitter backoff: 0.2s, 0.4s, ... scaled by a random factor
+                backoff = random.uniform(0, 0.2 * 2 ** attempt)
+                if time.monotonic() + backoff >= deadline:
+                    break
+                time.sleep(backoff)
+                continue
+
+            metrics.record(time.monotonic() - started)
+            breaker.record_success()
+            return result
+
+        raise ProviderError(f'{provider.name} failed: {last_error or "deadline exceeded"}')
+
+    def complete(self, messages: List[Dict]) -> str:
+        deadline = time.monotonic() + self.timeout
+        if self.hedge_after is None:
+            errors = []
+            for provider in self.providers:
+                try:
+                    return self._call(provider, messages, deadline)
+                except ProviderError as e:
+                    errors.append(str(e))
+            raise ProviderError('; '.join(errors))
+
+        primary, secondary = self.providers
+        futures = {_executor.submit(self._call, primary, messages, deadline): primary}
+        done, _ = wait(futures, timeout=self.hedge_after)
+        if not done or next(iter(done)).exception() is not None:
+            futures[_executor.submit(self._call, secondary, messages, deadline)] = secondary
+
+        errors = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if futures[future] is secondary:
+                        self._metrics[secondary.name].hedge_wins += 1
+                    return future.result()
+                errors.append(str(future.exception()))
+        raise ProviderError('; '.join(errors) or 'deadline exceeded')
+
+    def stream(self, messages: List[Dict]) -> Iterator[str]:
+        """
+        Stream from the first provider whose circuit allows it
+
+        Streams are not retried or hedged once started; a failure before the
+        first chunk moves on to the next provider.
+        """
+        errors = []
+        for provider in self.providers:
+            breaker = self.breakers[provider.name]
+            metrics = self._metrics[provider.name]
+            if not breaker.allow():
+                metrics.rejected += 1
+                errors.append(f'{provider.name} circuit is open')
+                continue
+
+            started = time.monotonic()
+            sent_any = False
+            finished = False
+            try:
+                for chunk in provider.stream(messages, timeout=self.timeout):
+                    sent_any = True
+                    yield chunk
+                finished = True
+            except Exception as e:
+                finished = True
+                metrics.record(time.monotonic() - started, e)
+                breaker.record_failure()
+                if sent_any:
+                    raise
+                errors.append(f'{provider.name} failed: {e}')
+                continue
+            finally:
+                # The consumer stopped reading (e.g. the SSE client disconnected).
+                # Chunks already streamed count as a success; otherwise the
+                # half-open trial is released so the circuit is not stuck.
+                if not finished:
+                    if sent_any:
+                        breaker.record_success()
+                    else:
+                        breaker.release()
+
+            metrics.record(time.monotonic() - started)
+            breaker.record_success()
+            return
+        raise ProviderError('; '.join(errors))
+
+    def metrics(self) -> Dict:
+        return {
+            name: {**metrics.snapshot(), 'circuit': self.breakers[name].state}
+            for name, metrics in self._metrics.items()
+        }
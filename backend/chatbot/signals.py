@@ -0,0 +1,40 @@
+"""
+Signals that keep the chatbot's FAQ index, grounding and profile snapshots current
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import User
+from accounts.gamification_models import UserCivicProfile
+from events.models import Event
+from issues.models import Issue
+from .models import CommonQuestion
+from .faq import faq_index
+from .grounding import grounding_snapshots
+from .prompts import profile_snapshots
+
+
+@receiver(post_save, sender=CommonQuestion)
+@receiver(post_delete, sender=CommonQuestion)
+def invalidate_faq_index(sender, instance, **kwargs):
+    faq_index.invalidate()
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def refresh_issue_grounding(sender, instance, **kwargs):
+    reporter_id = instance.reported_by_id
+    transaction.on_commit(lambda: grounding_snapshots.invalidate_user(reporter_id))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def refresh_event_grounding(sender, instance, **kwargs):
+    transaction.on_commit(lambda: grounding_snapshots.refresh('events'))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserCivicProfile)
+def invalidate_profile_snapshot(sender, instance, **kwargs):
+    user_id = instance.pk if sender is User else instance.user_id
+    transaction.on_commit(lambda: profile_snapshots.invalidate(user_id))
@@ -0,0 +1,129 @@
+"""
+Token-bucket throttling for chatbot endpoints
+Buckets per session, user and client IP, with separate budgets for LLM calls and cheap answers
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Budget -> scope -> "requests/period". Each bucket holds `requests` tokens
+# and refills continuously over `period`, so short bursts are allowed.
+DEFAULT_RATES = {
+    # Responses that call an LLM provider
+    'llm': {'session': '10/m', 'user': '100/h', 'ip': '200/h'},
+    # Every chat message, including FAQ and cached answers
+    'message': {'session': '30/m', 'ip': '120/m'},
+    # New sessions
+    'session_start': {'ip': '20/h'},
+}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'10/m' -> (10, 60)"""
+    requests, period = rate.split('/')
+    return int(requests), PERIODS[period[0]]
+
+
+class ChatThrottle:
+    """
+    Token buckets kept in the Django cache
+
+    With a shared cache backend (Redis, Memcached) limits hold across
+    workers; if the cache errors, buckets fall back to this process's
+    memory so throttling keeps working, just per process. Reads and writes
+    are not atomic across workers, so a burst racing the same bucket can
+    overshoot by a token or two.
+    """
+
+    def __init__(self, rates: Dict = None):
+        self.rates = rates or {**DEFAULT_RATES, **getattr(settings, 'CHATBOT_THROTTLE_RATES', {})}
+        self._local = {}
+        self._lock = threading.Lock()
+        self.allowed = defaultdict(int)
+        self.denied = defaultdict(int)
+
+    def _load(self, keys: List[str]) -> Dict:
+        try:
+            return cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Chat throttle cache unavailable, using in-process buckets: {str(e)}")
+            with self._lock:
+                return {key: self._local[key] for key in keys if key in self._local}
+
+    def _store(self, states: Dict, timeout: int):
+        try:
+            cache.set_many(states, timeout)
+        except Exception:
+            with self._lock:
+                self._local.update(states)
+
+    def consume(self, budget: str, idents: Dict[str, Optional[str]]) -> Tuple[bool, float]:
+        """
+        Take one token from every bucket of a budget that applies
+
+        Args:
+            budget (str): Key of the rates table
+            idents (dict): scope ('session', 'user', 'ip') -> identifier; None skips the scope
+
+        Returns:
+            tuple: (allowed, seconds until allowed again). Nothing is consumed when denied.
+        """
+        buckets = []
+        for scope, rate in self.rates.get(budget, {}).items():
+            ident = idents.get(scope)
+            if ident is not None:
+                capacity, period = parse_rate(rate)
+                buckets.append((f'chatbot:throttle:{budget}:{scope}:{ident}', capacity, period))
+        if not buckets:
+            return True, 0.0
+
+        now = time.time()
+        states = self._load([key for key, _, _ in buckets])
+        refilled = {}
+        wait = 0.0
+        for key, capacity, period in buckets:
+            tokens, updated_at = states.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * capacity / period)
+            refilled[key] = tokens
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) * period / capacity)
+
+        if wait:
+            self.denied[budget] += 1
+            return False, round(wait, 1)
+
+        self._store(
+            {key: (refilled[key] - 1, now) for key, _, _ in buckets},
+            max(period for _, _, period in buckets)
+        )
+        self.allowed[budget] += 1
+        return True, 0.0
+
+    def stats(self) -> Dict:
+        """Allowed and denied requests per budget in this process"""
+        return {
+            budget: {'allowed': self.allowed[budget], 'denied': self.denied[budget]}
+            for budget in self.rates
+        }
+
+
+def request_idents(request, session_id: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """Throttle identifiers for a chat request"""
+    return {
+        'session': session_id,
+        'user': str(request.user.pk) if request.user.is_authenticated else None,
+        'ip': BaseThrottle().get_ident(request),
+    }
+
+
+# Create a singleton instance
+chat_throttle = ChatThrottle()
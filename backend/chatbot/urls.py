@@ -15,6 +15,7 @@ urlpatterns = [
     
     # Messaging
     path('message/send/', views.send_message, name='send-message'),
+    path('message/stream/', views.send_message_stream, name='send-message-stream'),
     path('message/rate/', views.rate_message, name='rate-message'),
     
     # Common questions / FAQ
@@ -5,13 +5,23 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db import models
-from django.db.models import Count, Avg, Q
+from django.utils.dateparse import parse_date
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+import json
+import time
 import uuid
 
-from .models import ChatSession, ChatMessage, ChatFeedback, CommonQuestion, ChatAnalytics
+from .models import ChatSession, ChatMessage, ChatFeedback, CommonQuestion, ChatAnalytics, ChatAnalyticsWatermark
+from .analytics import summarize_rollups
 from .ai_engine import get_chatbot_ai
+from .faq import faq_index
+from .memory import conversation_memory
+from .lifecycle import expire_if_idle, archived_messages
+from .throttling import chat_throttle, request_idents
+from .prompts import profile_snapshots
 from accounts.gamification_views import award_points
 
 
@@ -22,29 +32,17 @@ def start_chat_session(request):
     Start a new chat session
     Works for both authenticated and anonymous users
     """
+    allowed, retry_after = chat_throttle.consume('session_start', request_idents(request))
+    if not allowed:
+        return _throttled_response(retry_after)
+    
     try:
         user = request.user if request.user.is_authenticated else None
         session_id = str(uuid.uuid4())
         
-        # Get user metadata for context
-        user_metadata = {}
-        if user:
-            try:
-                civic_profile = user.civic_profile
-                user_metadata = {
-                    'name': user.get_full_name(),
-                    'email': user.email,
-                    'role': user.role,
-                    'level': civic_profile.current_level.level if civic_profile.current_level else 1,
-                    'level_name': civic_profile.current_level.name if civic_profile.current_level else 'New Citizen',
-                    'points': civic_profile.total_points,
-                    'credits': civic_profile.community_credits,
-                }
-            except Exception:
-                user_metadata = {
-                    'name': user.get_full_name(),
-                    'role': user.role,
-                }
+        # User details at session start, for the record; turns read the live snapshot
+        snapshot = profile_snapshots.get(user.id) if user else None
+        user_metadata = {key: value for key, value in (snapshot or {}).items() if key != 'fragment'}
         
         # Create session
         session = ChatSession.objects.create(
@@ -97,11 +95,28 @@ What can I help you with today?"""
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def send_message(request):
+def _throttled_response(retry_after):
+    response = Response(
+        {'error': 'Too many requests, please slow down', 'retry_after': retry_after},
+        status=status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(max(1, int(retry_after + 0.5)))
+    return response
+
+
+def _llm_permit(request, session):
+    """Callable the AI engine uses to spend a token from the LLM budget"""
+    idents = request_idents(request, session.session_id)
+    return lambda: chat_throttle.consume('llm', idents)[0]
+
+
+def _begin_turn(request):
     """
-    Send a message and get AI response
+    Validate a send-message request and load the turn's context
+    Returns: (error_response, session, user_msg, conversation_history)
+    
+    The user message is built but not saved; _commit_turn persists it with
+    the bot response.
     """
     session_id = request.data.get('session_id')
     user_message = request.data.get('message', '').strip()
@@ -110,13 +125,18 @@ def send_message(request):
         return Response(
             {'error': 'session_id is required'},
             status=status.HTTP_400_BAD_REQUEST
-        )
+        ), None, None, None
     
     if not user_message:
         return Response(
             {'error': 'message cannot be empty'},
             status=status.HTTP_400_BAD_REQUEST
-        )
+        ), None, None, None
+    
+    # Every turn spends from the message budget, before any database work
+    allowed, retry_after = chat_throttle.consume('message', request_idents(request, session_id))
+    if not allowed:
+        return _throttled_response(retry_after), None, None, None
     
     # Get session
     try:
@@ -125,37 +145,119 @@ def send_message(request):
         return Response(
             {'error': 'Invalid or expired session'},
             status=status.HTTP_404_NOT_FOUND
-        )
+        ), None, None, None
+    
+    if expire_if_idle(session):
+        return Response(
+            {'error': 'Invalid or expired session'},
+            status=status.HTTP_404_NOT_FOUND
+        ), None, None, None
     
-    # Update last message time
-    session.last_message_at = timezone.now()
-    session.save()
+    # Get conversation history (bounded; the new message is passed to the AI separately)
+    conversation_history = conversation_memory.build_history(session)
     
-    # Save user message
-    user_msg = ChatMessage.objects.create(
+    user_msg = ChatMessage(
         session=session,
         sender='user',
         message=user_message
     )
     
-    # Get conversation history
-    conversation_history = list(
-        session.messages.values('sender', 'message').order_by('created_at')
-    )
+    return None, session, user_msg, conversation_history
+
+
+def _commit_turn(session, user_msg, bot_msg):
+    """
+    Save a turn as one unit: a narrow session UPDATE and a single INSERT of
+    both messages
+    
+    The UPDATE is conditional on the user_message_count read with the
+    session, so a first turn is detected without counting messages and two
+    racing first turns cannot both be rewarded. A conversation summary
+    folded while building the history is written by the same UPDATE.
+    """
+    seen = session.user_message_count
+    now = timezone.now()
+    fields = {'last_message_at': now}
+    if getattr(session, 'summary_dirty', False):
+        fields['context_data'] = session.context_data
+    with transaction.atomic():
+        first_turn = seen == 0 and ChatSession.objects.filter(
+            pk=session.pk, user_message_count=seen
+        ).update(user_message_count=seen + 1, **fields) == 1
+        if not first_turn:
+            ChatSession.objects.filter(pk=session.pk).update(
+                user_message_count=F('user_message_count') + 1, **fields
+            )
+        ChatMessage.objects.bulk_create([user_msg, bot_msg])
+    session.summary_dirty = False
+    
+    session.last_message_at = now
+    session.user_message_count = seen + 1
+    
+    # Award points for using chatbot (first time in session)
+    if first_turn and session.user_id:
+        try:
+            award_points(
+                session.user,
+                'helpful_vote',  # Small reward for engagement
+                'Used civic assistant chatbot'
+            )
+        except Exception:
+            pass
+
+
+def _user_message_data(user_msg):
+    return {
+        'id': user_msg.id,
+        'message': user_msg.message,
+        'sender': 'user',
+        'created_at': user_msg.created_at.isoformat()
+    }
+
+
+def _bot_message_data(bot_msg):
+    return {
+        'id': bot_msg.id,
+        'message': bot_msg.message,
+        'sender': 'bot',
+        'intent': bot_msg.intent,
+        'confidence': bot_msg.confidence,
+        'response_time_ms': bot_msg.response_time_ms,
+        'quick_replies': bot_msg.quick_replies,
+        'created_at': bot_msg.created_at.isoformat()
+    }
+
+
+def _sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def send_message(request):
+    """
+    Send a message and get AI response
+    """
+    error, session, user_msg, conversation_history = _begin_turn(request)
+    if error:
+        return error
     
     # Generate AI response
     ai = get_chatbot_ai()
     response_text, intent, confidence, response_time_ms = ai.generate_response(
-        user_message,
+        user_msg.message,
         conversation_history,
-        session.user_metadata
+        profile_snapshots.get(session.user_id),
+        llm_permit=_llm_permit(request, session),
+        user_id=session.user_id
     )
     
     # Get quick replies
     quick_replies = ai.get_quick_replies(intent)
     
-    # Save bot response
-    bot_msg = ChatMessage.objects.create(
+    # Save both messages in one round trip
+    bot_msg = ChatMessage(
         session=session,
         sender='bot',
         message=response_text,
@@ -164,38 +266,80 @@ def send_message(request):
         response_time_ms=response_time_ms,
         quick_replies=quick_replies
     )
-    
-    # Award points for using chatbot (first time in session)
-    if session.user and session.messages.filter(sender='user').count() == 1:
-        try:
-            award_points(
-                session.user,
-                'helpful_vote',  # Small reward for engagement
-                'Used civic assistant chatbot'
-            )
-        except Exception:
-            pass
+    _commit_turn(session, user_msg, bot_msg)
     
     return Response({
-        'user_message': {
-            'id': user_msg.id,
-            'message': user_msg.message,
-            'sender': 'user',
-            'created_at': user_msg.created_at.isoformat()
-        },
-        'bot_response': {
-            'id': bot_msg.id,
-            'message': bot_msg.message,
-            'sender': 'bot',
-            'intent': bot_msg.intent,
-            'confidence': bot_msg.confidence,
-            'response_time_ms': bot_msg.response_time_ms,
-            'quick_replies': bot_msg.quick_replies,
-            'created_at': bot_msg.created_at.isoformat()
-        }
+        'user_message': _user_message_data(user_msg),
+        'bot_response': _bot_message_data(bot_msg)
     })
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def send_message_stream(request):
+    """
+    Send a message and stream the AI response as Server-Sent Events
+    
+    Events: 'start' (the user message text), 'token' ({"text": chunk}) per
+    provider chunk, then 'done' (both saved messages) or 'error'. Nothing is
+    saved for a turn that ends in 'error'.
+    """
+    error, session, user_msg, conversation_history = _begin_turn(request)
+    if error:
+        return error
+    
+    ai = get_chatbot_ai()
+    start_time = time.time()
+    intent, chunks = ai.stream_response(
+        user_msg.message,
+        conversation_history,
+        profile_snapshots.get(session.user_id),
+        llm_permit=_llm_permit(request, session),
+        user_id=session.user_id
+    )
+    
+    def event_stream():
+        yield _sse_event('start', {'user_message': {'message': user_msg.message, 'sender': 'user'}})
+        
+        parts = []
+        first_token_ms = None
+        try:
+            for chunk in chunks:
+                if first_token_ms is None:
+                    first_token_ms = int((time.time() - start_time) * 1000)
+                parts.append(chunk)
+                yield _sse_event('token', {'text': chunk})
+        except Exception as e:
+            print(f"[ERROR] Error streaming chat response: {str(e)}")
+        
+        if not parts:
+            yield _sse_event('error', {'error': 'No response generated'})
+            return
+        
+        # Persist the turn once the stream completes
+        bot_msg = ChatMessage(
+            session=session,
+            sender='bot',
+            message=''.join(parts).strip(),
+            intent=intent,
+            confidence=0.9 if ai.ai_service != 'fallback' else 0.5,
+            response_time_ms=int((time.time() - start_time) * 1000),
+            quick_replies=ai.get_quick_replies(intent),
+            metadata={'streamed': True, 'first_token_ms': first_token_ms}
+        )
+        _commit_turn(session, user_msg, bot_msg)
+        
+        yield _sse_event('done', {
+            'user_message': _user_message_data(user_msg),
+            'bot_response': _bot_message_data(bot_msg)
+        })
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx buffering the stream
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_chat_history(request, session_id):
@@ -210,16 +354,18 @@ def get_chat_history(request, session_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Get messages
-    messages = session.messages.all().values(
-        'id', 'sender', 'message', 'intent', 'confidence',
-        'quick_replies', 'created_at'
-    )
+    # Get messages (from the compressed archive once the session is archived)
+    fields = ['id', 'sender', 'message', 'intent', 'confidence', 'quick_replies', 'created_at']
+    if session.archive_id:
+        messages = [{field: row.get(field) for field in fields} for row in archived_messages(session)]
+    else:
+        messages = list(session.messages.all().values(*fields))
     
     return Response({
         'session_id': session_id,
         'started_at': session.started_at.isoformat(),
-        'messages': list(messages)
+        'archived': session.archive_id is not None,
+        'messages': messages
     })
 
 
@@ -381,38 +527,47 @@ def get_chat_analytics(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    # Overall stats
-    total_sessions = ChatSession.objects.count()
-    active_sessions = ChatSession.objects.filter(is_active=True).count()
-    total_messages = ChatMessage.objects.count()
+    # Optional date range (YYYY-MM-DD, inclusive)
+    date_range = {}
+    for param in ['date_from', 'date_to']:
+        value = request.query_params.get(param)
+        if not value:
+            continue
+        try:
+            date_range[param] = parse_date(value)
+        except ValueError:
+            date_range[param] = None
+        if date_range[param] is None:
+            return Response(
+                {'error': f'{param} must be a YYYY-MM-DD date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
     
-    # Average metrics
-    avg_response_time = ChatMessage.objects.filter(
-        sender='bot',
-        response_time_ms__isnull=False
-    ).aggregate(avg=Avg('response_time_ms'))['avg'] or 0
-    
-    # Feedback stats
-    feedback_stats = ChatFeedback.objects.aggregate(
-        total=Count('id'),
-        avg_rating=Avg('rating'),
-        helpful=Count('id', filter=models.Q(helpful=True))
-    )
+    # Rollups are refreshed by `manage.py rollup_chat_analytics`, not here
+    rollups = ChatAnalytics.objects.all()
+    if 'date_from' in date_range:
+        rollups = rollups.filter(date__gte=date_range['date_from'])
+    if 'date_to' in date_range:
+        rollups = rollups.filter(date__lte=date_range['date_to'])
+    summary = summarize_rollups(rollups)
     
-    # Top intents
-    top_intents = ChatMessage.objects.filter(
-        sender='bot',
-        intent__isnull=False
-    ).values('intent').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]
+    active_sessions = ChatSession.objects.filter(is_active=True).count()
+    ai = get_chatbot_ai()
     
     return Response({
-        'total_sessions': total_sessions,
+        **summary,
         'active_sessions': active_sessions,
-        'total_messages': total_messages,
-        'avg_response_time_ms': round(avg_response_time, 2),
-        'feedback': feedback_stats,
-        'top_intents': list(top_intents)
+        'date_from': date_range.get('date_from'),
+        'date_to': date_range.get('date_to'),
+        'rolled_up_at': ChatAnalyticsWatermark.objects.aggregate(at=Min('updated_at'))['at'],
+        'daily': list(rollups.order_by('date').values(
+            'date', 'total_sessions', 'total_messages', 'unique_users', 'anonymous_sessions',
+            'avg_response_time_ms', 'avg_session_length', 'total_feedback',
+            'positive_feedback', 'negative_feedback', 'top_categories'
+        )),
+        'response_cache': ai.response_cache.stats(),
+        'faq_retrieval': faq_index.stats(),
+        'providers': ai.provider_client.metrics() if ai.provider_client else {},
+        'throttling': chat_throttle.stats(),
+        'profile_snapshots': profile_snapshots.stats()
     })
-
@@ -47,6 +47,7 @@ LOCAL_APPS = [
     'transparency',
     'maps',
     'chatbot',
+    'tags',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -212,6 +213,27 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Cache Configuration
+# Chat profile snapshots, throttle buckets and grounding snapshots live in the cache and
+# are invalidated from signals, so every worker process must share it: set REDIS_URL in
+# production. Without it each process keeps its own memory cache (single-process dev only)
+# and profile snapshots expire after a minute instead of waiting for an invalidation.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'civic',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Celery Configuration
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
@@ -229,6 +251,71 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('EMAIL_HOST_USER', default='noreply@civicplatform.com')
 
+# Geocoding Configuration
+# LocalProvider answers from our own districts and facilities without network access;
+# set to 'maps.geocoding.NominatimProvider' to use OpenStreetMap via geopy.
+GEOCODING_PROVIDER = config('GEOCODING_PROVIDER', default='maps.geocoding.LocalProvider')
+GEOCODING_USER_AGENT = config('GEOCODING_USER_AGENT', default='civic-platform')
+GEOCODING_TIMEOUT = config('GEOCODING_TIMEOUT', default=5, cast=int)
+
+# Chatbot Configuration
+# Generated answers are reused for repeat questions from users with the same role and level
+CHATBOT_RESPONSE_CACHE_SIZE = config('CHATBOT_RESPONSE_CACHE_SIZE', default=1000, cast=int)
+CHATBOT_RESPONSE_CACHE_TTL = config('CHATBOT_RESPONSE_CACHE_TTL', default=3600, cast=int)
+# Share of a question's terms an FAQ must cover to be answered without the LLM
+CHATBOT_FAQ_THRESHOLD = config('CHATBOT_FAQ_THRESHOLD', default=0.75, cast=float)
+# ...and only for questions of at least CHATBOT_FAQ_MIN_TERMS terms whose best FAQ
+# outscores the runner-up by CHATBOT_FAQ_MARGIN (a share of the best score)
+CHATBOT_FAQ_MIN_TERMS = config('CHATBOT_FAQ_MIN_TERMS', default=2, cast=int)
+CHATBOT_FAQ_MARGIN = config('CHATBOT_FAQ_MARGIN', default=0.1, cast=float)
+# Recent messages sent verbatim with each prompt; older ones are summarised
+CHATBOT_MEMORY_WINDOW = config('CHATBOT_MEMORY_WINDOW', default=10, cast=int)
+CHATBOT_HISTORY_TOKEN_BUDGET = config('CHATBOT_HISTORY_TOKEN_BUDGET', default=1500, cast=int)
+# Seconds a cached per-user prompt snapshot lives; saves invalidate it sooner when the cache is shared
+CHATBOT_PROFILE_TTL = config('CHATBOT_PROFILE_TTL', default=3600 if REDIS_URL else 60, cast=int)
+# LLM provider resilience: per-request deadline, retries, circuit breaker, and
+# hedging to the secondary provider (when both keys are set) after a delay; 0 disables hedging
+CHATBOT_PROVIDER_TIMEOUT = config('CHATBOT_PROVIDER_TIMEOUT', default=8.0, cast=float)
+CHATBOT_PROVIDER_RETRIES = config('CHATBOT_PROVIDER_RETRIES', default=1, cast=int)
+CHATBOT_BREAKER_FAILURES = config('CHATBOT_BREAKER_FAILURES', default=5, cast=int)
+CHATBOT_BREAKER_RESET_SECONDS = config('CHATBOT_BREAKER_RESET_SECONDS', default=30, cast=int)
+CHATBOT_HEDGE_AFTER_MS = config('CHATBOT_HEDGE_AFTER_MS', default=0, cast=int)
+# Session lifecycle: idle sessions end after CHATBOT_SESSION_IDLE_MINUTES; ended sessions'
+# messages are archived after CHATBOT_RETENTION_DAYS (by user type) and archives kept for a year
+CHATBOT_SESSION_IDLE_MINUTES = config('CHATBOT_SESSION_IDLE_MINUTES', default=30, cast=int)
+CHATBOT_RETENTION_DAYS = {
+    'anonymous': 1,
+    'citizen': 30,
+    'official': 90,
+    'admin': 90,
+}
+CHATBOT_ARCHIVE_RETENTION_DAYS = config('CHATBOT_ARCHIVE_RETENTION_DAYS', default=365, cast=int)
+# Daily analytics are rolled up by `manage.py rollup_chat_analytics` (run every few minutes);
+# rows younger than CHATBOT_ANALYTICS_LAG_SECONDS wait for the next run
+CHATBOT_ANALYTICS_LAG_SECONDS = config('CHATBOT_ANALYTICS_LAG_SECONDS', default=60, cast=int)
+# FAQ confidence accepted when no provider is available
+CHATBOT_FAQ_DEGRADED_THRESHOLD = config('CHATBOT_FAQ_DEGRADED_THRESHOLD', default=0.4, cast=float)
+# Live data (upcoming events, the user's open issues, budget headlines) added to prompts;
+# snapshots are rebuilt in the background after CHATBOT_GROUNDING_TTL seconds
+CHATBOT_GROUNDING_TTL = config('CHATBOT_GROUNDING_TTL', default=300, cast=int)
+CHATBOT_GROUNDING_TOKEN_BUDGET = config('CHATBOT_GROUNDING_TOKEN_BUDGET', default=300, cast=int)
+# Token-bucket limits ("requests/period") per session, user and client IP. Turns over the
+# 'llm' budget are answered from the FAQ or canned text; over 'message' they get a 429.
+CHATBOT_THROTTLE_RATES = {
+    'llm': {'session': '10/m', 'user': '100/h', 'ip': '200/h'},
+    'message': {'session': '30/m', 'ip': '120/m'},
+    'session_start': {'ip': '20/h'},
+}
+
+# Map Data Configuration
+# Layers with more matching features than this are clustered or truncated
+MAP_LAYER_FEATURE_LIMIT = config('MAP_LAYER_FEATURE_LIMIT', default=2000, cast=int)
+
+# Forum Configuration
+# Hot ranking: a post FORUM_HOT_TIME_SCALE_HOURS newer ranks level with one that has
+# ten times the net score. Scores are fixed at vote time and never need refreshing.
+FORUM_HOT_TIME_SCALE_HOURS = config('FORUM_HOT_TIME_SCALE_HOURS', default=12.5, cast=float)
+
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
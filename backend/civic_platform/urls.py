@@ -25,6 +25,7 @@ urlpatterns = [
     path('api/transparency/', include('transparency.urls')),
     path('api/maps/', include('maps.urls')),
     path('api/chatbot/', include('chatbot.urls')),
+    path('api/tags/', include('tags.urls')),
     
     # JWT Token refresh
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_events_updated_1a904d_idx'),
+        ('tags', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='indexed_tags',
+            field=models.ManyToManyField(blank=True, editable=False, help_text='Mirror of tags; maintained by tags.signals', related_name='events', to='tags.tag'),
+        ),
+    ]
@@ -70,6 +70,10 @@ class Event(models.Model):
     
     # Metadata
     tags = models.JSONField(default=list, blank=True)
+    indexed_tags = models.ManyToManyField(
+        'tags.Tag', blank=True, editable=False, related_name='events',
+        help_text="Mirror of tags; maintained by tags.signals"
+    )
     external_url = models.URLField(blank=True)
     
     # Timestamps
@@ -85,6 +89,7 @@ class Event(models.Model):
             models.Index(fields=['start_date', 'end_date']),
             models.Index(fields=['category', 'start_date']),
             models.Index(fields=['organizer', 'start_date']),
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
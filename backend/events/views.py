@@ -15,6 +15,7 @@ from .serializers import (
     EventCategorySerializer, RSVPCreateUpdateSerializer, VolunteerCreateUpdateSerializer,
     EventFeedbackSerializer, EventUpdateSerializer, EventImageSerializer
 )
+from tags.indexing import filter_by_tags
 
 
 class EventCategoryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -70,6 +71,13 @@ class EventViewSet(viewsets.ModelViewSet):
             except (ValueError, TypeError):
                 pass
         
+        # Filter by tags (all of them, or any with tag_match=any)
+        tags = self.request.query_params.get('tags')
+        if tags:
+            queryset = filter_by_tags(
+                queryset, tags.split(','), self.request.query_params.get('tag_match', 'all')
+            )
+        
         return queryset
     
     def get_serializer_class(self):
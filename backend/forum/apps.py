@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ForumConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'forum'
+    
+    def ready(self):
+        # Import signals to register them
+        import forum.signals
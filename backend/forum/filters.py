@@ -0,0 +1,27 @@
+from rest_framework import filters
+
+
+class RankingOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that also accepts the named rankings a view declares in
+    ranking_orderings, e.g. ?ordering=hot
+    Each name expands to its stored columns before the usual validation;
+    a leading '-' (?ordering=-hot) reverses every expanded column
+    """
+
+    @staticmethod
+    def _reverse(column):
+        return column[1:] if column.startswith('-') else f'-{column}'
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        rankings = getattr(view, 'ranking_orderings', {})
+        expanded = []
+        for field in fields:
+            name = field.lstrip('-')
+            if name not in rankings:
+                expanded.append(field)
+            elif field.startswith('-'):
+                expanded.extend(self._reverse(column) for column in rankings[name])
+            else:
+                expanded.extend(rankings[name])
+        return super().remove_invalid_fields(queryset, expanded, view, request)
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:03
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_comments(apps, schema_editor):
+    ForumPost = apps.get_model('forum', 'ForumPost')
+    posts = ForumPost.objects.annotate(count=Count('comments')).filter(count__gt=0).values_list('id', 'count')
+    for post_id, count in posts.iterator():
+        ForumPost.objects.filter(id=post_id).update(comments_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, help_text='Maintained by forum.signals'),
+        ),
+        migrations.RunPython(count_existing_comments, migrations.RunPython.noop),
+    ]
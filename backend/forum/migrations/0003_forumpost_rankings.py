@@ -0,0 +1,79 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:06
+
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+
+# Frozen copy of the rankings as they stood when this migration was written;
+# hot_score is recomputed with the current formula by 0005_rescore_hot_posts
+def hot_score(score, created_at, now):
+    age_hours = max((now - created_at).total_seconds(), 0) / 3600
+    return (score + 1) / (age_hours + 2) ** 1.8
+
+
+def controversy_score(upvotes, downvotes):
+    if upvotes <= 0 or downvotes <= 0:
+        return 0.0
+    balance = min(upvotes, downvotes) / max(upvotes, downvotes)
+    return float(upvotes + downvotes) ** balance
+
+
+def rank_existing_posts(apps, schema_editor):
+    ForumPost = apps.get_model('forum', 'ForumPost')
+    now = timezone.now()
+    posts = ForumPost.objects.only('id', 'upvotes', 'downvotes', 'created_at').order_by('pk')
+    batch = []
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        post.score = post.upvotes - post.downvotes
+        post.hot_score = hot_score(post.score, post.created_at, now)
+        post.controversy = controversy_score(post.upvotes, post.downvotes)
+        batch.append(post)
+        if len(batch) >= BATCH_SIZE:
+            ForumPost.objects.bulk_update(batch, ['score', 'hot_score', 'controversy'])
+            batch = []
+    if batch:
+        ForumPost.objects.bulk_update(batch, ['score', 'hot_score', 'controversy'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0002_forumpost_comments_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='controversy',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(rank_existing_posts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['category', '-hot_score', '-created_at'], name='forum_posts_categor_dfba7e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['category', '-score', '-created_at'], name='forum_posts_categor_8acee9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['category', '-controversy', '-created_at'], name='forum_posts_categor_457ed9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['-hot_score', '-created_at'], name='forum_posts_hot_sco_310d47_idx'),
+        ),
+    ]
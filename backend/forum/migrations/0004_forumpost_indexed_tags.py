@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_forumpost_rankings'),
+        ('tags', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='indexed_tags',
+            field=models.ManyToManyField(blank=True, editable=False, help_text='Mirror of tags; maintained by tags.signals', related_name='forum_posts', to='tags.tag'),
+        ),
+    ]
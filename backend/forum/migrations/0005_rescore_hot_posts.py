@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-19 06:10
+
+import math
+from datetime import datetime, timezone as dt_timezone
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# Frozen copy of forum.ranking.hot_score with its default settings
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HOT_TIME_SCALE_HOURS = 12.5
+
+
+def hot_score(score, created_at):
+    magnitude = math.log10(max(abs(score), 1))
+    hours = (created_at - HOT_EPOCH).total_seconds() / 3600
+    return math.copysign(magnitude, score) + hours / HOT_TIME_SCALE_HOURS
+
+
+def rescore_hot_posts(apps, schema_editor):
+    ForumPost = apps.get_model('forum', 'ForumPost')
+    posts = ForumPost.objects.only('id', 'score', 'created_at').order_by('pk')
+    batch = []
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        post.hot_score = hot_score(post.score, post.created_at)
+        batch.append(post)
+        if len(batch) >= BATCH_SIZE:
+            ForumPost.objects.bulk_update(batch, ['hot_score'])
+            batch = []
+    if batch:
+        ForumPost.objects.bulk_update(batch, ['hot_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0004_forumpost_indexed_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(rescore_hot_posts, migrations.RunPython.noop),
+    ]
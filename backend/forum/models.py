@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from accounts.models import User
+from .ranking import ranking_fields
 import uuid
 
 
@@ -50,6 +52,12 @@ class ForumPost(models.Model):
     views = models.PositiveIntegerField(default=0)
     upvotes = models.PositiveIntegerField(default=0)
     downvotes = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0, help_text="Maintained by forum.signals")
+    
+    # Rankings (see forum.ranking), rewritten on every vote
+    score = models.IntegerField(default=0)
+    hot_score = models.FloatField(default=0)
+    controversy = models.FloatField(default=0)
     
     # Settings
     is_pinned = models.BooleanField(default=False)
@@ -62,6 +70,10 @@ class ForumPost(models.Model):
     
     # Metadata
     tags = models.JSONField(default=list, blank=True)
+    indexed_tags = models.ManyToManyField(
+        'tags.Tag', blank=True, editable=False, related_name='forum_posts',
+        help_text="Mirror of tags; maintained by tags.signals"
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -76,22 +88,47 @@ class ForumPost(models.Model):
             models.Index(fields=['category', 'post_type']),
             models.Index(fields=['author', 'created_at']),
             models.Index(fields=['is_pinned', 'created_at']),
+            # Category front pages for the hot/top/controversial orderings
+            models.Index(fields=['category', '-hot_score', '-created_at']),
+            models.Index(fields=['category', '-score', '-created_at']),
+            models.Index(fields=['category', '-controversy', '-created_at']),
+            models.Index(fields=['-hot_score', '-created_at']),
         ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        # New posts start with the rankings their (usually zero) votes imply
+        if self._state.adding:
+            created_at = self.created_at or timezone.now()
+            for field, value in ranking_fields(self.upvotes, self.downvotes, created_at).items():
+                setattr(self, field, value)
+        
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def apply_vote(cls, post_id, up_delta=0, down_delta=0):
+        """
+        Shift a post's vote counts and rewrite its rankings from the new
+        counts, with the row locked so concurrent votes cannot interleave
+        Returns the stored values
+        """
+        with transaction.atomic():
+            upvotes, downvotes, created_at = cls.objects.select_for_update().filter(
+                pk=post_id
+            ).values_list('upvotes', 'downvotes', 'created_at').get()
+            values = {
+                'upvotes': max(upvotes + up_delta, 0),
+                'downvotes': max(downvotes + down_delta, 0),
+            }
+            values.update(ranking_fields(values['upvotes'], values['downvotes'], created_at))
+            cls.objects.filter(pk=post_id).update(**values)
+        return values
+    
     @property
     def total_votes(self):
         return self.upvotes + self.downvotes
-    
-    @property
-    def score(self):
-        return self.upvotes - self.downvotes
-    
-    @property
-    def comments_count(self):
-        return self.comments.count()
 
 
 class ForumPostVote(models.Model):
@@ -0,0 +1,41 @@
+"""
+Ranking scores stored on forum posts
+Net score, hot score and controversy, written on every vote
+so the hot/top/controversial orderings are plain index scans
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+
+# Hot score = sign(net score) * log10(max(|net score|, 1)) + hours since HOT_EPOCH / HOT_TIME_SCALE_HOURS.
+# Newer posts get a permanently higher time term instead of older ones decaying,
+# so relative order never changes with the clock and stored scores need no
+# periodic refresh. A post HOT_TIME_SCALE_HOURS newer matches one with ten
+# times the net score; negative scores sink symmetrically.
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HOT_TIME_SCALE_HOURS = getattr(settings, 'FORUM_HOT_TIME_SCALE_HOURS', 12.5)
+
+
+def hot_score(score, created_at):
+    """Log-scaled net score plus a term that grows with the post's creation time"""
+    magnitude = math.log10(max(abs(score), 1))
+    hours = (created_at - HOT_EPOCH).total_seconds() / 3600
+    return math.copysign(magnitude, score) + hours / HOT_TIME_SCALE_HOURS
+
+
+def controversy_score(upvotes, downvotes):
+    """High when a post draws many votes that are evenly split"""
+    if upvotes <= 0 or downvotes <= 0:
+        return 0.0
+    balance = min(upvotes, downvotes) / max(upvotes, downvotes)
+    return float(upvotes + downvotes) ** balance
+
+
+def ranking_fields(upvotes, downvotes, created_at):
+    """Values for every stored ranking column of a post"""
+    score = upvotes - downvotes
+    return {
+        'score': score,
+        'hot_score': hot_score(score, created_at),
+        'controversy': controversy_score(upvotes, downvotes),
+    }
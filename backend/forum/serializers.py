@@ -1,12 +1,32 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import (
-    ForumCategory, ForumPost, ForumPostVote, ForumComment, ForumCommentVote,
-    Poll, PollOption, PollVote, Petition, PetitionSignature
+    ForumCategory, ForumPost, ForumComment, Poll, PollOption, Petition, PetitionSignature
 )
+from .viewer_state import ViewerState
 
 User = get_user_model()
 
+EXCERPT_CHARS = 280
+
+
+class ViewerStateMixin:
+    """
+    Reads the current user's votes from context['viewer_state']
+
+    Views that serialize many objects resolve the state once for all of
+    them; without it, the state is loaded for the single object.
+    """
+    
+    viewer_state_loader = None  # ViewerState.load_* method for this serializer's model
+    
+    def get_viewer_state(self, obj):
+        state = self.context.get('viewer_state')
+        if state is None:
+            state = ViewerState.for_request(self.context.get('request'))
+            getattr(state, self.viewer_state_loader)([obj])
+        return state
+
 
 class ForumCategorySerializer(serializers.ModelSerializer):
     """Serializer for forum categories"""
@@ -29,9 +49,10 @@ class PollOptionSerializer(serializers.ModelSerializer):
         fields = ['id', 'text', 'votes', 'order', 'percentage']
 
 
-class PollSerializer(serializers.ModelSerializer):
+class PollSerializer(ViewerStateMixin, serializers.ModelSerializer):
     """Serializer for polls"""
     
+    viewer_state_loader = 'load_polls'
     options = PollOptionSerializer(many=True, read_only=True)
     user_votes = serializers.SerializerMethodField()
     
@@ -44,16 +65,13 @@ class PollSerializer(serializers.ModelSerializer):
     
     def get_user_votes(self, obj):
         """Get user's votes on this poll"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            votes = PollVote.objects.filter(poll=obj, user=request.user)
-            return [vote.option.id for vote in votes]
-        return []
+        return self.get_viewer_state(obj).poll_option_ids(obj.id)
 
 
-class PetitionSerializer(serializers.ModelSerializer):
+class PetitionSerializer(ViewerStateMixin, serializers.ModelSerializer):
     """Serializer for petitions"""
     
+    viewer_state_loader = 'load_petitions'
     user_signed = serializers.SerializerMethodField()
     
     class Meta:
@@ -66,15 +84,13 @@ class PetitionSerializer(serializers.ModelSerializer):
     
     def get_user_signed(self, obj):
         """Check if current user signed this petition"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return PetitionSignature.objects.filter(petition=obj, user=request.user).exists()
-        return False
+        return self.get_viewer_state(obj).has_signed(obj.id)
 
 
-class ForumCommentSerializer(serializers.ModelSerializer):
+class ForumCommentSerializer(ViewerStateMixin, serializers.ModelSerializer):
     """Serializer for forum comments"""
     
+    viewer_state_loader = 'load_comments'
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     user_avatar = serializers.SerializerMethodField()
     user_role = serializers.CharField(source='user.role', read_only=True)
@@ -101,17 +117,16 @@ class ForumCommentSerializer(serializers.ModelSerializer):
     
     def get_user_vote(self, obj):
         """Get current user's vote on this comment"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                vote = ForumCommentVote.objects.get(comment=obj, user=request.user)
-                return vote.vote_type
-            except ForumCommentVote.DoesNotExist:
-                return None
-        return None
+        return self.get_viewer_state(obj).comment_vote(obj.id)
     
     def get_replies(self, obj):
         """Get comment replies"""
+        # A thread loaded in one query passes its approved replies by parent id
+        replies_by_parent = self.context.get('replies_by_parent')
+        if replies_by_parent is not None:
+            replies = replies_by_parent.get(obj.id, [])
+            return ForumCommentSerializer(replies, many=True, context=self.context).data if replies else []
+        
         if obj.replies.exists():
             return ForumCommentSerializer(
                 obj.replies.filter(is_approved=True).order_by('created_at'), 
@@ -121,15 +136,16 @@ class ForumCommentSerializer(serializers.ModelSerializer):
         return []
 
 
-class ForumPostSerializer(serializers.ModelSerializer):
+class ForumPostSerializer(ViewerStateMixin, serializers.ModelSerializer):
     """Serializer for forum posts"""
     
+    viewer_state_loader = 'load_posts'
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_color = serializers.CharField(source='category.color', read_only=True)
     author_name = serializers.CharField(source='author.get_full_name', read_only=True)
     author_avatar = serializers.SerializerMethodField()
     author_role = serializers.CharField(source='author.role', read_only=True)
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
     user_vote = serializers.SerializerMethodField()
     poll = PollSerializer(read_only=True)
     petition = PetitionSerializer(read_only=True)
@@ -144,7 +160,7 @@ class ForumPostSerializer(serializers.ModelSerializer):
             'tags', 'poll', 'petition', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'author', 'views', 'upvotes', 'downvotes', 'is_approved', 'is_flagged'
+            'author', 'views', 'upvotes', 'downvotes', 'score', 'is_approved', 'is_flagged'
         ]
     
     def get_author_avatar(self, obj):
@@ -158,14 +174,33 @@ class ForumPostSerializer(serializers.ModelSerializer):
     
     def get_user_vote(self, obj):
         """Get current user's vote on this post"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                vote = ForumPostVote.objects.get(post=obj, user=request.user)
-                return vote.vote_type
-            except ForumPostVote.DoesNotExist:
-                return None
-        return None
+        return self.get_viewer_state(obj).post_vote(obj.id)
+
+
+class ForumPostListSerializer(ForumPostSerializer):
+    """
+    Serializer for forum post lists
+    An excerpt instead of the full content; expects the queryset to
+    annotate content_head (see ForumPostViewSet.get_queryset)
+    """
+    
+    excerpt = serializers.SerializerMethodField()
+    
+    class Meta(ForumPostSerializer.Meta):
+        fields = [
+            'id', 'title', 'excerpt', 'category', 'category_name', 'category_color',
+            'post_type', 'author', 'author_name', 'author_avatar', 'author_role',
+            'views', 'upvotes', 'downvotes', 'score', 'user_vote', 'comments_count',
+            'is_pinned', 'is_locked', 'is_featured', 'is_approved', 'is_flagged',
+            'tags', 'poll', 'petition', 'created_at', 'updated_at'
+        ]
+    
+    def get_excerpt(self, obj):
+        """First EXCERPT_CHARS characters, cut at a word boundary"""
+        text = ' '.join(obj.content_head.split())
+        if len(text) <= EXCERPT_CHARS:
+            return text
+        return text[:EXCERPT_CHARS].rsplit(' ', 1)[0] + '...'
 
 
 class ForumPostCreateSerializer(serializers.ModelSerializer):
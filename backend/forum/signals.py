@@ -0,0 +1,21 @@
+"""
+Signals that maintain denormalized forum counters
+"""
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import ForumPost, ForumComment
+
+
+@receiver(post_save, sender=ForumComment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        ForumPost.objects.filter(pk=instance.post_id).update(comments_count=F('comments_count') + 1)
+
+
+@receiver(post_delete, sender=ForumComment)
+def uncount_deleted_comment(sender, instance, **kwargs):
+    # Also runs for replies removed by cascade
+    ForumPost.objects.filter(pk=instance.post_id, comments_count__gt=0).update(
+        comments_count=F('comments_count') - 1
+    )
@@ -0,0 +1,91 @@
+"""
+The current user's votes and signatures for a page of forum objects
+One query per object type instead of one per serialized object
+"""
+from collections import defaultdict
+from .models import ForumPostVote, ForumCommentVote, PollVote, PetitionSignature
+
+
+class ViewerState:
+    """
+    Resolved viewer state, passed to forum serializers as
+    context['viewer_state']
+
+    Call the load_* methods with every object a response will serialize
+    (posts, comments including replies, standalone polls or petitions);
+    each issues at most one query per vote type. Anonymous viewers never
+    query.
+    """
+
+    def __init__(self, user):
+        self.user = user if user is not None and user.is_authenticated else None
+        self.post_votes = {}
+        self.comment_votes = {}
+        self.poll_votes = defaultdict(list)
+        self.signed_petitions = set()
+
+    @classmethod
+    def for_request(cls, request):
+        return cls(request.user if request else None)
+
+    def load_posts(self, posts):
+        """Post votes, plus poll votes and signatures for poll and petition posts"""
+        if self.user is None or not posts:
+            return self
+        post_ids = [post.pk for post in posts]
+        self.post_votes.update(ForumPostVote.objects.filter(
+            user=self.user, post_id__in=post_ids
+        ).values_list('post_id', 'vote_type'))
+
+        poll_post_ids = [post.pk for post in posts if post.post_type == 'poll']
+        if poll_post_ids:
+            for poll_id, option_id in PollVote.objects.filter(
+                user=self.user, poll__post_id__in=poll_post_ids
+            ).values_list('poll_id', 'option_id'):
+                self.poll_votes[poll_id].append(option_id)
+
+        petition_post_ids = [post.pk for post in posts if post.post_type == 'petition']
+        if petition_post_ids:
+            self.signed_petitions.update(PetitionSignature.objects.filter(
+                user=self.user, petition__post_id__in=petition_post_ids
+            ).values_list('petition_id', flat=True))
+        return self
+
+    def load_comments(self, comments):
+        if self.user is None or not comments:
+            return self
+        self.comment_votes.update(ForumCommentVote.objects.filter(
+            user=self.user, comment_id__in=[comment.pk for comment in comments]
+        ).values_list('comment_id', 'vote_type'))
+        return self
+
+    def load_polls(self, polls):
+        if self.user is None or not polls:
+            return self
+        for poll in polls:
+            self.poll_votes.pop(poll.pk, None)
+        for poll_id, option_id in PollVote.objects.filter(
+            user=self.user, poll_id__in=[poll.pk for poll in polls]
+        ).values_list('poll_id', 'option_id'):
+            self.poll_votes[poll_id].append(option_id)
+        return self
+
+    def load_petitions(self, petitions):
+        if self.user is None or not petitions:
+            return self
+        self.signed_petitions.update(PetitionSignature.objects.filter(
+            user=self.user, petition_id__in=[petition.pk for petition in petitions]
+        ).values_list('petition_id', flat=True))
+        return self
+
+    def post_vote(self, post_id):
+        return self.post_votes.get(post_id)
+
+    def comment_vote(self, comment_id):
+        return self.comment_votes.get(comment_id)
+
+    def poll_option_ids(self, poll_id):
+        return list(self.poll_votes.get(poll_id, []))
+
+    def has_signed(self, petition_id):
+        return petition_id in self.signed_petitions
@@ -4,17 +4,22 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, F, Count
+from django.db.models.functions import Substr
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from collections import defaultdict
 from .models import (
     ForumCategory, ForumPost, ForumPostVote, ForumComment, ForumCommentVote,
     Poll, PollOption, PollVote, Petition, PetitionSignature
 )
 from .serializers import (
-    ForumCategorySerializer, ForumPostSerializer, ForumPostCreateSerializer,
+    ForumCategorySerializer, ForumPostSerializer, ForumPostListSerializer, ForumPostCreateSerializer,
     ForumCommentSerializer, PollSerializer, PetitionSerializer,
-    PetitionSignatureSerializer
+    PetitionSignatureSerializer, EXCERPT_CHARS
 )
+from .filters import RankingOrderingFilter
+from .viewer_state import ViewerState
+from tags.indexing import filter_by_tags
 
 
 class ForumCategoryViewSet(ModelViewSet):
@@ -38,25 +43,36 @@ class ForumPostViewSet(ModelViewSet):
     
     queryset = ForumPost.objects.select_related(
         'category', 'author', 'poll', 'petition'
-    ).prefetch_related(
-        'poll__options', 'user_votes', 'comments'
-    ).filter(is_approved=True)
+    ).prefetch_related('poll__options').filter(is_approved=True)
     
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, RankingOrderingFilter]
     filterset_fields = ['category', 'post_type', 'author', 'is_pinned', 'is_featured']
     search_fields = ['title', 'content', 'tags']
-    ordering_fields = ['created_at', 'updated_at', 'views', 'upvotes', 'score']
+    ordering_fields = ['created_at', 'updated_at', 'views', 'upvotes', 'score', 'hot_score', 'controversy']
     ordering = ['-is_pinned', '-created_at']
+    ranking_orderings = {
+        'hot': ['-hot_score', '-created_at'],
+        'top': ['-score', '-created_at'],
+        'controversial': ['-controversy', '-created_at'],
+    }
     
     def get_serializer_class(self):
         if self.action == 'create':
             return ForumPostCreateSerializer
+        if self.action == 'list':
+            return ForumPostListSerializer
         return ForumPostSerializer
     
     def get_queryset(self):
         queryset = super().get_queryset()
         
+        # Lists read only the start of each post; counts come from stored columns
+        if self.action == 'list':
+            queryset = queryset.defer('content').annotate(
+                content_head=Substr('content', 1, EXCERPT_CHARS * 2)
+            )
+        
         # Filter by category if specified
         category = self.request.query_params.get('category')
         if category and category != 'all':
@@ -67,20 +83,33 @@ class ForumPostViewSet(ModelViewSet):
         if post_type and post_type != 'all':
             queryset = queryset.filter(post_type=post_type)
         
-        # Filter by tags
+        # Filter by tags (all of them, or any with tag_match=any)
         tags = self.request.query_params.get('tags')
         if tags:
-            tag_list = tags.split(',')
-            for tag in tag_list:
-                queryset = queryset.filter(tags__icontains=tag.strip())
+            queryset = filter_by_tags(
+                queryset, tags.split(','), self.request.query_params.get('tag_match', 'all')
+            )
         
         return queryset
     
+    def get_post_serializer(self, posts, many=False):
+        """Serializer with the viewer's votes resolved for every post at once"""
+        context = self.get_serializer_context()
+        context['viewer_state'] = ViewerState.for_request(self.request).load_posts(posts if many else [posts])
+        return self.get_serializer(posts, many=many, context=context)
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_post_serializer(page, many=True).data)
+        return Response(self.get_post_serializer(list(queryset), many=True).data)
+    
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         # Increment views
         ForumPost.objects.filter(id=instance.id).update(views=F('views') + 1)
-        serializer = self.get_serializer(instance)
+        serializer = self.get_post_serializer(instance)
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
@@ -100,59 +129,61 @@ class ForumPostViewSet(ModelViewSet):
             if existing_vote.vote_type == vote_type:
                 # Remove vote if same type
                 existing_vote.delete()
-                if vote_type == 'up':
-                    ForumPost.objects.filter(id=post.id).update(upvotes=F('upvotes') - 1)
-                else:
-                    ForumPost.objects.filter(id=post.id).update(downvotes=F('downvotes') - 1)
+                deltas = {'up_delta': -1} if vote_type == 'up' else {'down_delta': -1}
                 message = 'Vote removed'
+                user_vote = None
             else:
                 # Change vote type
                 existing_vote.vote_type = vote_type
                 existing_vote.save()
                 
                 if vote_type == 'up':
-                    ForumPost.objects.filter(id=post.id).update(
-                        upvotes=F('upvotes') + 1,
-                        downvotes=F('downvotes') - 1
-                    )
+                    deltas = {'up_delta': 1, 'down_delta': -1}
                 else:
-                    ForumPost.objects.filter(id=post.id).update(
-                        upvotes=F('upvotes') - 1,
-                        downvotes=F('downvotes') + 1
-                    )
+                    deltas = {'up_delta': -1, 'down_delta': 1}
                 message = 'Vote updated'
+                user_vote = vote_type
         
         except ForumPostVote.DoesNotExist:
             # Create new vote
             ForumPostVote.objects.create(post=post, user=user, vote_type=vote_type)
-            
-            if vote_type == 'up':
-                ForumPost.objects.filter(id=post.id).update(upvotes=F('upvotes') + 1)
-            else:
-                ForumPost.objects.filter(id=post.id).update(downvotes=F('downvotes') + 1)
+            deltas = {'up_delta': 1} if vote_type == 'up' else {'down_delta': 1}
             message = 'Vote added'
+            user_vote = vote_type
         
-        # Get updated post data
-        post.refresh_from_db()
+        # Counts and rankings are rewritten together
+        counts = ForumPost.apply_vote(post.id, **deltas)
         return Response({
             'message': message,
-            'upvotes': post.upvotes,
-            'downvotes': post.downvotes,
-            'score': post.score,
-            'user_vote': vote_type if ForumPostVote.objects.filter(post=post, user=user).exists() else None
+            'upvotes': counts['upvotes'],
+            'downvotes': counts['downvotes'],
+            'score': counts['score'],
+            'user_vote': user_vote
         })
     
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
         """Get comments for a forum post"""
         post = self.get_object()
-        comments = ForumComment.objects.filter(
-            post=post, 
-            parent=None, 
+        
+        # Load the whole thread in one query and nest replies in memory
+        thread = list(ForumComment.objects.filter(
+            post=post,
             is_approved=True
-        ).select_related('user').prefetch_related('replies').order_by('created_at')
+        ).select_related('user').order_by('created_at'))
+        top_level = []
+        replies_by_parent = defaultdict(list)
+        for comment in thread:
+            if comment.parent_id is None:
+                top_level.append(comment)
+            else:
+                replies_by_parent[comment.parent_id].append(comment)
         
-        serializer = ForumCommentSerializer(comments, many=True, context={'request': request})
+        serializer = ForumCommentSerializer(top_level, many=True, context={
+            'request': request,
+            'viewer_state': ViewerState.for_request(request).load_comments(thread),
+            'replies_by_parent': replies_by_parent,
+        })
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
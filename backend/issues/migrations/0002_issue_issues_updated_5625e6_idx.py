@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['updated_at'], name='issues_updated_5625e6_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0002_issue_issues_updated_5625e6_idx'),
+        ('tags', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='indexed_tags',
+            field=models.ManyToManyField(blank=True, editable=False, help_text='Mirror of tags; maintained by tags.signals', related_name='issues', to='tags.tag'),
+        ),
+    ]
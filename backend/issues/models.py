@@ -72,6 +72,10 @@ class Issue(models.Model):
     
     # Metadata
     tags = models.JSONField(default=list, blank=True)
+    indexed_tags = models.ManyToManyField(
+        'tags.Tag', blank=True, editable=False, related_name='issues',
+        help_text="Mirror of tags; maintained by tags.signals"
+    )
     metadata = models.JSONField(default=dict, blank=True)
     
     # Timestamps
@@ -89,6 +93,7 @@ class Issue(models.Model):
             models.Index(fields=['category', 'status']),
             models.Index(fields=['reported_by', 'status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
@@ -15,6 +15,7 @@ from .serializers import (
     IssueCommentSerializer, IssueTimelineSerializer, IssueVoteSerializer,
     IssueImageSerializer, IssueSubscriptionSerializer
 )
+from tags.indexing import filter_by_tags
 
 
 class IssueCategoryViewSet(ModelViewSet):
@@ -72,6 +73,13 @@ class IssueViewSet(ModelViewSet):
             except (ValueError, TypeError):
                 pass
         
+        # Filter by tags (all of them, or any with tag_match=any)
+        tags = self.request.query_params.get('tags')
+        if tags:
+            queryset = filter_by_tags(
+                queryset, tags.split(','), self.request.query_params.get('tag_match', 'all')
+            )
+        
         return queryset
     
     def perform_create(self, serializer):
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import MapLayer, PublicFacility, District
+from .models import MapLayer, PublicFacility, District, CoverageAnalysis, GeocodeCache
 
 
 @admin.register(MapLayer)
@@ -22,3 +22,16 @@ class DistrictAdmin(admin.ModelAdmin):
     list_filter = ['district_type', 'is_active', 'created_at']
     search_fields = ['name', 'code', 'description', 'representative']
 
+
+@admin.register(CoverageAnalysis)
+class CoverageAnalysisAdmin(admin.ModelAdmin):
+    list_display = ['facility_type', 'radius_km', 'facility_count', 'uncovered_issue_count', 'issue_count', 'uncovered_district_count', 'computed_at']
+    list_filter = ['facility_type', 'radius_km', 'computed_at']
+    readonly_fields = ['computed_at']
+
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'query_key', 'provider', 'found', 'latitude', 'longitude', 'created_at']
+    list_filter = ['kind', 'provider', 'found', 'created_at']
+    search_fields = ['query_key', 'address']
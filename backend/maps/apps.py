@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MapsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'maps'
+    
+    def ready(self):
+        # Import signals to register them
+        import maps.signals
@@ -0,0 +1,425 @@
+"""
+Compact binary encoding for map layers
+
+Layout (all integers are LEB128 varints unless noted):
+
+    payload  := "CMAP" version:u8 cursor:str layer_count layer*
+    layer    := name:str row_count column_count column*
+    column   := name:str type:u8 byte_length bytes
+    str      := byte_length utf8_bytes
+
+Column types:
+
+    uint    row_count varints
+    int     row_count zigzag varints
+    str     entry_count, entry_count byte lengths, the concatenated utf8
+            entries, then row_count dictionary indexes
+    uuid    row_count x 16 raw bytes
+    bool    row_count bits, packed MSB-first
+    points  row_count zigzag lat deltas, then row_count zigzag lng deltas
+    rings   row_count vertex counts, then zigzag lat deltas and zigzag lng
+            deltas for every vertex, each stream running across all rings
+
+Full (non-delta) payloads end with a 'meta' layer holding one row per
+requested layer: layer, total, returned, truncated, clustered. This mirrors
+the JSON response's meta, so a capped layer can be told apart from a
+complete one. Over the cap, a layer's points are either sent as
+'<layer>.clusters' (location + count) with no rows, or truncated.
+
+Coordinates are fixed-point integers in millionths of a degree, the same
+precision the models store. Point layers are written in Z-order so
+consecutive deltas stay small.
+
+decode_payload is the reference decoder. Clients port it, and
+`manage.py benchmark_map_payload` uses it to check round trips. The web
+frontend does not request this format yet; it uses the JSON renderer.
+"""
+import struct
+import uuid
+import numpy as np
+
+MEDIA_TYPE = 'application/vnd.civic.map'
+MAGIC = b'CMAP'
+VERSION = 1
+COORDINATE_SCALE = 1_000_000
+
+COLUMN_TYPES = {
+    'uint': 1,
+    'int': 2,
+    'str': 3,
+    'uuid': 4,
+    'bool': 5,
+    'points': 6,
+    'rings': 7,
+}
+
+# Per layer: the values_list fields to fetch and the columns they become.
+# A 'points' column consumes two fields (latitude, longitude).
+LAYER_SPECS = {
+    'issues': [
+        ('id', 'uuid', ['id']),
+        ('location', 'points', ['latitude', 'longitude']),
+        ('status', 'str', ['status']),
+        ('priority', 'str', ['priority']),
+        ('category_id', 'uint', ['category_id']),
+        ('title', 'str', ['title']),
+        ('votes', 'uint', ['votes']),
+    ],
+    'events': [
+        ('id', 'uuid', ['id']),
+        ('location', 'points', ['latitude', 'longitude']),
+        ('category_id', 'uint', ['category_id']),
+        ('title', 'str', ['title']),
+        ('start_date', 'int', ['start_date']),
+        ('end_date', 'int', ['end_date']),
+        ('is_online', 'bool', ['is_online']),
+    ],
+    'facilities': [
+        ('id', 'uint', ['id']),
+        ('location', 'points', ['latitude', 'longitude']),
+        ('facility_type', 'str', ['facility_type']),
+        ('name', 'str', ['name']),
+        ('is_accessible', 'bool', ['is_accessible']),
+    ],
+    'districts': [
+        ('id', 'uint', ['id']),
+        ('boundary', 'rings', ['boundary_coordinates']),
+        ('code', 'str', ['code']),
+        ('name', 'str', ['name']),
+        ('district_type', 'str', ['district_type']),
+    ],
+}
+
+
+def layer_fields(layer):
+    """values_list field names needed to encode a layer"""
+    return [field for _, _, fields in LAYER_SPECS[layer] for field in fields]
+
+
+def varints(values):
+    """Encode non-negative integers as LEB128 varints (vectorised)"""
+    values = np.asarray(values, dtype=np.uint64)
+    if not len(values):
+        return b''
+
+    lengths = np.ones(len(values), dtype=np.int64)
+    remaining = values >> np.uint64(7)
+    while remaining.any():
+        lengths += remaining > 0
+        remaining >>= np.uint64(7)
+
+    width = int(lengths.max())
+    positions = np.arange(width)
+    shifts = (7 * positions).astype(np.uint64)
+    groups = ((values[:, np.newaxis] >> shifts) & np.uint64(0x7F)).astype(np.uint8)
+    groups |= np.where(positions < lengths[:, np.newaxis] - 1, 0x80, 0).astype(np.uint8)
+    return groups[positions < lengths[:, np.newaxis]].tobytes()
+
+
+def zigzag(values):
+    """Map signed integers onto unsigned ones so small magnitudes stay small"""
+    values = np.asarray(values, dtype=np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _varint(value):
+    return varints([value])
+
+
+def _string(value):
+    encoded = (value or '').encode('utf-8')
+    return _varint(len(encoded)) + encoded
+
+
+def _fixed_point(degrees):
+    return np.rint(np.asarray(degrees, dtype=np.float64) * COORDINATE_SCALE).astype(np.int64)
+
+
+def _deltas(values):
+    return zigzag(np.diff(values, prepend=np.int64(0)))
+
+
+def _spread_bits(values):
+    """Interleave zeros between the low 16 bits of each value"""
+    values = values.astype(np.uint32) & 0xFFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    values = (values | (values << 1)) & 0x55555555
+    return values
+
+
+def z_order(latitudes, longitudes):
+    """Row order that walks points along a Z-order curve over their bounding box"""
+    if not len(latitudes):
+        return np.arange(0)
+
+    def quantize(values):
+        low, high = values.min(), values.max()
+        if high == low:
+            return np.zeros(len(values), dtype=np.uint32)
+        return ((values - low) * (0xFFFF / (high - low))).astype(np.uint32)
+
+    keys = _spread_bits(quantize(latitudes)) | (_spread_bits(quantize(longitudes)) << 1)
+    return np.argsort(keys, kind='stable')
+
+
+def encode_column(column_type, values):
+    """Encode one column's values to bytes"""
+    if column_type == 'uint':
+        return varints(values)
+
+    if column_type == 'int':
+        return varints(zigzag(values))
+
+    if column_type == 'str':
+        table = {}
+        indexes = [table.setdefault(value or '', len(table)) for value in values]
+        entries = [entry.encode('utf-8') for entry in table]
+        return (
+            _varint(len(entries))
+            + varints([len(entry) for entry in entries])
+            + b''.join(entries)
+            + varints(indexes)
+        )
+
+    if column_type == 'uuid':
+        return b''.join(value.bytes for value in values)
+
+    if column_type == 'bool':
+        return np.packbits(np.asarray(values, dtype=bool)).tobytes()
+
+    if column_type == 'points':
+        latitudes, longitudes = values
+        return varints(_deltas(_fixed_point(latitudes))) + varints(_deltas(_fixed_point(longitudes)))
+
+    if column_type == 'rings':
+        counts = [len(ring or []) for ring in values]
+        vertices = np.array(
+            [vertex for ring in values for vertex in (ring or [])], dtype=np.float64
+        ).reshape(-1, 2)
+        return (
+            varints(counts)
+            + varints(_deltas(_fixed_point(vertices[:, 0])))
+            + varints(_deltas(_fixed_point(vertices[:, 1])))
+        )
+
+    raise ValueError(f"Unknown column type: {column_type}")
+
+
+def encode_layer(name, columns, row_count):
+    """
+    Encode a layer from already-extracted columns
+
+    Args:
+        name (str): Layer name
+        columns (list): (column_name, column_type, values) tuples
+        row_count (int): Number of rows in every column
+    """
+    parts = [_string(name), _varint(row_count), _varint(len(columns))]
+    for column_name, column_type, values in columns:
+        payload = encode_column(column_type, values)
+        parts.extend([
+            _string(column_name),
+            struct.pack('B', COLUMN_TYPES[column_type]),
+            _varint(len(payload)),
+            payload,
+        ])
+    return b''.join(parts)
+
+
+def _as_epoch(value):
+    return int(value.timestamp()) if hasattr(value, 'timestamp') else value
+
+
+def encode_rows(layer, rows, name=None):
+    """
+    Encode values_list rows (fetched with layer_fields) for a known layer
+
+    Point layers are reordered along a Z-order curve before encoding.
+    """
+    spec = LAYER_SPECS[layer]
+    rows = list(rows)
+    fields = layer_fields(layer)
+
+    points = None
+    if 'latitude' in fields:
+        lat_index, lng_index = fields.index('latitude'), fields.index('longitude')
+        latitudes = np.array([row[lat_index] for row in rows], dtype=np.float64)
+        longitudes = np.array([row[lng_index] for row in rows], dtype=np.float64)
+        order = z_order(latitudes, longitudes)
+        rows = [rows[i] for i in order]
+        points = (latitudes[order], longitudes[order])
+
+    columns = []
+    position = 0
+    for column_name, column_type, column_fields in spec:
+        if column_type == 'points':
+            values = points
+        elif column_type == 'int':
+            values = [_as_epoch(row[position]) for row in rows]
+        else:
+            values = [row[position] for row in rows]
+        position += len(column_fields)
+        columns.append((column_name, column_type, values))
+
+    return encode_layer(name or layer, columns, len(rows))
+
+
+def encode_id_list(name, ids):
+    """Encode a single-column layer of string IDs (used for deletions)"""
+    ids = [str(value) for value in ids]
+    return encode_layer(name, [('id', 'str', ids)], len(ids))
+
+
+def encode_clusters(name, clusters):
+    """Encode cluster dicts (see maps.layers.cluster_points) as a location + count layer"""
+    latitudes = np.array([cluster['latitude'] for cluster in clusters], dtype=np.float64)
+    longitudes = np.array([cluster['longitude'] for cluster in clusters], dtype=np.float64)
+    return encode_layer(name, [
+        ('location', 'points', (latitudes, longitudes)),
+        ('count', 'uint', [cluster['count'] for cluster in clusters]),
+    ], len(clusters))
+
+
+def encode_meta(meta):
+    """Encode per-layer meta dicts ({layer: {total, returned, truncated, clustered}}) as the 'meta' layer"""
+    layers = list(meta)
+    return encode_layer('meta', [
+        ('layer', 'str', layers),
+        ('total', 'uint', [meta[layer]['total'] for layer in layers]),
+        ('returned', 'uint', [meta[layer]['returned'] for layer in layers]),
+        ('truncated', 'bool', [meta[layer]['truncated'] for layer in layers]),
+        ('clustered', 'bool', [meta[layer]['clustered'] for layer in layers]),
+    ], len(layers))
+
+
+def encode_payload(layer_blobs, cursor=''):
+    """Wrap encoded layers in the payload header"""
+    return b''.join([
+        MAGIC,
+        struct.pack('B', VERSION),
+        _string(cursor),
+        _varint(len(layer_blobs)),
+        *layer_blobs,
+    ])
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _read_varints(data, offset, count):
+    values = []
+    for _ in range(count):
+        value, offset = _read_varint(data, offset)
+        values.append(value)
+    return values, offset
+
+
+def _read_string(data, offset):
+    length, offset = _read_varint(data, offset)
+    return bytes(data[offset:offset + length]).decode('utf-8'), offset + length
+
+
+def unzigzag(values):
+    """Inverse of zigzag"""
+    values = np.asarray(values, dtype=np.uint64)
+    return ((values >> np.uint64(1)).astype(np.int64)) ^ -((values & np.uint64(1)).astype(np.int64))
+
+
+def _coordinates(deltas):
+    return (np.cumsum(unzigzag(deltas)) / COORDINATE_SCALE).tolist()
+
+
+def decode_column(column_type, data, row_count):
+    """Decode one column's bytes back to a list of row values"""
+    if column_type == 'uint':
+        return _read_varints(data, 0, row_count)[0]
+
+    if column_type == 'int':
+        return unzigzag(_read_varints(data, 0, row_count)[0]).tolist()
+
+    if column_type == 'str':
+        entry_count, offset = _read_varint(data, 0)
+        lengths, offset = _read_varints(data, offset, entry_count)
+        entries = []
+        for length in lengths:
+            entries.append(bytes(data[offset:offset + length]).decode('utf-8'))
+            offset += length
+        indexes, _ = _read_varints(data, offset, row_count)
+        return [entries[index] for index in indexes]
+
+    if column_type == 'uuid':
+        return [uuid.UUID(bytes=bytes(data[16 * i:16 * (i + 1)])) for i in range(row_count)]
+
+    if column_type == 'bool':
+        bits = np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8))[:row_count]
+        return bits.astype(bool).tolist()
+
+    if column_type == 'points':
+        latitudes, offset = _read_varints(data, 0, row_count)
+        longitudes, _ = _read_varints(data, offset, row_count)
+        return list(zip(_coordinates(latitudes), _coordinates(longitudes)))
+
+    if column_type == 'rings':
+        counts, offset = _read_varints(data, 0, row_count)
+        latitudes, offset = _read_varints(data, offset, sum(counts))
+        longitudes, _ = _read_varints(data, offset, sum(counts))
+        vertices = [list(vertex) for vertex in zip(_coordinates(latitudes), _coordinates(longitudes))]
+        rings, start = [], 0
+        for count in counts:
+            rings.append(vertices[start:start + count])
+            start += count
+        return rings
+
+    raise ValueError(f"Unknown column type: {column_type}")
+
+
+def decode_payload(data):
+    """
+    Decode a payload produced by encode_payload
+
+    Returns:
+        dict: {'cursor': str, 'layers': {name: {column_name: values}}, 'meta': {layer: dict}}
+            Layers keep payload order; points decode to (lat, lng) tuples,
+            rings to lists of [lat, lng] vertices, 'int' dates stay epoch seconds.
+            The 'meta' layer is returned keyed by layer name, as in the JSON
+            response (empty for delta payloads).
+    """
+    data = memoryview(data)
+    if bytes(data[:4]) != MAGIC:
+        raise ValueError("Not a map payload")
+    if data[4] != VERSION:
+        raise ValueError(f"Unsupported map payload version: {data[4]}")
+
+    type_names = {code: name for name, code in COLUMN_TYPES.items()}
+    cursor, offset = _read_string(data, 5)
+    layer_count, offset = _read_varint(data, offset)
+    layers = {}
+    for _ in range(layer_count):
+        name, offset = _read_string(data, offset)
+        row_count, offset = _read_varint(data, offset)
+        column_count, offset = _read_varint(data, offset)
+        columns = {}
+        for _ in range(column_count):
+            column_name, offset = _read_string(data, offset)
+            column_type = type_names[data[offset]]
+            length, offset = _read_varint(data, offset + 1)
+            columns[column_name] = decode_column(column_type, data[offset:offset + length], row_count)
+            offset += length
+        layers[name] = columns
+
+    meta = {}
+    if 'meta' in layers:
+        columns = layers.pop('meta')
+        for index, layer in enumerate(columns['layer']):
+            meta[layer] = {field: columns[field][index] for field in ('total', 'returned', 'truncated', 'clustered')}
+    return {'cursor': cursor, 'layers': layers, 'meta': meta}
@@ -0,0 +1,152 @@
+"""
+Facility service-area coverage analysis
+Finds open issues and districts outside a radius of every facility of a type
+"""
+from issues.models import Issue
+from .models import PublicFacility, District, CoverageAnalysis
+from .proximity import unit_vectors, EARTH_RADIUS_KM
+import math
+import time
+import numpy as np
+
+KM_PER_DEGREE = 111.195  # Great-circle kilometres per degree of latitude
+OPEN_STATUSES = ['open', 'in_progress']
+DEFAULT_FACILITY_TYPES = ['fire_station', 'hospital', 'police_station']
+DEFAULT_RADII_KM = [2.0, 5.0]
+# Stored uncovered issue IDs per result; the count always covers them all
+MAX_STORED_ISSUE_IDS = 1000
+
+
+def _cell_keys(rows, cols):
+    """Pack (row, col) grid cells into single int64 keys"""
+    return rows.astype(np.int64) * (1 << 32) + (cols.astype(np.int64) & 0xFFFFFFFF)
+
+
+def uncovered_mask(point_lats, point_lngs, facility_lats, facility_lngs, radius_km):
+    """
+    Mark points farther than radius_km from every facility
+
+    Facilities are bucketed into a lat/lng grid whose cells are at least
+    radius_km across, so any facility within range of a point lies in the
+    point's cell or one of its eight neighbours. Points are processed one
+    grid cell at a time with a single matrix product per cell.
+    """
+    if not radius_km > 0:
+        raise ValueError("radius_km must be positive")
+
+    point_lats = np.asarray(point_lats, dtype=np.float64)
+    point_lngs = np.asarray(point_lngs, dtype=np.float64)
+    facility_lats = np.asarray(facility_lats, dtype=np.float64)
+    facility_lngs = np.asarray(facility_lngs, dtype=np.float64)
+
+    covered = np.zeros(len(point_lats), dtype=bool)
+    if not len(point_lats) or not len(facility_lats):
+        return ~covered
+
+    # Size cells for the highest latitude present so they are wide enough everywhere
+    max_lat = min(float(np.abs(np.concatenate([point_lats, facility_lats])).max()), 89.0)
+    lat_step = radius_km / KM_PER_DEGREE
+    lng_step = lat_step / math.cos(math.radians(max_lat))
+
+    facility_rows = np.floor(facility_lats / lat_step).astype(np.int64)
+    facility_cols = np.floor(facility_lngs / lng_step).astype(np.int64)
+    buckets = {}
+    for index, key in enumerate(_cell_keys(facility_rows, facility_cols)):
+        buckets.setdefault(int(key), []).append(index)
+
+    point_rows = np.floor(point_lats / lat_step).astype(np.int64)
+    point_cols = np.floor(point_lngs / lng_step).astype(np.int64)
+    cells, inverse = np.unique(_cell_keys(point_rows, point_cols), return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    groups = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(cells)))[:-1])
+
+    point_vectors = unit_vectors(point_lats, point_lngs).reshape(-1, 3)
+    facility_vectors = unit_vectors(facility_lats, facility_lngs).reshape(-1, 3)
+    threshold = math.cos(radius_km / EARTH_RADIUS_KM)
+
+    for members in groups:
+        row = int(point_rows[members[0]])
+        col = int(point_cols[members[0]])
+        nearby = []
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                key = (row + d_row) * (1 << 32) + ((col + d_col) & 0xFFFFFFFF)
+                nearby.extend(buckets.get(key, ()))
+        if not nearby:
+            continue
+
+        dots = point_vectors[members] @ facility_vectors[nearby].T
+        covered[members] = dots.max(axis=1) >= threshold
+
+    return ~covered
+
+
+def district_centroids(districts):
+    """Vertex-mean centroids of district boundaries; districts without one are skipped"""
+    ids, lats, lngs = [], [], []
+    for district_id, boundary in districts:
+        points = np.asarray(boundary or [], dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != 2 or not len(points):
+            continue
+        ids.append(district_id)
+        lats.append(points[:, 0].mean())
+        lngs.append(points[:, 1].mean())
+    return ids, np.array(lats), np.array(lngs)
+
+
+def run_coverage_analysis(facility_types=None, radii_km=None):
+    """
+    Compute and store coverage for each facility type and radius
+
+    Only the MAX_STORED_ISSUE_IDS most recently reported uncovered issues
+    are stored by ID; uncovered_issue_count is exact.
+
+    Returns:
+        list: The CoverageAnalysis rows created
+    """
+    facility_types = facility_types or DEFAULT_FACILITY_TYPES
+    radii_km = radii_km or DEFAULT_RADII_KM
+    if any(not radius_km > 0 for radius_km in radii_km):
+        raise ValueError("Service radii must be positive")
+
+    issues = list(Issue.objects.filter(
+        status__in=OPEN_STATUSES,
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).order_by('-created_at').values_list('id', 'latitude', 'longitude'))
+    issue_ids = np.array([str(issue_id) for issue_id, _, _ in issues], dtype=object)
+    issue_lats = np.array([float(lat) for _, lat, _ in issues])
+    issue_lngs = np.array([float(lng) for _, _, lng in issues])
+
+    district_ids, district_lats, district_lngs = district_centroids(
+        District.objects.filter(is_active=True).values_list('id', 'boundary_coordinates')
+    )
+    district_ids = np.array(district_ids, dtype=np.int64)
+
+    results = []
+    for facility_type in facility_types:
+        facilities = list(PublicFacility.objects.filter(
+            facility_type=facility_type, is_active=True
+        ).values_list('latitude', 'longitude'))
+        facility_lats = [float(lat) for lat, _ in facilities]
+        facility_lngs = [float(lng) for _, lng in facilities]
+
+        for radius_km in radii_km:
+            started = time.perf_counter()
+            issue_mask = uncovered_mask(issue_lats, issue_lngs, facility_lats, facility_lngs, radius_km)
+            district_mask = uncovered_mask(district_lats, district_lngs, facility_lats, facility_lngs, radius_km)
+
+            results.append(CoverageAnalysis.objects.create(
+                facility_type=facility_type,
+                radius_km=radius_km,
+                facility_count=len(facilities),
+                issue_count=len(issue_ids),
+                uncovered_issue_count=int(issue_mask.sum()),
+                uncovered_issue_ids=issue_ids[issue_mask][:MAX_STORED_ISSUE_IDS].tolist(),
+                district_count=len(district_ids),
+                uncovered_district_count=int(district_mask.sum()),
+                uncovered_district_ids=district_ids[district_mask].tolist(),
+                duration_ms=int((time.perf_counter() - started) * 1000),
+            ))
+
+    return results
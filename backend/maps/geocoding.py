@@ -0,0 +1,278 @@
+"""
+Geocoding and reverse geocoding with a persistent cache
+
+Lookups go through a pluggable provider (settings.GEOCODING_PROVIDER) and
+every answer, including "not found", is stored in GeocodeCache keyed on a
+normalized address or a rounded coordinate, so a repeated query never
+reaches the provider twice.
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .models import District, PublicFacility, GeocodeCache
+from .proximity import haversine_km
+from geopy.geocoders import Nominatim
+from decimal import Decimal
+import logging
+import re
+import unicodedata
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REVERSE_PRECISION = 4  # Decimal places kept in reverse-lookup keys (~11 m)
+CACHE_QUERY_BATCH = 500
+NEARBY_FACILITY_KM = 0.1
+
+ABBREVIATIONS = {
+    'street': 'st',
+    'road': 'rd',
+    'avenue': 'ave',
+    'boulevard': 'blvd',
+    'lane': 'ln',
+    'drive': 'dr',
+    'nagar': 'ngr',
+    'marg': 'mg',
+    'sector': 'sec',
+    'near': 'nr',
+    'opposite': 'opp',
+}
+
+
+def normalize_address(address):
+    """Canonical form of a free-text address used as the forward cache key"""
+    text = unicodedata.normalize('NFKC', address or '').lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    words = [ABBREVIATIONS.get(word, word) for word in text.split()]
+    return ' '.join(words)[:255]
+
+
+def coordinate_key(latitude, longitude):
+    """Rounded coordinate used as the reverse cache key"""
+    return f'{float(latitude):.{REVERSE_PRECISION}f},{float(longitude):.{REVERSE_PRECISION}f}'
+
+
+def point_in_ring(latitude, longitude, ring):
+    """Ray-casting point-in-polygon test for a ring of [lat, lng] pairs"""
+    points = np.asarray(ring, dtype=np.float64)
+    if points.ndim != 2 or len(points) < 3:
+        return False
+
+    lat1, lng1 = points[:, 0], points[:, 1]
+    lat2, lng2 = np.roll(lat1, -1), np.roll(lng1, -1)
+    straddles = (lat1 > latitude) != (lat2 > latitude)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = lng1 + (latitude - lat1) * (lng2 - lng1) / (lat2 - lat1)
+    return bool(np.count_nonzero(straddles & (longitude < crossing)) % 2)
+
+
+class GeocodingProvider:
+    """
+    Base class for geocoding providers
+
+    Both methods return a dict with 'latitude', 'longitude' and 'address'
+    keys, or None when the provider has no answer.
+    """
+
+    name = 'base'
+
+    def geocode(self, address):
+        raise NotImplementedError
+
+    def reverse(self, latitude, longitude):
+        raise NotImplementedError
+
+
+class LocalProvider(GeocodingProvider):
+    """
+    Offline provider backed by our own data
+
+    Forward lookups match known facility addresses exactly, then fall back
+    to the centroid of a district named in the address. Reverse lookups
+    name the containing district and any facility within 100 m.
+    """
+
+    name = 'local'
+
+    def __init__(self):
+        self._facilities = None
+        self._districts = None
+
+    def _load(self):
+        if self._facilities is not None:
+            return
+
+        self._facilities = {}
+        self._facility_list = list(PublicFacility.objects.filter(is_active=True).only(
+            'name', 'address', 'latitude', 'longitude'
+        ))
+        for facility in self._facility_list:
+            self._facilities.setdefault(normalize_address(facility.address), facility)
+        self._facility_lats = np.array([float(f.latitude) for f in self._facility_list])
+        self._facility_lngs = np.array([float(f.longitude) for f in self._facility_list])
+
+        self._districts = []
+        for district in District.objects.filter(is_active=True).only('name', 'code', 'boundary_coordinates'):
+            ring = np.asarray(district.boundary_coordinates or [], dtype=np.float64)
+            if ring.ndim != 2 or len(ring) < 3:
+                continue
+            self._districts.append({
+                'name': district.name,
+                'key': normalize_address(district.name),
+                'code': district.code.lower(),
+                'ring': ring,
+                'bounds': (ring[:, 0].min(), ring[:, 0].max(), ring[:, 1].min(), ring[:, 1].max()),
+                'centroid': (float(ring[:, 0].mean()), float(ring[:, 1].mean())),
+            })
+
+    def geocode(self, address):
+        self._load()
+        key = normalize_address(address)
+
+        facility = self._facilities.get(key)
+        if facility:
+            return {
+                'latitude': float(facility.latitude),
+                'longitude': float(facility.longitude),
+                'address': facility.address,
+            }
+
+        words = set(key.split())
+        for district in self._districts:
+            if (district['key'] and f" {district['key']} " in f' {key} ') or district['code'] in words:
+                latitude, longitude = district['centroid']
+                return {'latitude': latitude, 'longitude': longitude, 'address': district['name']}
+
+        return None
+
+    def reverse(self, latitude, longitude):
+        self._load()
+        latitude, longitude = float(latitude), float(longitude)
+
+        district_name = None
+        for district in self._districts:
+            south, north, west, east = district['bounds']
+            if south <= latitude <= north and west <= longitude <= east:
+                if point_in_ring(latitude, longitude, district['ring']):
+                    district_name = district['name']
+                    break
+
+        nearby = None
+        if self._facility_list:
+            distances = haversine_km(latitude, longitude, self._facility_lats, self._facility_lngs)
+            closest = int(distances.argmin())
+            if distances[closest] <= NEARBY_FACILITY_KM:
+                nearby = self._facility_list[closest]
+
+        if not district_name and not nearby:
+            return None
+
+        parts = []
+        if nearby:
+            parts.append(f'Near {nearby.name}, {nearby.address}')
+        if district_name:
+            parts.append(district_name)
+        return {'latitude': latitude, 'longitude': longitude, 'address': ', '.join(parts)}
+
+
+class NominatimProvider(GeocodingProvider):
+    """Online provider using OpenStreetMap Nominatim via geopy"""
+
+    name = 'nominatim'
+
+    def __init__(self):
+        self.client = Nominatim(
+            user_agent=getattr(settings, 'GEOCODING_USER_AGENT', 'civic-platform'),
+            timeout=getattr(settings, 'GEOCODING_TIMEOUT', 5),
+        )
+
+    def _result(self, location):
+        if location is None:
+            return None
+        return {'latitude': location.latitude, 'longitude': location.longitude, 'address': location.address}
+
+    def geocode(self, address):
+        return self._result(self.client.geocode(address))
+
+    def reverse(self, latitude, longitude):
+        return self._result(self.client.reverse((latitude, longitude)))
+
+
+class Geocoder:
+    """Cached geocoding front end"""
+
+    def __init__(self, provider=None):
+        if provider is None:
+            provider = import_string(getattr(settings, 'GEOCODING_PROVIDER', 'maps.geocoding.LocalProvider'))()
+        self.provider = provider
+        self.lookups = 0
+        self.cache_hits = 0
+
+    def _lookup(self, kind, query):
+        self.lookups += 1
+        if kind == 'forward':
+            return self.provider.geocode(query)
+        return self.provider.reverse(*query)
+
+    def _resolve(self, kind, queries):
+        """Resolve {cache_key: query} pairs, calling the provider only for cache misses"""
+        keys = list(queries)
+        cached = {}
+        for start in range(0, len(keys), CACHE_QUERY_BATCH):
+            for entry in GeocodeCache.objects.filter(kind=kind, query_key__in=keys[start:start + CACHE_QUERY_BATCH]):
+                cached[entry.query_key] = entry
+        self.cache_hits += len(cached)
+
+        new_entries = []
+        for key, query in queries.items():
+            if key in cached:
+                continue
+            try:
+                result = self._lookup(kind, query)
+            except Exception as e:
+                # Provider failures are not cached so the query is retried next time
+                logger.error(f"Geocoding provider {self.provider.name} failed for {query!r}: {str(e)}")
+                continue
+            entry = GeocodeCache(kind=kind, query_key=key, provider=self.provider.name, found=result is not None)
+            if result:
+                entry.latitude = Decimal(f"{result['latitude']:.6f}")
+                entry.longitude = Decimal(f"{result['longitude']:.6f}")
+                entry.address = (result.get('address') or '')[:500]
+            new_entries.append(entry)
+            cached[key] = entry
+
+        GeocodeCache.objects.bulk_create(new_entries, ignore_conflicts=True)
+        return cached
+
+    def geocode_many(self, addresses):
+        """
+        Geocode many addresses with one cache query and one provider call per distinct address
+
+        Returns:
+            dict: original address -> GeocodeCache entry (entries may have found=False);
+            addresses whose lookup failed are omitted
+        """
+        keys = {address: normalize_address(address) for address in addresses if address and address.strip()}
+        resolved = self._resolve('forward', {key: address for address, key in keys.items()})
+        return {address: resolved[key] for address, key in keys.items() if key in resolved}
+
+    def reverse_many(self, points):
+        """
+        Reverse geocode many (latitude, longitude) pairs
+
+        Returns:
+            dict: (latitude, longitude) -> GeocodeCache entry
+        """
+        keys = {point: coordinate_key(*point) for point in points}
+        resolved = self._resolve('reverse', {
+            key: (round(float(point[0]), REVERSE_PRECISION), round(float(point[1]), REVERSE_PRECISION))
+            for point, key in keys.items()
+        })
+        return {point: resolved[key] for point, key in keys.items() if key in resolved}
+
+    def geocode(self, address):
+        entry = self.geocode_many([address]).get(address)
+        return entry if entry and entry.found else None
+
+    def reverse(self, latitude, longitude):
+        entry = self.reverse_many([(latitude, longitude)]).get((latitude, longitude))
+        return entry if entry and entry.found else None
@@ -0,0 +1,104 @@
+"""
+Polygon simplification for map boundaries
+Douglas-Peucker simplification at a fixed set of zoom-keyed tolerances
+"""
+import numpy as np
+
+# (level key, highest zoom served by the level, tolerance in degrees)
+# Tolerances sit just under one screen pixel at the level's highest zoom.
+SIMPLIFICATION_LEVELS = [
+    ('z8', 8, 0.005),
+    ('z11', 11, 0.0005),
+    ('z14', 14, 0.00005),
+]
+
+
+def _douglas_peucker(points, tolerance):
+    """Return a boolean keep-mask for an open polyline (N x 2 array)"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        segment = points[end] - points[start]
+        inner = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            distances = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / length
+
+        farthest = int(distances.argmax())
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return keep
+
+
+def simplify_ring(coordinates, tolerance):
+    """
+    Simplify a polygon ring of [lat, lng] pairs
+
+    The ring is split at the vertex farthest from its first point so both
+    halves are open polylines. Returns None if simplification would leave
+    fewer than three distinct vertices.
+    """
+    points = np.asarray(coordinates, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) < 4:
+        return None
+
+    closed = bool(np.array_equal(points[0], points[-1]))
+    if closed:
+        points = points[:-1]
+
+    # Scale longitude so tolerances are roughly isotropic on the ground
+    scale = np.array([1.0, np.cos(np.radians(points[:, 0].mean()))])
+    scaled = points * scale
+
+    pivot = int(np.hypot(*(scaled - scaled[0]).T).argmax())
+    if pivot == 0:
+        return None
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[:pivot + 1] = _douglas_peucker(scaled[:pivot + 1], tolerance)
+    ring_tail = np.vstack([scaled[pivot:], scaled[:1]])
+    keep[pivot:] |= _douglas_peucker(ring_tail, tolerance)[:-1]
+
+    simplified = points[keep]
+    if len(simplified) < 3:
+        return None
+
+    if closed:
+        simplified = np.vstack([simplified, simplified[:1]])
+    return simplified.round(6).tolist()
+
+
+def simplify_boundary(coordinates):
+    """
+    Precompute simplified rings for every level, keyed by level name
+
+    Rings too small to simplify are stored as-is so every level is always
+    present and readers never need the full-resolution column.
+    """
+    levels = {}
+    for key, _, tolerance in SIMPLIFICATION_LEVELS:
+        simplified = simplify_ring(coordinates, tolerance)
+        levels[key] = simplified if simplified is not None else list(coordinates or [])
+    return levels
+
+
+def level_for_zoom(zoom):
+    """Pick the simplification level for a map zoom, or None for full detail"""
+    if zoom is None:
+        return None
+    for key, max_zoom, _ in SIMPLIFICATION_LEVELS:
+        if zoom <= max_zoom:
+            return key
+    return None
@@ -0,0 +1,208 @@
+"""
+Issue density heatmaps
+Bins issue coordinates into fixed-resolution grids using NumPy
+"""
+from django.db.models import Count, Max
+from issues.models import Issue
+from PIL import Image
+import base64
+import io
+import math
+import threading
+import zlib
+import numpy as np
+
+TILE_SIZE = 256  # Web-mercator tile size in pixels
+MERCATOR_MAX_LAT = 85.05112878  # Latitude limit of the web-mercator square
+MAX_GRID_SIZE = 512
+MIN_GRID_SIZE = 16
+CELL_PIXELS = 4  # Screen pixels covered by one grid cell when sizing from zoom
+
+STATUS_CODES = {value: code for code, (value, label) in enumerate(Issue.STATUS_CHOICES)}
+
+
+class IssuePointIndex:
+    """In-memory columnar copy of issue coordinates used for binning"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self.latitudes = np.empty(0, dtype=np.float32)
+        self.longitudes = np.empty(0, dtype=np.float32)
+        self.statuses = np.empty(0, dtype=np.uint8)
+        self.categories = np.empty(0, dtype=np.int32)
+        self.created = np.empty(0, dtype=np.int64)
+
+    def _current_version(self):
+        """Cheap fingerprint of the issues table; changes on insert, update or delete"""
+        stamp = Issue.objects.aggregate(total=Count('id'), last_update=Max('updated_at'))
+        return (stamp['total'], stamp['last_update'])
+
+    def refresh(self, force=False):
+        """Rebuild the arrays if the issues table has changed since the last load"""
+        version = self._current_version()
+        if not force and version == self._version:
+            return self
+
+        with self._lock:
+            if not force and version == self._version:
+                return self
+
+            rows = Issue.objects.filter(
+                latitude__isnull=False, longitude__isnull=False
+            ).values_list('latitude', 'longitude', 'status', 'category_id', 'created_at')
+
+            count = len(rows)
+            latitudes = np.empty(count, dtype=np.float32)
+            longitudes = np.empty(count, dtype=np.float32)
+            statuses = np.empty(count, dtype=np.uint8)
+            categories = np.empty(count, dtype=np.int32)
+            created = np.empty(count, dtype=np.int64)
+
+            for i, (lat, lng, status, category_id, created_at) in enumerate(rows):
+                latitudes[i] = lat
+                longitudes[i] = lng
+                statuses[i] = STATUS_CODES.get(status, 255)
+                categories[i] = category_id
+                created[i] = int(created_at.timestamp())
+
+            self.latitudes = latitudes
+            self.longitudes = longitudes
+            self.statuses = statuses
+            self.categories = categories
+            self.created = created
+            self._version = version
+
+        return self
+
+    def select(self, statuses=None, categories=None, date_from=None, date_to=None):
+        """Return latitude/longitude arrays of the points matching the filters"""
+        mask = np.ones(len(self.latitudes), dtype=bool)
+
+        if statuses:
+            codes = [STATUS_CODES[s] for s in statuses if s in STATUS_CODES]
+            mask &= np.isin(self.statuses, codes)
+        if categories:
+            mask &= np.isin(self.categories, categories)
+        if date_from is not None:
+            mask &= self.created >= int(date_from.timestamp())
+        if date_to is not None:
+            mask &= self.created <= int(date_to.timestamp())
+
+        return self.latitudes[mask], self.longitudes[mask]
+
+
+def tile_bounds(z, x, y):
+    """Get the geographic bounds of a web-mercator (slippy map) tile"""
+    n = 2 ** z
+
+    def lat_at(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return {
+        'north': lat_at(y),
+        'south': lat_at(y + 1),
+        'west': x / n * 360.0 - 180.0,
+        'east': (x + 1) / n * 360.0 - 180.0,
+    }
+
+
+def grid_size_for_zoom(bounds, zoom, max_size):
+    """Pick a grid width so one cell spans roughly CELL_PIXELS screen pixels at this zoom"""
+    span = max(bounds['east'] - bounds['west'], 1e-9)
+    viewport_pixels = TILE_SIZE * (2 ** zoom) * span / 360.0
+    return int(min(max(viewport_pixels / CELL_PIXELS, MIN_GRID_SIZE), max_size))
+
+
+def mercator_y(latitudes):
+    """Web-mercator Y (unscaled) for latitudes in degrees"""
+    radians = np.radians(np.clip(latitudes, -MERCATOR_MAX_LAT, MERCATOR_MAX_LAT))
+    return np.log(np.tan(np.pi / 4 + radians / 2))
+
+
+def density_grid(latitudes, longitudes, bounds, width, height, mercator=False):
+    """
+    Bin points into a height x width count grid
+
+    Row 0 is the northern edge so the grid can be drawn as an image directly.
+    With mercator=True rows are spaced in web-mercator Y, matching map tiles.
+    """
+    south, north = bounds['south'], bounds['north']
+    if mercator:
+        latitudes = mercator_y(np.asarray(latitudes, dtype=np.float64))
+        south, north = mercator_y(np.array([south, north]))
+    counts, _, _ = np.histogram2d(
+        latitudes,
+        longitudes,
+        bins=[height, width],
+        range=[[south, north], [bounds['west'], bounds['east']]],
+    )
+    return np.flipud(counts).astype(np.float32)
+
+
+def gaussian_smooth(grid, sigma):
+    """
+    Separable Gaussian blur; sigma is measured in grid cells
+
+    Edges are zero-padded and convolved in 'valid' mode, so the result keeps
+    the grid's shape however wide the kernel is. Taps reaching past the far
+    edge would only meet padding, so the radius is capped at the grid size.
+    """
+    if sigma <= 0:
+        return grid
+
+    radius = min(max(1, int(math.ceil(3 * sigma))), max(grid.shape))
+    offsets = np.arange(-radius, radius + 1, dtype=np.float32)
+    kernel = np.exp(-(offsets ** 2) / (2 * sigma ** 2))
+    kernel /= kernel.sum()
+
+    smoothed = np.pad(grid, ((radius, radius), (0, 0)))
+    smoothed = np.apply_along_axis(np.convolve, 0, smoothed, kernel, mode='valid')
+    smoothed = np.pad(smoothed, ((0, 0), (radius, radius)))
+    smoothed = np.apply_along_axis(np.convolve, 1, smoothed, kernel, mode='valid')
+    return smoothed.astype(np.float32)
+
+
+def quantize(grid):
+    """Scale a density grid to 0-255 intensities"""
+    peak = float(grid.max()) if grid.size else 0.0
+    if peak <= 0:
+        return np.zeros(grid.shape, dtype=np.uint8)
+    return np.clip(np.rint(grid / peak * 255), 0, 255).astype(np.uint8)
+
+
+def encode_grid(intensities):
+    """Compact transport form: zlib-compressed uint8 rows, base64 encoded"""
+    return base64.b64encode(zlib.compress(intensities.tobytes(), 6)).decode('ascii')
+
+
+def _heat_palette():
+    """256-entry RGBA colour ramp: transparent -> blue -> green -> yellow -> red"""
+    stops = np.array([
+        [0, 0, 0, 0, 0],
+        [1, 59, 130, 246, 90],
+        [96, 16, 185, 129, 150],
+        [176, 245, 158, 11, 200],
+        [255, 239, 68, 68, 230],
+    ], dtype=np.float32)
+    levels = np.arange(256)
+    palette = np.stack(
+        [np.interp(levels, stops[:, 0], stops[:, channel]) for channel in range(1, 5)],
+        axis=1,
+    )
+    return np.rint(palette).astype(np.uint8)
+
+
+HEAT_PALETTE = _heat_palette()
+
+
+def encode_png(intensities):
+    """Render intensities as a colour-mapped RGBA PNG"""
+    rgba = HEAT_PALETTE[intensities]
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, 'RGBA').save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+# Create a singleton instance
+issue_point_index = IssuePointIndex()
@@ -0,0 +1,127 @@
+"""
+Map layer catalogue and per-layer query planning
+Decides which layers a map request can see and how much of each to send
+"""
+from django.conf import settings
+from .models import MapLayer
+import threading
+import time
+import numpy as np
+
+CATALOGUE_TTL = 60  # Seconds before another process's MapLayer edits are picked up
+FEATURE_LIMIT = getattr(settings, 'MAP_LAYER_FEATURE_LIMIT', 2000)
+TILE_SIZE = 256
+
+
+class LayerCatalogue:
+    """
+    In-process copy of the active MapLayer rows
+
+    Refreshed after CATALOGUE_TTL seconds, or immediately when a MapLayer is
+    saved or deleted in this process (see maps.signals).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._layers = None
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        self._layers = None
+
+    def all(self):
+        layers = self._layers
+        if layers is None or time.monotonic() - self._loaded_at > CATALOGUE_TTL:
+            with self._lock:
+                layers = list(MapLayer.objects.filter(is_active=True))
+                self._layers = layers
+                self._loaded_at = time.monotonic()
+        return layers
+
+    def visible_layers(self, is_official):
+        """MapLayer rows the viewer may see"""
+        return [layer for layer in self.all() if is_official or layer.is_public]
+
+    def plan(self, layer_types, zoom=None, is_official=False, explicit=True):
+        """
+        Filter requested layer types down to the ones worth querying
+
+        A type with no configured MapLayer is always served. A configured
+        type is served if one of its layers is visible to the viewer, covers
+        the zoom (when given) and, for implicit requests, is default-visible.
+        """
+        configured = {}
+        for layer in self.visible_layers(is_official):
+            configured.setdefault(layer.layer_type, []).append(layer)
+
+        planned = []
+        for layer_type in layer_types:
+            candidates = configured.get(layer_type)
+            if candidates is None:
+                if not any(layer.layer_type == layer_type for layer in self.all()):
+                    planned.append(layer_type)
+                continue
+            if zoom is not None:
+                candidates = [l for l in candidates if l.min_zoom <= zoom <= l.max_zoom]
+            if not explicit:
+                candidates = [l for l in candidates if l.default_visible]
+            if candidates:
+                planned.append(layer_type)
+        return planned
+
+
+def cluster_cell_degrees(filters):
+    """Grid cell size for cluster fallbacks, from zoom or the requested bounds"""
+    distance = filters.get('cluster_distance', 50)
+    if filters.get('zoom') is not None:
+        return distance * 360.0 / (TILE_SIZE * 2 ** filters['zoom'])
+    if all(k in filters for k in ['north', 'south', 'east', 'west']):
+        # Assume a ~1024px wide viewport over the requested bounds
+        return max(filters['east'] - filters['west'], 1e-6) * distance / 1024
+    return None
+
+
+def cluster_points(latitudes, longitudes, cell_degrees=None, max_clusters=None):
+    """
+    Grid-cluster points into count-weighted centroids
+
+    Without a cell size the data extent is split into a 32 x 32 grid. With
+    max_clusters the cell size is doubled until the clusters fit.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    if not len(latitudes):
+        return []
+
+    span = max(np.ptp(latitudes), np.ptp(longitudes), 1e-6)
+    if not cell_degrees:
+        cell_degrees = span / 32
+
+    while True:
+        rows = np.floor(latitudes / cell_degrees).astype(np.int64)
+        cols = np.floor(longitudes / cell_degrees).astype(np.int64)
+        _, inverse, counts = np.unique(
+            rows * (1 << 32) + (cols & 0xFFFFFFFF), return_inverse=True, return_counts=True
+        )
+        # A cell wider than the data holds it in at most four clusters
+        if max_clusters is None or len(counts) <= max_clusters or cell_degrees > 2 * span:
+            break
+        cell_degrees *= 2
+    lat_sums = np.bincount(inverse, weights=latitudes)
+    lng_sums = np.bincount(inverse, weights=longitudes)
+
+    clusters = [
+        {
+            'latitude': round(float(lat_sum / count), 6),
+            'longitude': round(float(lng_sum / count), 6),
+            'count': int(count),
+        }
+        for lat_sum, lng_sum, count in zip(lat_sums, lng_sums, counts)
+    ]
+    if max_clusters is not None and len(clusters) > max_clusters:
+        clusters = sorted(clusters, key=lambda cluster: -cluster['count'])[:max_clusters]
+    return clusters
+
+
+# Create a singleton instance
+layer_catalogue = LayerCatalogue()
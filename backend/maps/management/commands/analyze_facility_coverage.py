@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from maps.coverage import run_coverage_analysis, DEFAULT_FACILITY_TYPES, DEFAULT_RADII_KM
+
+
+class Command(BaseCommand):
+    help = 'Compute which open issues and districts fall outside facility service radii'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--facility-type',
+            action='append',
+            dest='facility_types',
+            help=f"Facility type to analyse (repeatable, default: {', '.join(DEFAULT_FACILITY_TYPES)})"
+        )
+        parser.add_argument(
+            '--radius',
+            action='append',
+            type=float,
+            dest='radii',
+            help=f"Service radius in km (repeatable, default: {', '.join(str(r) for r in DEFAULT_RADII_KM)})"
+        )
+
+    def handle(self, *args, **options):
+        if any(radius <= 0 for radius in options['radii'] or []):
+            raise CommandError('--radius must be greater than 0')
+
+        results = run_coverage_analysis(options['facility_types'], options['radii'])
+
+        for result in results:
+            self.stdout.write(
+                f"{result.facility_type:<20} {result.radius_km:>6.1f} km  "
+                f"issues uncovered {result.uncovered_issue_count}/{result.issue_count}  "
+                f"districts uncovered {result.uncovered_district_count}/{result.district_count}  "
+                f"({result.duration_ms} ms)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Stored {len(results)} coverage results'))
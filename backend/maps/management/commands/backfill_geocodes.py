@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from issues.models import Issue
+from events.models import Event
+from maps.geocoding import Geocoder
+
+
+class Command(BaseCommand):
+    help = 'Fill in missing coordinates and addresses on issues and events using the geocode cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=['issues', 'events', 'all'],
+            default='all',
+            help='Which records to backfill'
+        )
+        parser.add_argument('--limit', type=int, default=None, help='Maximum records per model and direction')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without saving')
+
+    def handle(self, *args, **options):
+        geocoder = Geocoder()
+        models = {'issues': Issue, 'events': Event}
+        selected = models if options['model'] == 'all' else {options['model']: models[options['model']]}
+
+        for label, model in selected.items():
+            updated_coordinates = self.fill_coordinates(geocoder, model, options)
+            updated_addresses = self.fill_addresses(geocoder, model, options)
+            self.stdout.write(
+                f'{label}: {updated_coordinates} coordinates and {updated_addresses} addresses filled'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {geocoder.lookups} provider lookups, {geocoder.cache_hits} cache hits '
+            f'(provider: {geocoder.provider.name})'
+        ))
+
+    def fill_coordinates(self, geocoder, model, options):
+        """Forward geocode records that have an address but no coordinates"""
+        queryset = model.objects.filter(
+            Q(latitude__isnull=True) | Q(longitude__isnull=True)
+        ).exclude(address='')
+        if model is Event:
+            queryset = queryset.filter(is_online=False)
+        records = list(queryset.only('id', 'address')[:options['limit']])
+
+        # One lookup per distinct address, however many records share it
+        results = geocoder.geocode_many({record.address for record in records})
+
+        changed = []
+        for record in records:
+            entry = results.get(record.address)
+            if entry and entry.found:
+                record.latitude = entry.latitude
+                record.longitude = entry.longitude
+                changed.append(record)
+
+        if changed and not options['dry_run']:
+            # bulk_update skips auto_now; delta sync and layer fingerprints key on updated_at
+            now = timezone.now()
+            for record in changed:
+                record.updated_at = now
+            model.objects.bulk_update(changed, ['latitude', 'longitude', 'updated_at'], batch_size=500)
+        return len(changed)
+
+    def fill_addresses(self, geocoder, model, options):
+        """Reverse geocode records that have coordinates but no address"""
+        records = list(model.objects.filter(
+            address='', latitude__isnull=False, longitude__isnull=False
+        ).only('id', 'latitude', 'longitude')[:options['limit']])
+
+        results = geocoder.reverse_many({(record.latitude, record.longitude) for record in records})
+
+        changed = []
+        for record in records:
+            entry = results.get((record.latitude, record.longitude))
+            if entry and entry.found and entry.address:
+                record.address = entry.address
+                changed.append(record)
+
+        if changed and not options['dry_run']:
+            now = timezone.now()
+            for record in changed:
+                record.updated_at = now
+            model.objects.bulk_update(changed, ['address', 'updated_at'], batch_size=500)
+        return len(changed)
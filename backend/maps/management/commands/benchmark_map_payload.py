@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from accounts.models import User
+from issues.models import Issue, IssueCategory
+from maps import binary_format
+from maps.serializers import IssueMapSerializer
+from decimal import Decimal
+import gzip
+import random
+import time
+import uuid
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON and binary map payload size and encode time on synthetic issues'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=100000, help='Number of synthetic issues')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        count = options['points']
+        rng = random.Random(options['seed'])
+
+        # Unsaved instances: nothing touches the database
+        reporter = User(first_name='Test', last_name='Reporter', email='bench@example.com')
+        categories = [
+            IssueCategory(id=i, name=f'Category {i}', color='#3B82F6', icon='alert-triangle')
+            for i in range(1, 9)
+        ]
+        now = timezone.now()
+        issues = []
+        for i in range(count):
+            issues.append(Issue(
+                id=uuid.UUID(int=rng.getrandbits(128)),
+                title=f'Issue {i}',
+                description='Reported problem that needs attention from the city.',
+                category=rng.choice(categories),
+                priority=rng.choice(['low', 'medium', 'high', 'critical']),
+                status=rng.choice(['open', 'in_progress', 'resolved', 'closed']),
+                latitude=Decimal(f'{19.0 + rng.gauss(0, 0.08):.6f}'),
+                longitude=Decimal(f'{72.85 + rng.gauss(0, 0.08):.6f}'),
+                address=f'{rng.randint(1, 999)} Main Road',
+                reported_by=reporter,
+                votes=rng.randint(0, 200),
+                views=rng.randint(0, 2000),
+                created_at=now,
+                updated_at=now,
+            ))
+
+        rows = [
+            (issue.id, issue.latitude, issue.longitude, issue.status, issue.priority,
+             issue.category_id, issue.title, issue.votes)
+            for issue in issues
+        ]
+
+        started = time.perf_counter()
+        full_json = JSONRenderer().render(IssueMapSerializer(issues, many=True).data)
+        full_json_time = time.perf_counter() - started
+
+        fields = binary_format.layer_fields('issues')
+        started = time.perf_counter()
+        trimmed_json = JSONRenderer().render([dict(zip(fields, row)) for row in rows])
+        trimmed_json_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        binary = binary_format.encode_payload([binary_format.encode_rows('issues', rows)])
+        binary_time = time.perf_counter() - started
+
+        self.stdout.write(f'{count} issues')
+        self.stdout.write(f"{'format':<22}{'bytes':>12}{'gzip bytes':>14}{'encode ms':>12}")
+        for label, payload, elapsed in [
+            ('JSON (IssueMap)', full_json, full_json_time),
+            ('JSON (same columns)', trimmed_json, trimmed_json_time),
+            ('binary', binary, binary_time),
+        ]:
+            self.stdout.write(
+                f'{label:<22}{len(payload):>12,}{len(gzip.compress(payload)):>14,}{elapsed * 1000:>12.1f}'
+            )
+
+        # Round trip through the reference decoder
+        decoded = binary_format.decode_payload(binary)['layers']['issues']
+        expected = {
+            row[0]: (round(float(row[1]), 6), round(float(row[2]), 6), row[3], row[4], row[5], row[6], row[7])
+            for row in rows
+        }
+        actual = {
+            issue_id: (round(location[0], 6), round(location[1], 6), *values)
+            for issue_id, location, *values in zip(
+                decoded['id'], decoded['location'], decoded['status'], decoded['priority'],
+                decoded['category_id'], decoded['title'], decoded['votes']
+            )
+        }
+        if actual != expected:
+            raise CommandError('Binary payload did not decode back to the encoded rows')
+        self.stdout.write(self.style.SUCCESS('Binary payload round-trips through decode_payload'))
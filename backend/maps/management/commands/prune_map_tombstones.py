@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from maps.sync import prune_tombstones, TOMBSTONE_RETENTION
+
+
+class Command(BaseCommand):
+    help = 'Delete map delta-sync tombstones older than the retention window'
+
+    def handle(self, *args, **options):
+        removed = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} tombstones older than {TOMBSTONE_RETENTION.days} days'
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:36
+
+from django.db import migrations, models
+from maps.geometry import simplify_boundary
+
+
+def simplify_existing_boundaries(apps, schema_editor):
+    District = apps.get_model('maps', 'District')
+    for district in District.objects.all().iterator():
+        district.simplified_boundaries = simplify_boundary(district.boundary_coordinates)
+        district.save(update_fields=['simplified_boundaries'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='district',
+            name='simplified_boundaries',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Boundary simplified per zoom level, precomputed on save'),
+        ),
+        migrations.RunPython(simplify_existing_boundaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0002_district_simplified_boundaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('layer_type', models.CharField(choices=[('issues', 'Issues'), ('events', 'Events'), ('projects', 'Projects'), ('facilities', 'Public Facilities'), ('districts', 'Districts'), ('custom', 'Custom')], max_length=50)),
+                ('object_id', models.CharField(max_length=64)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Map Tombstone',
+                'verbose_name_plural': 'Map Tombstones',
+                'db_table': 'map_tombstones',
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='district',
+            index=models.Index(fields=['updated_at'], name='districts_updated_d7dd29_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publicfacility',
+            index=models.Index(fields=['updated_at'], name='public_faci_updated_12a4b5_idx'),
+        ),
+    ]
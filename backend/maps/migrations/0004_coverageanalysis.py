@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0003_maptombstone_district_districts_updated_d7dd29_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoverageAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facility_type', models.CharField(choices=[('hospital', 'Hospital'), ('school', 'School'), ('library', 'Library'), ('park', 'Park'), ('police_station', 'Police Station'), ('fire_station', 'Fire Station'), ('government_office', 'Government Office'), ('community_center', 'Community Center'), ('public_transport', 'Public Transport'), ('other', 'Other')], max_length=50)),
+                ('radius_km', models.FloatField()),
+                ('facility_count', models.PositiveIntegerField(default=0)),
+                ('issue_count', models.PositiveIntegerField(default=0)),
+                ('uncovered_issue_count', models.PositiveIntegerField(default=0)),
+                ('uncovered_issue_ids', models.JSONField(blank=True, default=list)),
+                ('district_count', models.PositiveIntegerField(default=0)),
+                ('uncovered_district_count', models.PositiveIntegerField(default=0)),
+                ('uncovered_district_ids', models.JSONField(blank=True, default=list)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Coverage Analysis',
+                'verbose_name_plural': 'Coverage Analyses',
+                'db_table': 'coverage_analyses',
+                'ordering': ['-computed_at'],
+                'indexes': [models.Index(fields=['facility_type', 'radius_km', '-computed_at'], name='coverage_an_facilit_814372_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0004_coverageanalysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('forward', 'Address to coordinates'), ('reverse', 'Coordinates to address')], max_length=10)),
+                ('query_key', models.CharField(help_text="Normalized address or rounded 'lat,lng'", max_length=255)),
+                ('provider', models.CharField(max_length=50)),
+                ('found', models.BooleanField(default=True)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('address', models.CharField(blank=True, max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Geocode Cache Entry',
+                'verbose_name_plural': 'Geocode Cache',
+                'db_table': 'geocode_cache',
+                'unique_together': {('kind', 'query_key')},
+            },
+        ),
+    ]
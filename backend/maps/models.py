@@ -1,4 +1,5 @@
 from django.db import models
+from .geometry import simplify_boundary, level_for_zoom
 
 
 class MapLayer(models.Model):
@@ -92,6 +93,9 @@ class PublicFacility(models.Model):
         verbose_name = 'Public Facility'
         verbose_name_plural = 'Public Facilities'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return self.name
@@ -123,6 +127,12 @@ class District(models.Model):
     # Simplified boundary representation (for SQLite compatibility)
     # Store as JSON with coordinate pairs for polygon boundary
     boundary_coordinates = models.JSONField(default=list, blank=True, help_text="Array of [lat, lng] coordinate pairs defining the boundary")
+    simplified_boundaries = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Boundary simplified per zoom level, precomputed on save"
+    )
     
     # Demographics
     population = models.PositiveIntegerField(null=True, blank=True)
@@ -144,12 +154,117 @@ class District(models.Model):
         verbose_name = 'District'
         verbose_name_plural = 'Districts'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        # Precompute zoom-level geometry whenever the boundary is written
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'boundary_coordinates' in update_fields:
+            self.simplified_boundaries = simplify_boundary(self.boundary_coordinates)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'simplified_boundaries'}
+        
+        super().save(*args, **kwargs)
+    
+    def boundary_for_zoom(self, zoom):
+        """Get the boundary at the level of detail appropriate for a map zoom"""
+        level = level_for_zoom(zoom)
+        if level and level in self.simplified_boundaries:
+            return self.simplified_boundaries[level]
+        return self.boundary_coordinates
+    
     @property
     def population_density(self):
         if self.population and self.area_sq_km:
             return round(self.population / self.area_sq_km, 2)
         return None
+
+
+class MapTombstone(models.Model):
+    """Record of a deleted map feature, used by delta sync clients"""
+    
+    layer_type = models.CharField(max_length=50, choices=MapLayer.LAYER_TYPES)
+    object_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'map_tombstones'
+        verbose_name = 'Map Tombstone'
+        verbose_name_plural = 'Map Tombstones'
+        ordering = ['deleted_at']
+    
+    def __str__(self):
+        return f"{self.layer_type}:{self.object_id} deleted"
+
+
+class CoverageAnalysis(models.Model):
+    """Stored result of a facility service-area coverage run"""
+    
+    facility_type = models.CharField(max_length=50, choices=PublicFacility.FACILITY_TYPES)
+    radius_km = models.FloatField()
+    facility_count = models.PositiveIntegerField(default=0)
+    
+    # Open issues outside the radius of every facility of this type (IDs capped, count exact)
+    issue_count = models.PositiveIntegerField(default=0)
+    uncovered_issue_count = models.PositiveIntegerField(default=0)
+    uncovered_issue_ids = models.JSONField(default=list, blank=True)
+    
+    # Districts whose centroid is outside the radius
+    district_count = models.PositiveIntegerField(default=0)
+    uncovered_district_count = models.PositiveIntegerField(default=0)
+    uncovered_district_ids = models.JSONField(default=list, blank=True)
+    
+    duration_ms = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'coverage_analyses'
+        verbose_name = 'Coverage Analysis'
+        verbose_name_plural = 'Coverage Analyses'
+        ordering = ['-computed_at']
+        indexes = [
+            models.Index(fields=['facility_type', 'radius_km', '-computed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_facility_type_display()} within {self.radius_km} km"
+    
+    @property
+    def issue_coverage_percent(self):
+        if self.issue_count:
+            return round(100 * (self.issue_count - self.uncovered_issue_count) / self.issue_count, 1)
+        return None
+
+
+class GeocodeCache(models.Model):
+    """Cached geocoding answers, including negative ones"""
+    
+    KIND_CHOICES = [
+        ('forward', 'Address to coordinates'),
+        ('reverse', 'Coordinates to address'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    query_key = models.CharField(max_length=255, help_text="Normalized address or rounded 'lat,lng'")
+    provider = models.CharField(max_length=50)
+    found = models.BooleanField(default=True)
+    
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    address = models.CharField(max_length=500, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'geocode_cache'
+        verbose_name = 'Geocode Cache Entry'
+        verbose_name_plural = 'Geocode Cache'
+        unique_together = ['kind', 'query_key']
+    
+    def __str__(self):
+        return f"{self.kind}: {self.query_key}"
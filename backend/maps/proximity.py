@@ -0,0 +1,160 @@
+"""
+Facility proximity queries
+Vectorised great-circle k-nearest-neighbour search over an in-memory facility index
+"""
+from django.db.models import Count, Max
+from .models import PublicFacility
+import threading
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+BATCH_CHUNK = 4096  # Issues per distance-matrix chunk in batch mode
+
+
+def haversine_km(lat, lng, latitudes, longitudes):
+    """
+    Distance in kilometres from one or more points to arrays of points
+
+    Inputs are in degrees and broadcast with NumPy rules, so a column of
+    query points against a row of facilities yields a distance matrix.
+    """
+    lat1 = np.radians(lat)
+    lng1 = np.radians(lng)
+    lat2 = np.radians(latitudes)
+    lng2 = np.radians(longitudes)
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def unit_vectors(latitudes, longitudes):
+    """Convert degree coordinates to 3D unit vectors on the sphere (N x 3)"""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lng = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)], axis=-1)
+
+
+def dot_to_km(dots):
+    """
+    Great-circle distance from unit-vector dot products
+
+    Equivalent to haversine down to roughly a metre; used where ranking by a
+    matrix product is what makes the search fast.
+    """
+    chord = np.sqrt(np.clip(2.0 - 2.0 * dots, 0.0, 4.0))
+    return 2 * EARTH_RADIUS_KM * np.arcsin(chord / 2)
+
+
+class FacilityIndex:
+    """In-memory arrays of active facility coordinates and attributes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self.ids = np.empty(0, dtype=np.int64)
+        self.latitudes = np.empty(0, dtype=np.float64)
+        self.longitudes = np.empty(0, dtype=np.float64)
+        self.vectors = np.empty((0, 3), dtype=np.float64)
+        self.types = np.empty(0, dtype=object)
+        self.accessible = np.empty(0, dtype=bool)
+        self.public = np.empty(0, dtype=bool)
+
+    def _current_version(self):
+        """Cheap fingerprint of the facilities table; changes on insert, update or delete"""
+        stamp = PublicFacility.objects.aggregate(total=Count('id'), last_update=Max('updated_at'))
+        return (stamp['total'], stamp['last_update'])
+
+    def refresh(self, force=False):
+        """Rebuild the arrays if the facilities table has changed since the last load"""
+        version = self._current_version()
+        if not force and version == self._version:
+            return self
+
+        with self._lock:
+            if not force and version == self._version:
+                return self
+
+            rows = list(PublicFacility.objects.filter(is_active=True).values_list(
+                'id', 'latitude', 'longitude', 'facility_type', 'is_accessible', 'is_public'
+            ))
+
+            self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+            self.latitudes = np.array([float(r[1]) for r in rows], dtype=np.float64)
+            self.longitudes = np.array([float(r[2]) for r in rows], dtype=np.float64)
+            self.vectors = unit_vectors(self.latitudes, self.longitudes).reshape(-1, 3)
+            self.types = np.array([r[3] for r in rows], dtype=object)
+            self.accessible = np.array([r[4] for r in rows], dtype=bool)
+            self.public = np.array([r[5] for r in rows], dtype=bool)
+            self._version = version
+
+        return self
+
+    def mask(self, facility_types=None, accessible_only=False, public_only=True):
+        """Boolean mask of facilities matching the filters"""
+        mask = np.ones(len(self.ids), dtype=bool)
+        if facility_types:
+            mask &= np.isin(self.types, list(facility_types))
+        if accessible_only:
+            mask &= self.accessible
+        if public_only:
+            mask &= self.public
+        return mask
+
+    def nearest(self, lat, lng, k=5, max_distance_km=None, **filters):
+        """
+        Find the k nearest facilities to a point
+
+        Returns:
+            list: (facility_id, distance_km) tuples ordered by distance
+        """
+        mask = self.mask(**filters)
+        ids = self.ids[mask]
+        if not len(ids):
+            return []
+
+        distances = haversine_km(lat, lng, self.latitudes[mask], self.longitudes[mask])
+        k = min(k, len(ids))
+        candidates = np.argpartition(distances, k - 1)[:k]
+        candidates = candidates[np.argsort(distances[candidates])]
+
+        results = [(int(ids[i]), float(distances[i])) for i in candidates]
+        if max_distance_km is not None:
+            results = [r for r in results if r[1] <= max_distance_km]
+        return results
+
+    def nearest_to_points(self, latitudes, longitudes, **filters):
+        """
+        Find the single nearest facility for many points at once
+
+        Returns:
+            tuple: (facility_ids, distances_km) arrays aligned with the inputs;
+            ids are -1 and distances NaN when no facility matches the filters
+        """
+        nearest_ids = np.full(len(latitudes), -1, dtype=np.int64)
+        nearest_distances = np.full(len(latitudes), np.nan, dtype=np.float64)
+
+        mask = self.mask(**filters)
+        ids = self.ids[mask]
+        if not len(ids) or not len(latitudes):
+            return nearest_ids, nearest_distances
+
+        points = unit_vectors(latitudes, longitudes).reshape(-1, 3)
+        facilities = self.vectors[mask].T
+
+        # Nearest on the sphere is the largest dot product, so each chunk is one BLAS call
+        for start in range(0, len(points), BATCH_CHUNK):
+            stop = start + BATCH_CHUNK
+            dots = points[start:stop] @ facilities
+            best = dots.argmax(axis=1)
+            nearest_ids[start:stop] = ids[best]
+            nearest_distances[start:stop] = dot_to_km(dots[np.arange(len(best)), best])
+
+        return nearest_ids, nearest_distances
+
+
+# Create a singleton instance
+facility_index = FacilityIndex()
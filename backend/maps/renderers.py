@@ -0,0 +1,41 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from .binary_format import MEDIA_TYPE
+
+
+def render_json_fallback(data, accepted_media_type=None, renderer_context=None):
+    """
+    Render errors raised before a binary payload is built as JSON, with a
+    matching Content-Type
+    """
+    response = (renderer_context or {}).get('response')
+    if response is not None:
+        response['Content-Type'] = JSONRenderer.media_type
+    return JSONRenderer().render(data, accepted_media_type, renderer_context)
+
+
+class PNGRenderer(BaseRenderer):
+    """Passes pre-encoded PNG bytes straight through"""
+    
+    media_type = 'image/png'
+    format = 'png'
+    charset = None
+    render_style = 'binary'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, bytearray)):
+            return data
+        return render_json_fallback(data, accepted_media_type, renderer_context)
+
+
+class MapBinaryRenderer(BaseRenderer):
+    """Compact binary map payloads (see maps.binary_format)"""
+    
+    media_type = MEDIA_TYPE
+    format = 'cmap'
+    charset = None
+    render_style = 'binary'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, bytearray)):
+            return data
+        return render_json_fallback(data, accepted_media_type, renderer_context)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import MapLayer, PublicFacility, District
+from .models import MapLayer, PublicFacility, District, CoverageAnalysis
+from .sync import decode_cursor
 from issues.models import Issue, IssueCategory
 from events.models import Event, EventCategory
 from accounts.models import User
@@ -49,6 +50,15 @@ class DistrictSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'population_density', 'created_at', 'updated_at']
 
 
+class DistrictMapSerializer(DistrictSerializer):
+    """District serializer for map views; boundary detail follows the map zoom"""
+    
+    boundary_coordinates = serializers.SerializerMethodField()
+    
+    def get_boundary_coordinates(self, obj):
+        return obj.boundary_for_zoom(self.context.get('zoom'))
+
+
 class IssueMapSerializer(serializers.ModelSerializer):
     """Simplified serializer for issues on maps"""
     
@@ -118,6 +128,9 @@ class MapFilterSerializer(serializers.Serializer):
     east = serializers.FloatField(required=False)
     west = serializers.FloatField(required=False)
     
+    # Current map zoom; selects district boundary detail
+    zoom = serializers.IntegerField(required=False, min_value=0, max_value=22)
+    
     # Layer filters
     layers = serializers.ListField(
         child=serializers.CharField(),
@@ -170,3 +183,115 @@ class MapFilterSerializer(serializers.Serializer):
     # Clustering
     enable_clustering = serializers.BooleanField(default=True)
     cluster_distance = serializers.IntegerField(default=50, min_value=10, max_value=200)
+    
+    # Delta sync cursor from a previous response
+    since = serializers.CharField(required=False, max_length=32)
+    
+    def validate_since(self, value):
+        try:
+            return decode_cursor(value)
+        except (ValueError, OverflowError, OSError):
+            raise serializers.ValidationError("Invalid sync cursor.")
+
+
+class HeatmapFilterSerializer(serializers.Serializer):
+    """Serializer for issue heatmap parameters"""
+    
+    # Geographic bounds (or a z/x/y tile below)
+    north = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    south = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    east = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    west = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    zoom = serializers.IntegerField(required=False, min_value=0, max_value=22)
+    
+    # Web-mercator tile coordinates
+    x = serializers.IntegerField(required=False, min_value=0)
+    y = serializers.IntegerField(required=False, min_value=0)
+    
+    # Grid
+    size = serializers.IntegerField(default=256, min_value=16, max_value=512)
+    smooth = serializers.FloatField(
+        default=0,
+        min_value=0,
+        max_value=10,
+        help_text="Gaussian smoothing sigma in grid cells (0 disables smoothing)"
+    )
+    
+    # Issue filters
+    issue_status = serializers.ListField(
+        child=serializers.ChoiceField(choices=Issue.STATUS_CHOICES),
+        required=False,
+        help_text="Issue status filters: open, in_progress, resolved, closed"
+    )
+    issue_categories = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        help_text="List of issue category IDs"
+    )
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+    
+    def validate(self, attrs):
+        bounds = [k for k in ['north', 'south', 'east', 'west'] if k in attrs]
+        is_tile = 'x' in attrs or 'y' in attrs
+        
+        if is_tile:
+            if 'x' not in attrs or 'y' not in attrs or 'zoom' not in attrs:
+                raise serializers.ValidationError("Tile requests need zoom, x and y.")
+            limit = 2 ** attrs['zoom']
+            if attrs['x'] >= limit or attrs['y'] >= limit:
+                raise serializers.ValidationError("Tile x/y out of range for this zoom.")
+        elif len(bounds) != 4:
+            raise serializers.ValidationError("Provide north, south, east and west bounds, or a zoom/x/y tile.")
+        elif attrs['north'] <= attrs['south'] or attrs['east'] <= attrs['west']:
+            raise serializers.ValidationError("Bounds must satisfy north > south and east > west.")
+        
+        return attrs
+
+
+class NearestFacilitySerializer(serializers.Serializer):
+    """Serializer for nearest-facility query parameters"""
+    
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    k = serializers.IntegerField(default=5, min_value=1, max_value=50)
+    facility_type = serializers.ListField(
+        child=serializers.ChoiceField(choices=PublicFacility.FACILITY_TYPES),
+        required=False,
+        help_text="List of facility types"
+    )
+    accessible_only = serializers.BooleanField(default=False)
+    max_distance_km = serializers.FloatField(required=False, min_value=0)
+
+
+class NearestFacilityBatchSerializer(serializers.Serializer):
+    """Serializer for annotating issues with their nearest facility"""
+    
+    issue_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        max_length=10000,
+        help_text="List of issue IDs to annotate"
+    )
+    facility_type = serializers.ListField(
+        child=serializers.ChoiceField(choices=PublicFacility.FACILITY_TYPES),
+        required=False,
+        help_text="List of facility types"
+    )
+    accessible_only = serializers.BooleanField(default=False)
+
+
+class CoverageAnalysisSerializer(serializers.ModelSerializer):
+    """Serializer for stored facility coverage results"""
+    
+    facility_type_display = serializers.CharField(source='get_facility_type_display', read_only=True)
+    issue_coverage_percent = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = CoverageAnalysis
+        fields = [
+            'id', 'facility_type', 'facility_type_display', 'radius_km', 'facility_count',
+            'issue_count', 'uncovered_issue_count', 'uncovered_issue_ids',
+            'district_count', 'uncovered_district_count', 'uncovered_district_ids',
+            'issue_coverage_percent', 'duration_ms', 'computed_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,40 @@
+"""
+Signals that record deleted map features for delta sync
+and keep the in-process layer catalogue current
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from issues.models import Issue
+from events.models import Event
+from .models import MapLayer, PublicFacility, District, MapTombstone
+from .layers import layer_catalogue
+
+
+def _record_tombstone(layer_type, instance):
+    MapTombstone.objects.create(layer_type=layer_type, object_id=str(instance.pk))
+
+
+@receiver(post_delete, sender=Issue)
+def tombstone_issue(sender, instance, **kwargs):
+    _record_tombstone('issues', instance)
+
+
+@receiver(post_delete, sender=Event)
+def tombstone_event(sender, instance, **kwargs):
+    _record_tombstone('events', instance)
+
+
+@receiver(post_delete, sender=PublicFacility)
+def tombstone_facility(sender, instance, **kwargs):
+    _record_tombstone('facilities', instance)
+
+
+@receiver(post_delete, sender=District)
+def tombstone_district(sender, instance, **kwargs):
+    _record_tombstone('districts', instance)
+
+
+@receiver(post_save, sender=MapLayer)
+@receiver(post_delete, sender=MapLayer)
+def invalidate_layer_catalogue(sender, instance, **kwargs):
+    layer_catalogue.invalidate()
@@ -0,0 +1,51 @@
+"""
+Delta sync for map clients
+Opaque cursors over updated_at plus a tombstone log for deletions
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.utils import timezone
+from .models import MapTombstone
+
+# Re-read this much before the cursor so rows whose transaction committed
+# after the previous response (with an earlier updated_at) are not missed.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Tombstones older than this are pruned; older cursors get a full resync.
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+
+def encode_cursor(moment):
+    """Encode a timestamp as an opaque cursor string"""
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(value):
+    """Decode a cursor string; raises ValueError if it is malformed"""
+    micros = int(value)
+    if micros < 0:
+        raise ValueError("Negative cursor")
+    return datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc)
+
+
+def is_resumable(since):
+    """Whether the tombstone log still covers everything deleted since the cursor"""
+    return since >= timezone.now() - TOMBSTONE_RETENTION
+
+
+def window_start(since):
+    return since - SYNC_OVERLAP
+
+
+def deleted_ids(layer_type, since):
+    """IDs of features in a layer deleted since the cursor"""
+    return list(MapTombstone.objects.filter(
+        layer_type=layer_type,
+        deleted_at__gt=window_start(since)
+    ).values_list('object_id', flat=True).distinct())
+
+
+def prune_tombstones():
+    """Delete tombstones past the retention window; returns the number removed"""
+    cutoff = timezone.now() - TOMBSTONE_RETENTION
+    deleted, _ = MapTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -1,17 +1,26 @@
 from django.db.models import Q
+from django.db.models.fields.json import KeyTextTransform
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from .models import MapLayer, PublicFacility, District
+from rest_framework.renderers import JSONRenderer
+from .models import MapLayer, PublicFacility, District, CoverageAnalysis
 from .serializers import (
     MapLayerSerializer, PublicFacilitySerializer, DistrictSerializer,
-    IssueMapSerializer, EventMapSerializer, MapDataSerializer, MapFilterSerializer
+    DistrictMapSerializer, IssueMapSerializer, EventMapSerializer, MapDataSerializer, MapFilterSerializer,
+    HeatmapFilterSerializer, NearestFacilitySerializer, NearestFacilityBatchSerializer,
+    CoverageAnalysisSerializer
 )
+from .renderers import PNGRenderer, MapBinaryRenderer
+from .proximity import facility_index, haversine_km
+from .geometry import level_for_zoom
+from .layers import layer_catalogue, cluster_points, cluster_cell_degrees, FEATURE_LIMIT
+from . import binary_format, heatmap, sync
 from issues.models import Issue, IssueCategory
 from events.models import Event, EventCategory
-import math
+import json
 
 
 class MapLayerViewSet(viewsets.ModelViewSet):
@@ -58,6 +67,76 @@ class PublicFacilityViewSet(viewsets.ModelViewSet):
         types = [{'value': choice[0], 'label': choice[1]} 
                 for choice in PublicFacility.FACILITY_TYPES]
         return Response(types)
+    
+    def _is_official(self):
+        return self.request.user.is_authenticated and self.request.user.role in ['official', 'admin']
+    
+    @action(detail=False, methods=['get'])
+    def nearest(self, request):
+        """Get the k nearest facilities to a point"""
+        params = NearestFacilitySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        options = params.validated_data
+        matches = facility_index.refresh().nearest(
+            options['latitude'],
+            options['longitude'],
+            k=options['k'],
+            max_distance_km=options.get('max_distance_km'),
+            facility_types=options.get('facility_type'),
+            accessible_only=options['accessible_only'],
+            public_only=not self._is_official(),
+        )
+        
+        facilities = PublicFacility.objects.in_bulk([facility_id for facility_id, _ in matches])
+        results = []
+        for facility_id, distance in matches:
+            if facility_id in facilities:
+                item = PublicFacilitySerializer(facilities[facility_id]).data
+                item['distance_km'] = round(distance, 3)
+                results.append(item)
+        
+        return Response(results)
+    
+    @action(detail=False, methods=['post'], url_path='nearest-to-issues')
+    def nearest_to_issues(self, request):
+        """Annotate a batch of issues with their nearest facility"""
+        params = NearestFacilityBatchSerializer(data=request.data)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        options = params.validated_data
+        issues = list(Issue.objects.filter(
+            id__in=options['issue_ids'],
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).values_list('id', 'latitude', 'longitude'))
+        
+        index = facility_index.refresh()
+        facility_ids, distances = index.nearest_to_points(
+            [float(lat) for _, lat, _ in issues],
+            [float(lng) for _, _, lng in issues],
+            facility_types=options.get('facility_type'),
+            accessible_only=options['accessible_only'],
+            public_only=not self._is_official(),
+        )
+        
+        names = dict(PublicFacility.objects.filter(
+            id__in=set(int(i) for i in facility_ids if i >= 0)
+        ).values_list('id', 'name'))
+        
+        results = []
+        for (issue_id, _, _), facility_id, distance in zip(issues, facility_ids, distances):
+            found = facility_id >= 0
+            results.append({
+                'issue_id': str(issue_id),
+                'facility_id': int(facility_id) if found else None,
+                'facility_name': names.get(int(facility_id)) if found else None,
+                'distance_km': round(float(distance), 3) if found else None,
+            })
+        
+        return Response(results)
 
 
 class DistrictViewSet(viewsets.ModelViewSet):
@@ -90,7 +169,20 @@ class MapDataViewSet(viewsets.ViewSet):
     
     permission_classes = [IsAuthenticatedOrReadOnly]
     
-    @action(detail=False, methods=['get', 'post'])
+    LAYER_FILTERS = {
+        'issues': '_filter_issues',
+        'events': '_filter_events',
+        'facilities': '_filter_facilities',
+        'districts': '_filter_districts',
+    }
+    LAYER_MODELS = {
+        'issues': Issue,
+        'events': Event,
+        'facilities': PublicFacility,
+        'districts': District,
+    }
+    
+    @action(detail=False, methods=['get', 'post'], renderer_classes=[JSONRenderer, MapBinaryRenderer])
     def data(self, request):
         """Get filtered map data"""
         
@@ -105,39 +197,193 @@ class MapDataViewSet(viewsets.ViewSet):
         
         filters = filter_serializer.validated_data
         
-        # Get requested layers (default to all)
+        # Get requested layers (default to all), dropping any outside their zoom band
         requested_layers = filters.get('layers', ['issues', 'events', 'facilities', 'districts'])
+        requested_layers = [layer for layer in self.LAYER_FILTERS if layer in requested_layers]
+        is_official = request.user.is_authenticated and request.user.role in ['official', 'admin']
+        requested_layers = layer_catalogue.plan(
+            requested_layers,
+            zoom=filters.get('zoom'),
+            is_official=is_official,
+            explicit='layers' in filters
+        )
         
-        data = {}
-        
-        # Get issues
-        if 'issues' in requested_layers:
-            issues_qs = self._filter_issues(filters)
-            data['issues'] = IssueMapSerializer(issues_qs, many=True).data
+        # Taken before querying so changes made during this request are picked up next time
+        cursor = sync.encode_cursor(timezone.now())
+        
+        binary = request.accepted_renderer.format == MapBinaryRenderer.format
+        
+        if 'since' in filters and sync.is_resumable(filters['since']):
+            changes = {layer: self._layer_changes(layer, filters) for layer in requested_layers}
+            
+            if binary:
+                blobs = []
+                for layer, (updated, deleted) in changes.items():
+                    blobs.append(binary_format.encode_rows(layer, self._binary_rows(layer, updated, filters)))
+                    blobs.append(binary_format.encode_id_list(f'{layer}.deleted', deleted))
+                return Response(binary_format.encode_payload(blobs, cursor))
+            
+            return Response({
+                'cursor': cursor,
+                'changes': {
+                    layer: {
+                        'updated': self._serialize_layer(layer, self._deferred(layer, updated, filters), filters),
+                        'deleted': deleted,
+                    }
+                    for layer, (updated, deleted) in changes.items()
+                },
+            })
         
-        # Get events
-        if 'events' in requested_layers:
-            events_qs = self._filter_events(filters)
-            data['events'] = EventMapSerializer(events_qs, many=True).data
+        if binary:
+            blobs = []
+            meta = {}
+            for layer in requested_layers:
+                queryset = getattr(self, self.LAYER_FILTERS[layer])(filters)
+                rows = list(self._binary_rows(layer, queryset[:FEATURE_LIMIT + 1], filters))
+                meta[layer] = {'total': len(rows), 'returned': len(rows), 'truncated': False, 'clustered': False}
+                if len(rows) > FEATURE_LIMIT:
+                    clusters = self._overflow_clusters(layer, queryset, filters)
+                    if clusters is not None:
+                        blobs.append(binary_format.encode_clusters(f'{layer}.clusters', clusters))
+                        rows = []
+                    else:
+                        rows = rows[:FEATURE_LIMIT]
+                    meta[layer] = {
+                        'total': queryset.count(),
+                        'returned': len(clusters) if clusters is not None else len(rows),
+                        'truncated': True,
+                        'clustered': clusters is not None,
+                    }
+                blobs.append(binary_format.encode_rows(layer, rows))
+            blobs.append(binary_format.encode_meta(meta))
+            return Response(binary_format.encode_payload(blobs, cursor))
         
-        # Get facilities
-        if 'facilities' in requested_layers:
-            facilities_qs = self._filter_facilities(filters)
-            data['facilities'] = PublicFacilitySerializer(facilities_qs, many=True).data
+        data = {}
+        meta = {}
+        clusters = {}
         
-        # Get districts
-        if 'districts' in requested_layers:
-            districts_qs = self._filter_districts(filters)
-            data['districts'] = DistrictSerializer(districts_qs, many=True).data
+        for layer in requested_layers:
+            queryset = getattr(self, self.LAYER_FILTERS[layer])(filters)
+            data[layer], layer_clusters, meta[layer] = self._capped_layer(layer, queryset, filters)
+            if layer_clusters is not None:
+                clusters[layer] = layer_clusters
         
-        # Get map layers
-        layers_qs = MapLayer.objects.filter(is_active=True)
-        if not request.user.is_authenticated or request.user.role not in ['official', 'admin']:
-            layers_qs = layers_qs.filter(is_public=True)
-        data['layers'] = MapLayerSerializer(layers_qs, many=True).data
+        if clusters:
+            data['clusters'] = clusters
+        data['layers'] = MapLayerSerializer(layer_catalogue.visible_layers(is_official), many=True).data
+        data['meta'] = meta
+        data['cursor'] = cursor
         
         return Response(data)
     
+    def _capped_layer(self, layer, queryset, filters):
+        """
+        Serialize a layer, capped at FEATURE_LIMIT features
+        
+        Over the cap, point layers are sent as grid clusters (at most
+        FEATURE_LIMIT of them, under data['clusters']) with an empty feature
+        list when clustering is enabled; otherwise the first FEATURE_LIMIT
+        features are sent.
+        
+        Returns:
+            tuple: (serialized features, clusters or None, meta dict)
+        """
+        queryset = self._deferred(layer, queryset, filters)
+        
+        # Fetch one extra row to detect overflow without a COUNT query
+        head = list(queryset[:FEATURE_LIMIT + 1])
+        if len(head) <= FEATURE_LIMIT:
+            return self._serialize_layer(layer, head, filters), None, {
+                'total': len(head), 'returned': len(head), 'truncated': False, 'clustered': False
+            }
+        
+        total = queryset.count()
+        clusters = self._overflow_clusters(layer, queryset, filters)
+        if clusters is not None:
+            return [], clusters, {
+                'total': total, 'returned': len(clusters), 'truncated': True, 'clustered': True
+            }
+        
+        return self._serialize_layer(layer, head[:FEATURE_LIMIT], filters), None, {
+            'total': total, 'returned': FEATURE_LIMIT, 'truncated': True, 'clustered': False
+        }
+    
+    def _overflow_clusters(self, layer, queryset, filters):
+        """Clusters for a point layer over the cap, or None when it is truncated instead"""
+        if layer == 'districts' or not filters.get('enable_clustering', True):
+            return None
+        coordinates = list(queryset.values_list('latitude', 'longitude'))
+        return cluster_points(
+            [float(lat) for lat, _ in coordinates],
+            [float(lng) for _, lng in coordinates],
+            cluster_cell_degrees(filters),
+            max_clusters=FEATURE_LIMIT
+        )
+    
+    def _deferred(self, layer, queryset, filters):
+        """Skip loading full-resolution district boundaries when a simplified level is served"""
+        if layer == 'districts' and level_for_zoom(filters.get('zoom')):
+            return queryset.defer('boundary_coordinates')
+        return queryset
+    
+    def _serialize_layer(self, layer, queryset, filters):
+        """Serialize a filtered layer queryset (or list of its rows)"""
+        if layer == 'issues':
+            return IssueMapSerializer(queryset, many=True).data
+        if layer == 'events':
+            return EventMapSerializer(queryset, many=True).data
+        if layer == 'facilities':
+            return PublicFacilitySerializer(queryset, many=True).data
+        
+        if 'zoom' in filters:
+            return DistrictMapSerializer(queryset, many=True, context={'zoom': filters['zoom']}).data
+        return DistrictSerializer(queryset, many=True).data
+    
+    def _binary_rows(self, layer, queryset, filters):
+        """Fetch just the columns the binary format encodes"""
+        fields = binary_format.layer_fields(layer)
+        level = level_for_zoom(filters.get('zoom'))
+        if layer == 'districts' and level:
+            fields = [
+                KeyTextTransform(level, 'simplified_boundaries') if field == 'boundary_coordinates' else field
+                for field in fields
+            ]
+            return [
+                (pk, json.loads(boundary or '[]'), *rest)
+                for pk, boundary, *rest in queryset.values_list(*fields)
+            ]
+        return queryset.values_list(*fields)
+    
+    def _layer_changes(self, layer, filters):
+        """
+        Get a layer's features changed since the cursor
+        
+        Rows modified since the cursor that no longer match the filters
+        (resolved, deactivated, made private) are reported as deleted
+        alongside the tombstoned ones. Only rows the client could hold are
+        checked: those that existed at the cursor and sit inside the
+        requested bounds, so the list scales with the viewport rather than
+        with every edit in the table.
+        
+        Returns:
+            tuple: (queryset of updated features, list of deleted IDs)
+        """
+        since = sync.window_start(filters['since'])
+        model = self.LAYER_MODELS[layer]
+        
+        visible = getattr(self, self.LAYER_FILTERS[layer])(filters).filter(updated_at__gt=since)
+        hidden = model.objects.filter(updated_at__gt=since, created_at__lte=filters['since'])
+        if layer != 'districts' and all(k in filters for k in ['north', 'south', 'east', 'west']):
+            hidden = hidden.filter(
+                latitude__gte=filters['south'],
+                latitude__lte=filters['north'],
+                longitude__gte=filters['west'],
+                longitude__lte=filters['east']
+            )
+        hidden = hidden.exclude(pk__in=visible.values('pk')).values_list('pk', flat=True)
+        
+        return visible, [str(pk) for pk in hidden] + sync.deleted_ids(layer, filters['since'])
+    
     def _filter_issues(self, filters):
         """Filter issues based on provided filters"""
         queryset = Issue.objects.select_related('category', 'reported_by').all()
@@ -282,6 +528,77 @@ class MapDataViewSet(viewsets.ViewSet):
         
         return queryset
     
+    @action(detail=False, methods=['get'], renderer_classes=[JSONRenderer, PNGRenderer])
+    def heatmap(self, request):
+        """Get an issue density grid for the requested bounds or tile"""
+        
+        params = HeatmapFilterSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        options = params.validated_data
+        is_tile = 'x' in options
+        
+        if is_tile:
+            bounds = heatmap.tile_bounds(options['zoom'], options['x'], options['y'])
+            width = height = options['size']
+        else:
+            bounds = {k: options[k] for k in ['north', 'south', 'east', 'west']}
+            width = options['size']
+            if 'zoom' in options:
+                width = heatmap.grid_size_for_zoom(bounds, options['zoom'], options['size'])
+            aspect = (bounds['north'] - bounds['south']) / (bounds['east'] - bounds['west'])
+            height = int(min(max(round(width * aspect), heatmap.MIN_GRID_SIZE), heatmap.MAX_GRID_SIZE))
+        
+        index = heatmap.issue_point_index.refresh()
+        latitudes, longitudes = index.select(
+            statuses=options.get('issue_status'),
+            categories=options.get('issue_categories'),
+            date_from=options.get('date_from'),
+            date_to=options.get('date_to'),
+        )
+        
+        grid = heatmap.density_grid(latitudes, longitudes, bounds, width, height, mercator=is_tile)
+        total = int(grid.sum())
+        max_count = int(grid.max()) if grid.size else 0
+        grid = heatmap.gaussian_smooth(grid, options['smooth'])
+        intensities = heatmap.quantize(grid)
+        
+        if request.accepted_renderer.format == 'png':
+            return Response(heatmap.encode_png(intensities))
+        
+        return Response({
+            'bounds': bounds,
+            'width': width,
+            'height': height,
+            'total': total,
+            'max_count': max_count,
+            'encoding': 'zlib+base64/uint8',
+            'data': heatmap.encode_grid(intensities),
+        })
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def coverage(self, request):
+        """Get the latest stored facility coverage results (officials only)"""
+        
+        if request.user.role not in ['official', 'admin']:
+            return Response(
+                {'error': 'Only officials can view coverage analysis'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        queryset = CoverageAnalysis.objects.all()
+        facility_types = request.query_params.getlist('facility_type')
+        if facility_types:
+            queryset = queryset.filter(facility_type__in=facility_types)
+        
+        # Latest run per facility type and radius
+        latest = {}
+        for analysis in queryset.order_by('facility_type', 'radius_km', '-computed_at'):
+            latest.setdefault((analysis.facility_type, analysis.radius_km), analysis)
+        
+        return Response(CoverageAnalysisSerializer(latest.values(), many=True).data)
+    
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get map statistics"""
@@ -356,17 +673,4 @@ class MapDataViewSet(viewsets.ViewSet):
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two points using Haversine formula"""
-    R = 6371  # Earth's radius in kilometers
-    
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
-    
-    dlat = lat2_rad - lat1_rad
-    dlon = lon2_rad - lon1_rad
-    
-    a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    
-    return R * c
+    return float(haversine_km(lat1, lon1, lat2, lon2))
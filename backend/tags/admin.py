@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Tag
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'usage_count', 'created_at']
+    search_fields = ['name']
+    readonly_fields = ['usage_count', 'created_at']
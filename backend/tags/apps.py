@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class TagsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tags'
+    
+    def ready(self):
+        # Import signals to register them
+        import tags.signals
@@ -0,0 +1,120 @@
+"""
+Normalized tag index
+Mirrors the JSON tags list of forum posts, issues and events into the Tag
+table and each model's indexed_tags many-to-many, so tag filters are
+indexed joins and autocomplete reads a stored usage count
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F
+from .models import Tag
+
+TAG_MAX_LENGTH = 50
+
+
+def normalize_tags(values):
+    """Lower-cased, whitespace-collapsed, de-duplicated tag names"""
+    names = []
+    for value in values or []:
+        name = ' '.join(str(value).split()).lower()[:TAG_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def _links(model):
+    """The through model of model.indexed_tags and its field pointing at model"""
+    return model._meta.get_field('indexed_tags').remote_field.through, model._meta.model_name
+
+
+def resolve_tags(names, tag_model=None):
+    """Tag IDs for the names, creating missing tags"""
+    tag_model = tag_model or Tag
+    ids = dict(tag_model.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        tag_model.objects.bulk_create([tag_model(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(tag_model.objects.filter(name__in=missing).values_list('name', 'id'))
+    return [ids[name] for name in names]
+
+
+def sync_tags(instance, created=False):
+    """Bring an object's index links and the affected usage counts in line with its tags"""
+    through, field = _links(type(instance))
+    names = normalize_tags(instance.tags)
+    if created and not names:
+        return
+
+    current = {} if created else dict(
+        through.objects.filter(**{field: instance.pk}).values_list('tag__name', 'tag_id')
+    )
+    removed = [tag_id for name, tag_id in current.items() if name not in names]
+    added = [name for name in names if name not in current]
+    if not removed and not added:
+        return
+
+    with transaction.atomic():
+        if removed:
+            through.objects.filter(**{field: instance.pk, 'tag_id__in': removed}).delete()
+            Tag.objects.filter(pk__in=removed, usage_count__gt=0).update(usage_count=F('usage_count') - 1)
+        if added:
+            tag_ids = resolve_tags(added)
+            through.objects.bulk_create(
+                [through(**{f'{field}_id': instance.pk, 'tag_id': tag_id}) for tag_id in tag_ids],
+                ignore_conflicts=True
+            )
+            Tag.objects.filter(pk__in=tag_ids).update(usage_count=F('usage_count') + 1)
+
+
+def unindex(instance):
+    """Release the usage counts of an object about to be deleted (its links cascade)"""
+    through, field = _links(type(instance))
+    tag_ids = list(through.objects.filter(**{field: instance.pk}).values_list('tag_id', flat=True))
+    if tag_ids:
+        Tag.objects.filter(pk__in=tag_ids, usage_count__gt=0).update(usage_count=F('usage_count') - 1)
+
+
+def filter_by_tags(queryset, names, match='all'):
+    """
+    Restrict a queryset of a tagged model to objects carrying the tags
+    match='all' requires every tag, match='any' at least one
+    """
+    names = normalize_tags(names)
+    if not names:
+        return queryset
+    through, field = _links(queryset.model)
+    links = through.objects.filter(tag__name__in=names)
+    if match == 'all' and len(names) > 1:
+        links = links.values(field).annotate(matched=Count('tag_id')).filter(matched=len(names))
+    return queryset.filter(pk__in=links.values(field))
+
+
+def rebuild_index(tag_model, models):
+    """
+    Recreate every index link and usage count from the JSON tags
+    Takes the model classes so migrations can pass historical models
+    """
+    counts = Counter()
+    with transaction.atomic():
+        for model in models:
+            through, field = _links(model)
+            through.objects.all().delete()
+            tagged = [
+                (pk, normalize_tags(tags))
+                for pk, tags in model.objects.values_list('pk', 'tags').iterator()
+            ]
+            names = sorted({name for _, object_names in tagged for name in object_names})
+            ids = dict(zip(names, resolve_tags(names, tag_model))) if names else {}
+            links = [
+                through(**{f'{field}_id': pk, 'tag_id': ids[name]})
+                for pk, object_names in tagged for name in object_names
+            ]
+            through.objects.bulk_create(links, batch_size=1000)
+            counts.update(link.tag_id for link in links)
+
+        tag_model.objects.exclude(pk__in=list(counts)).update(usage_count=0)
+        tags = list(tag_model.objects.filter(pk__in=list(counts)))
+        for tag in tags:
+            tag.usage_count = counts[tag.pk]
+        tag_model.objects.bulk_update(tags, ['usage_count'], batch_size=1000)
+    return len(counts)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from tags.indexing import rebuild_index
+from tags.models import Tag
+from tags.signals import TAGGED_MODELS
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the tag index and usage counts from the tags of forum posts, issues and events'
+
+    def handle(self, *args, **options):
+        tags = rebuild_index(Tag, TAGGED_MODELS)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {tags} tags across {len(TAGGED_MODELS)} models'))
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('usage_count', models.PositiveIntegerField(default=0, help_text='Tagged objects; maintained by tags.indexing')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Tag',
+                'verbose_name_plural': 'Tags',
+                'db_table': 'tags',
+                'ordering': ['-usage_count', 'name'],
+                'indexes': [models.Index(fields=['-usage_count', 'name'], name='tags_usage_c_a4ad1c_idx')],
+            },
+        ),
+    ]
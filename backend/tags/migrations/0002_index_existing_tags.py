@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:09
+
+from django.db import migrations
+from tags.indexing import rebuild_index
+
+
+def index_existing_tags(apps, schema_editor):
+    rebuild_index(apps.get_model('tags', 'Tag'), [
+        apps.get_model('forum', 'ForumPost'),
+        apps.get_model('issues', 'Issue'),
+        apps.get_model('events', 'Event'),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tags', '0001_initial'),
+        ('forum', '0004_forumpost_indexed_tags'),
+        ('issues', '0003_issue_indexed_tags'),
+        ('events', '0003_event_indexed_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_tags, migrations.RunPython.noop),
+    ]
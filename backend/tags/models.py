@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class Tag(models.Model):
+    """
+    Normalized tag shared by forum posts, issues and events
+    Each tagged model mirrors its JSON tags list into an indexed_tags
+    many-to-many (see tags.indexing)
+    """
+    
+    name = models.CharField(max_length=50, unique=True)
+    usage_count = models.PositiveIntegerField(default=0, help_text="Tagged objects; maintained by tags.indexing")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'tags'
+        verbose_name = 'Tag'
+        verbose_name_plural = 'Tags'
+        ordering = ['-usage_count', 'name']
+        indexes = [
+            models.Index(fields=['-usage_count', 'name']),
+        ]
+    
+    def __str__(self):
+        return self.name
@@ -0,0 +1,10 @@
+from rest_framework import serializers
+from .models import Tag
+
+
+class TagSerializer(serializers.ModelSerializer):
+    """Serializer for tag autocomplete"""
+    
+    class Meta:
+        model = Tag
+        fields = ['name', 'usage_count']
@@ -0,0 +1,27 @@
+"""
+Keep the tag index in step with the JSON tags of tagged models
+"""
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+from events.models import Event
+from forum.models import ForumPost
+from issues.models import Issue
+from .indexing import sync_tags, unindex
+
+TAGGED_MODELS = [ForumPost, Issue, Event]
+
+
+@receiver(post_save, sender=ForumPost)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Event)
+def index_tags_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'tags' not in update_fields:
+        return
+    sync_tags(instance, created=created)
+
+
+@receiver(pre_delete, sender=ForumPost)
+@receiver(pre_delete, sender=Issue)
+@receiver(pre_delete, sender=Event)
+def unindex_tags_on_delete(sender, instance, **kwargs):
+    unindex(instance)
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import TagViewSet
+
+# Create router and register viewsets
+router = DefaultRouter()
+router.register(r'', TagViewSet, basename='tag')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
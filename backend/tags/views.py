@@ -0,0 +1,34 @@
+from rest_framework import permissions, viewsets
+from .indexing import normalize_tags
+from .models import Tag
+from .serializers import TagSerializer
+
+AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+
+class TagViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Tag autocomplete: ?q=<prefix>&limit=<n>
+    Most used tags first, read from the stored usage counts
+    """
+    
+    serializer_class = TagSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
+    lookup_field = 'name'
+    
+    def get_queryset(self):
+        queryset = Tag.objects.filter(usage_count__gt=0)
+        if self.action != 'list':
+            return queryset
+        
+        prefix = normalize_tags([self.request.query_params.get('q', '')])
+        if prefix:
+            queryset = queryset.filter(name__startswith=prefix[0])
+        
+        try:
+            limit = int(self.request.query_params.get('limit', AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = AUTOCOMPLETE_LIMIT
+        return queryset.order_by('-usage_count', 'name')[:max(1, min(limit, MAX_AUTOCOMPLETE_LIMIT))]
@@ -140,7 +140,7 @@ const ForumPostCard: React.FC<ForumPostCardProps> = ({ post, onVote, isVoting })
 
           {/* Content Preview */}
           <p className="text-gray-300 text-sm mb-3 line-clamp-3">
-            {post.content}
+            {post.excerpt ?? post.content}
           </p>
 
           {/* Poll Preview */}
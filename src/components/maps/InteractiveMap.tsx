@@ -1,5 +1,5 @@
 import React, { useEffect, useRef } from 'react';
-import { MapContainer, TileLayer, Marker, Popup, Polygon, useMap } from 'react-leaflet';
+import { MapContainer, TileLayer, Marker, Popup, Polygon, CircleMarker, Tooltip, useMap } from 'react-leaflet';
 import { Icon, LatLngBounds } from 'leaflet';
 import MarkerClusterGroup from 'react-leaflet-cluster';
 import { motion } from 'framer-motion';
@@ -390,6 +390,34 @@ const InteractiveMap: React.FC<InteractiveMapProps> = ({ mapData }) => {
     ));
   };
 
+  const clusterColors: Record<string, string> = {
+    issues: '#EF4444',
+    events: '#10B981',
+    facilities: '#3B82F6',
+  };
+
+  // Layers over the server's feature cap arrive as count-weighted clusters
+  const renderClusters = () => {
+    if (!mapData?.clusters) return null;
+
+    return Object.entries(mapData.clusters).flatMap(([layer, clusters]) => {
+      if (!selectedLayers.includes(layer) || !clusters) return [];
+      return clusters.map((cluster, index) => (
+        <CircleMarker
+          key={`${layer}-cluster-${index}`}
+          center={[cluster.latitude, cluster.longitude]}
+          radius={Math.min(8 + Math.log2(cluster.count) * 3, 40)}
+          pathOptions={{ color: clusterColors[layer], fillColor: clusterColors[layer], fillOpacity: 0.5 }}
+          eventHandlers={{
+            click: () => mapRef.current?.setView([cluster.latitude, cluster.longitude], (mapRef.current?.getZoom() ?? 5) + 2),
+          }}
+        >
+          <Tooltip>{cluster.count} {layer}</Tooltip>
+        </CircleMarker>
+      ));
+    });
+  };
+
   // Always render the map, even with empty data
   const hasData = mapData && (
     (mapData.issues && mapData.issues.length > 0) ||
@@ -424,6 +452,7 @@ const InteractiveMap: React.FC<InteractiveMapProps> = ({ mapData }) => {
         {mapData && renderEventMarkers()}
         {mapData && renderFacilityMarkers()}
         {mapData && renderDistricts()}
+        {mapData && renderClusters()}
       </MapContainer>
     </div>
   );
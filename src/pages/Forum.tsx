@@ -48,6 +48,7 @@ const Forum: React.FC = () => {
     { value: 'oldest', label: 'Oldest First' },
     { value: 'popular', label: 'Most Popular' },
     { value: 'trending', label: 'Trending' },
+    { value: 'controversial', label: 'Most Debated' },
   ];
 
   useEffect(() => {
@@ -68,9 +69,11 @@ const Forum: React.FC = () => {
       case 'oldest':
         return 'created_at';
       case 'popular':
-        return '-upvotes';
+        return 'top';
       case 'trending':
-        return '-views';
+        return 'hot';
+      case 'controversial':
+        return 'controversial';
       default:
         return '-created_at';
     }
@@ -289,6 +289,22 @@ export const issuesAPI = {
     apiClient.get(`/issues/${issueId}/comments/`),
 };
 
+// Mirrors of the backend's stored rankings (forum/ranking.py) for the mock sorts
+const HOT_TIME_SCALE_HOURS = 12.5;
+const HOT_EPOCH_MS = Date.UTC(2024, 0, 1);
+
+const hotScore = (post: { score: number; created_at: string }) => {
+  const magnitude = Math.log10(Math.max(Math.abs(post.score), 1));
+  const hours = (new Date(post.created_at).getTime() - HOT_EPOCH_MS) / 3600000;
+  return Math.sign(post.score) * magnitude + hours / HOT_TIME_SCALE_HOURS;
+};
+
+const controversyScore = (post: { upvotes: number; downvotes: number }) => {
+  if (post.upvotes <= 0 || post.downvotes <= 0) return 0;
+  const balance = Math.min(post.upvotes, post.downvotes) / Math.max(post.upvotes, post.downvotes);
+  return Math.pow(post.upvotes + post.downvotes, balance);
+};
+
 // Mock Forum API
 const mockPosts = [
   {
@@ -471,6 +487,15 @@ export const forumAPI = {
             case '-views':
               filteredPosts.sort((a, b) => b.views - a.views);
               break;
+            case 'top':
+              filteredPosts.sort((a, b) => b.score - a.score || new Date(b.created_at).getTime() - new Date(a.created_at).getTime());
+              break;
+            case 'hot':
+              filteredPosts.sort((a, b) => hotScore(b) - hotScore(a));
+              break;
+            case 'controversial':
+              filteredPosts.sort((a, b) => controversyScore(b) - controversyScore(a) || new Date(b.created_at).getTime() - new Date(a.created_at).getTime());
+              break;
           }
         }
         
@@ -112,12 +112,28 @@ export interface EventMapData {
   updated_at: string;
 }
 
+// Sent instead of features when a point layer exceeds the server's feature cap
+export interface MapCluster {
+  latitude: number;
+  longitude: number;
+  count: number;
+}
+
+export interface MapLayerMeta {
+  total: number;
+  returned: number;
+  truncated: boolean;
+  clustered: boolean;
+}
+
 export interface MapData {
   issues: IssueMapData[];
   events: EventMapData[];
   facilities: PublicFacility[];
   districts: District[];
   layers: MapLayer[];
+  clusters?: Partial<Record<'issues' | 'events' | 'facilities', MapCluster[]>>;
+  meta?: Record<string, MapLayerMeta>;
 }
 
 export interface MapBounds {
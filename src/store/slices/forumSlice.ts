@@ -1,10 +1,13 @@
 import { createSlice, createAsyncThunk, PayloadAction } from '@reduxjs/toolkit';
 import { forumAPI } from '../../services/api';
 
+// A post as the list endpoint returns it: an excerpt, no full content.
+// Posts created or updated in place (poll votes, signatures) carry content too.
 export interface ForumPost {
   id: string;
   title: string;
-  content: string;
+  content?: string;
+  excerpt?: string;
   category: number;
   category_name: string;
   category_color: string;
@@ -53,6 +56,11 @@ export interface ForumPost {
   updated_at: string;
 }
 
+// A post as the detail endpoint returns it
+export interface ForumPostDetail extends ForumPost {
+  content: string;
+}
+
 export interface PollOption {
   id: string;
   text: string;
@@ -81,14 +89,14 @@ export interface ForumComment {
 
 interface ForumState {
   posts: ForumPost[];
-  currentPost: ForumPost | null;
+  currentPost: ForumPostDetail | null;
   comments: ForumComment[];
   isLoading: boolean;
   error: string | null;
   filters: {
     category: string;
     type: string;
-    sortBy: 'newest' | 'oldest' | 'popular' | 'trending';
+    sortBy: 'newest' | 'oldest' | 'popular' | 'trending' | 'controversial';
   };
   pagination: {
     currentPage: number;
@@ -1,7 +1,7 @@
 // Re-export all types from store slices for easy importing
 export type { User } from '../store/slices/authSlice';
 export type { Issue, TimelineEvent, IssueComment } from '../store/slices/issuesSlice';
-export type { ForumPost, PollOption, ForumComment } from '../store/slices/forumSlice';
+export type { ForumPost, ForumPostDetail, PollOption, ForumComment } from '../store/slices/forumSlice';
 export type { Event, EventAttendee } from '../store/slices/eventsSlice';
 export type { Notification } from '../store/slices/notificationsSlice';
 